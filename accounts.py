@@ -0,0 +1,137 @@
+"""
+Accounts - Several Portfolios Monitored Together
+Each account has its own holdings file and alert recipients; market data is shared
+"""
+
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+from portfolio_store import PortfolioStore
+from symbols import normalize_symbol
+
+
+# The portfolio at PORTFOLIO_PATH. Its alerts keep the unscoped alert state
+# they had before accounts existed, so adding accounts doesn't re-send them.
+DEFAULT_ACCOUNT = "main"
+
+DEFAULT_ACCOUNTS_PATH = "accounts.json"
+
+
+class Account:
+    """
+    One portfolio and where its alerts go
+
+    Recipients left as None fall back to TELEGRAM_CHAT_ID / EMAIL_TO.
+    """
+
+    def __init__(self, name: str, store: PortfolioStore,
+                 telegram_chat_id: Optional[str] = None, email_to: Optional[str] = None):
+        self.name = name
+        self.store = store
+        self.telegram_chat_id = telegram_chat_id
+        self.email_to = email_to
+
+    @property
+    def holdings(self) -> List[Dict]:
+        return self.store.holdings
+
+
+class PositionIndex:
+    """
+    Inverted index from symbol to every (account, holding) that holds it
+
+    Market data is fetched once per symbol in the index, and one price
+    drives the rules for every position in it, so fetch cost follows the
+    number of unique symbols rather than accounts × holdings.
+    """
+
+    def __init__(self, holdings_by_account: Dict[str, List[Dict]]):
+        """
+        Args:
+            holdings_by_account: Account name -> its holdings
+        
+        Symbols are normalized (BRK.B -> BRK-B) here, once, so prefetching,
+        quotes and the rules all use the same key for a position.
+        """
+        self._positions: Dict[str, List[Tuple[str, Dict]]] = {}
+        self._holdings = {}
+        self.accounts = list(holdings_by_account)
+        for account, holdings in holdings_by_account.items():
+            self._holdings[account] = []
+            for holding in holdings:
+                symbol = normalize_symbol(holding["symbol"])
+                if symbol != holding["symbol"]:
+                    holding = dict(holding, symbol=symbol)
+                self._holdings[account].append(holding)
+                self._positions.setdefault(symbol, []).append((account, holding))
+
+    @classmethod
+    def from_accounts(cls, accounts: List[Account]) -> "PositionIndex":
+        return cls({account.name: account.holdings for account in accounts})
+
+    @property
+    def symbols(self) -> List[str]:
+        """Unique held symbols, in the order they were first seen"""
+        return list(self._positions)
+
+    def positions(self, symbol: str) -> List[Tuple[str, Dict]]:
+        """(account, holding) pairs for a symbol (empty if nobody holds it)"""
+        return self._positions.get(symbol, [])
+
+    def holdings_for(self, account: str) -> List[Dict]:
+        """One account's holdings (empty for an unknown account)"""
+        return self._holdings.get(account, [])
+
+    def unique_holdings(self) -> List[Dict]:
+        """First position of each symbol (for building a SymbolUniverse)"""
+        return [positions[0][1] for positions in self._positions.values()]
+
+    def __iter__(self) -> Iterator[Tuple[str, List[Tuple[str, Dict]]]]:
+        return iter(self._positions.items())
+
+    def __len__(self) -> int:
+        return sum(len(positions) for positions in self._positions.values())
+
+    def describe(self) -> str:
+        return (f"{len(self)} positions in {len(self.accounts)} account(s), "
+                f"{len(self._positions)} unique symbols")
+
+
+def alert_scope(account: str) -> str:
+    """Alert store scope for an account's position alerts"""
+    return "" if account == DEFAULT_ACCOUNT else account
+
+
+def load_accounts(default_store: PortfolioStore,
+                  path: Optional[str] = DEFAULT_ACCOUNTS_PATH) -> List[Account]:
+    """
+    The default account plus those listed in the accounts file
+
+    File format (missing file = only the default account):
+        {"accounts": [{"name": "alice", "portfolio": "portfolios/alice.json",
+                       "telegram_chat_id": "123456", "email_to": "alice@example.com"}]}
+
+    Each portfolio file has the same format as portfolio.json; only its
+    holdings are used (the watchlist stays global).
+    """
+    accounts = [Account(DEFAULT_ACCOUNT, default_store)]
+    if not path or not os.path.exists(path):
+        return accounts
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    names = {DEFAULT_ACCOUNT}
+    for entry in data.get("accounts", []):
+        name = str(entry.get("name", "")).strip()
+        if not name or name in names or not entry.get("portfolio"):
+            print(f"⚠️  {path}: skipping account entry {entry!r} (needs a unique name and a portfolio)")
+            continue
+        names.add(name)
+        accounts.append(Account(
+            name,
+            PortfolioStore(entry["portfolio"], legacy_path=None),
+            telegram_chat_id=entry.get("telegram_chat_id"),
+            email_to=entry.get("email_to"),
+        ))
+    return accounts
@@ -0,0 +1,272 @@
+"""
+Alert Store - Persistent Alert State And History
+Remembers which alerts already fired (across restarts) and expires them per rule
+"""
+
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+# Rule names (shared with backtest.py)
+RULE_HARD_STOP = "hard_stop"
+RULE_WARNING = "warning"
+RULE_PROFIT_TARGET = "profit_target"
+RULE_SMA200_BREACH = "sma200_breach"
+RULE_MOMENTUM_PULLBACK = "momentum_pullback"
+
+# Default time an alert keeps suppressing repeats, in hours (None = forever).
+# Position alerts fire once per position; the daily rules are already scoped
+# to a date, so their entries only need to outlive that day.
+DEFAULT_TTL_HOURS = {
+    RULE_HARD_STOP: None,
+    RULE_WARNING: None,
+    RULE_PROFIT_TARGET: None,
+    RULE_SMA200_BREACH: 48,
+    RULE_MOMENTUM_PULLBACK: 48,
+}
+
+
+class AlertStore:
+    """
+    SQLite-backed alert state keyed by (rule, symbol, scope)
+
+    scope is "" for alerts that fire once per position (the account name for
+    positions outside the main account) and a date string for alerts that
+    fire once per day. Every fired alert is also appended to a
+    history table for later queries. Nothing is kept in memory, so the store
+    stays small no matter how long the bot runs.
+    """
+
+    def __init__(self, path: str, ttl_hours: Optional[Dict[str, Optional[float]]] = None,
+                 history_days: Optional[float] = 365):
+        """
+        Open (or create) the alert database
+
+        Args:
+            path: Path to the SQLite file (":memory:" for a throwaway store)
+            ttl_hours: Per-rule TTL overrides (see DEFAULT_TTL_HOURS)
+            history_days: Days of history to keep (None = forever)
+        """
+        self.path = path
+        self.ttl_hours = dict(DEFAULT_TTL_HOURS, **(ttl_hours or {}))
+        self.history_days = history_days
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS alert_state (
+                    rule TEXT NOT NULL,
+                    symbol TEXT NOT NULL,
+                    scope TEXT NOT NULL DEFAULT '',
+                    fired_at REAL NOT NULL,
+                    PRIMARY KEY (rule, symbol, scope)
+                ) WITHOUT ROWID
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS alert_state_symbol ON alert_state (symbol)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS alert_state_expiry ON alert_state (rule, fired_at)"
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS alert_history (
+                    id INTEGER PRIMARY KEY,
+                    rule TEXT NOT NULL,
+                    symbol TEXT NOT NULL,
+                    scope TEXT NOT NULL DEFAULT '',
+                    fired_at REAL NOT NULL,
+                    price REAL,
+                    detail TEXT
+                )
+                """
+            )
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(alert_history)")}
+            if "scope" not in columns:
+                # Databases created before the history recorded scopes
+                self._conn.execute(
+                    "ALTER TABLE alert_history ADD COLUMN scope TEXT NOT NULL DEFAULT ''"
+                )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS alert_history_symbol ON alert_history (symbol, fired_at)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS alert_history_rule ON alert_history (rule, fired_at)"
+            )
+
+    def has_fired(self, rule: str, symbol: str, scope: str = "") -> bool:
+        """
+        Check whether an alert already fired and has not expired
+
+        Args:
+            rule: Rule name (RULE_*)
+            symbol: Stock ticker symbol
+            scope: "" or a date string for once-a-day alerts
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fired_at FROM alert_state WHERE rule = ? AND symbol = ? AND scope = ?",
+                (rule, symbol, scope)
+            ).fetchone()
+
+        if row is None:
+            return False
+        ttl = self.ttl_hours.get(rule)
+        return ttl is None or time.time() - row["fired_at"] < ttl * 3600
+
+    def record(self, rule: str, symbol: str, scope: str = "",
+               price: Optional[float] = None, detail: str = "") -> None:
+        """
+        Mark an alert as fired and add it to the history
+
+        Args:
+            rule: Rule name (RULE_*)
+            symbol: Stock ticker symbol
+            scope: "" or a date string for once-a-day alerts
+            price: Price that triggered the alert
+            detail: Short free-form note (e.g. "-9.4%")
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO alert_state VALUES (?, ?, ?, ?)",
+                (rule, symbol, scope, now)
+            )
+            self._conn.execute(
+                "INSERT INTO alert_history (rule, symbol, scope, fired_at, price, detail) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (rule, symbol, scope, now, price, detail)
+            )
+
+    def evict_expired(self) -> int:
+        """
+        Remove alert state past its rule's TTL and history past history_days
+
+        Returns:
+            Number of alert state entries removed
+        """
+        now = time.time()
+        removed = 0
+
+        with self._lock, self._conn:
+            for rule, ttl in self.ttl_hours.items():
+                if ttl is None:
+                    continue
+                removed += self._conn.execute(
+                    "DELETE FROM alert_state WHERE rule = ? AND fired_at < ?",
+                    (rule, now - ttl * 3600)
+                ).rowcount
+
+            if self.history_days is not None:
+                self._conn.execute(
+                    "DELETE FROM alert_history WHERE fired_at < ?",
+                    (now - self.history_days * 86400,)
+                )
+
+        return removed
+
+    def clear(self, rule: Optional[str] = None, symbol: Optional[str] = None,
+              scope: Optional[str] = None) -> int:
+        """
+        Forget fired alerts so they can trigger again (history is kept)
+
+        Args:
+            rule: Only this rule (all rules if None)
+            symbol: Only this symbol (all symbols if None)
+            scope: Only this scope (all scopes if None)
+
+        Returns:
+            Number of entries removed
+        """
+        where, args = self._filter(rule=rule, symbol=symbol, scope=scope)
+        with self._lock, self._conn:
+            return self._conn.execute(f"DELETE FROM alert_state{where}", args).rowcount
+
+    def active(self, rule: Optional[str] = None, symbol: Optional[str] = None) -> List[Dict]:
+        """
+        Alerts currently suppressing repeats
+
+        Returns:
+            List of dicts with rule, symbol, scope and fired_at (datetime)
+        """
+        where, args = self._filter(rule=rule, symbol=symbol)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM alert_state{where} ORDER BY fired_at DESC", args
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def history(self, symbol: Optional[str] = None, rule: Optional[str] = None,
+                since: Optional[datetime] = None, scope: Optional[str] = None,
+                limit: int = 100) -> List[Dict]:
+        """
+        Past alerts, newest first
+
+        Args:
+            symbol: Only this symbol
+            rule: Only this rule
+            since: Only alerts fired at or after this time
+            scope: Only this scope (e.g. an account name)
+            limit: Maximum number of alerts returned
+
+        Returns:
+            List of dicts with rule, symbol, scope, fired_at (datetime), price and detail
+        """
+        where, args = self._filter(rule=rule, symbol=symbol, since=since, scope=scope)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT rule, symbol, scope, fired_at, price, detail FROM alert_history{where} "
+                "ORDER BY fired_at DESC LIMIT ?", (*args, limit)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of active entries per rule"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rule, COUNT(*) FROM alert_state GROUP BY rule"
+            ).fetchall()
+        return {rule: count for rule, count in rows}
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM alert_state").fetchone()[0]
+
+    @staticmethod
+    def _filter(rule: Optional[str] = None, symbol: Optional[str] = None,
+                since: Optional[datetime] = None, scope: Optional[str] = None):
+        """Build a WHERE clause from optional filters"""
+        clauses, args = [], []
+        if rule is not None:
+            clauses.append("rule = ?")
+            args.append(rule)
+        if symbol is not None:
+            clauses.append("symbol = ?")
+            args.append(symbol)
+        if since is not None:
+            clauses.append("fired_at >= ?")
+            args.append(since.timestamp())
+        if scope is not None:
+            clauses.append("scope = ?")
+            args.append(scope)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        return where, tuple(args)
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        """Row -> dict with fired_at as a datetime"""
+        item = dict(row)
+        item["fired_at"] = datetime.fromtimestamp(item["fired_at"])
+        return item
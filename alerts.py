@@ -3,10 +3,62 @@ Alert System - Handles Telegram and Email Notifications
 Sends alerts when trading rules are breached
 """
 
-import requests
+import atexit
+import queue
+import threading
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 import config
+import metrics
+
+
+# Telegram rejects messages longer than this
+TELEGRAM_MAX_LENGTH = 4096
+
+# Digest sections, most urgent first: severity -> heading
+SEVERITY_HEADINGS = {
+    "critical": "🔴 HARD STOPS",
+    "warning": "⚠️ WARNINGS",
+    "profit": "🎯 PROFIT TARGETS",
+    "signal": "💡 BUY SIGNALS",
+    "info": "ℹ️ OTHER",
+}
+
+
+def split_message(message: str, limit: int) -> List[str]:
+    """
+    Split a long message into parts no longer than limit, on paragraph breaks
+    
+    Args:
+        message: Text to split
+        limit: Maximum length of each part
+        
+    Returns:
+        List of message parts
+    """
+    parts = []
+    current = ""
+    
+    for paragraph in message.split("\n\n"):
+        # A single oversized paragraph is hard-cut
+        while len(paragraph) > limit:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(paragraph[:limit])
+            paragraph = paragraph[limit:]
+        
+        candidate = f"{current}\n\n{paragraph}" if current else paragraph
+        if len(candidate) > limit:
+            parts.append(current)
+            current = paragraph
+        else:
+            current = candidate
+    
+    if current:
+        parts.append(current)
+    
+    return parts
 
 
 class AlertSystem:
@@ -14,15 +66,50 @@ class AlertSystem:
     Manages notifications via Telegram and Email
     """
     
-    def __init__(self):
-        """Initialize the alert system"""
+    def __init__(self, account: Optional[str] = None, telegram_chat_id: Optional[str] = None,
+                 email_to: Optional[str] = None):
+        """
+        Initialize the alert system
+        
+        Args:
+            account: Account name shown on every alert (None = don't show one)
+            telegram_chat_id: Chat to send to instead of TELEGRAM_CHAT_ID
+            email_to: Recipient instead of EMAIL_TO
+        """
+        self.account = account
         self.telegram_enabled = config.TELEGRAM_ENABLED
         self.email_enabled = config.EMAIL_ENABLED
         self.telegram_token = config.TELEGRAM_BOT_TOKEN
-        self.telegram_chat_id = config.TELEGRAM_CHAT_ID
+        self.telegram_chat_id = telegram_chat_id or config.TELEGRAM_CHAT_ID
         self.resend_api_key = config.RESEND_API_KEY
+        self._email_to = email_to
         self.email_from = config.EMAIL_FROM
-        self.email_to = config.EMAIL_TO
+        self.email_to = email_to or config.EMAIL_TO
+        self.telegram_api_url = getattr(config, "TELEGRAM_API_URL", "https://api.telegram.org")
+        self.resend_api_url = getattr(config, "RESEND_API_URL", "https://api.resend.com")
+        
+        # Keep-alive HTTP sessions, one per provider (requests is imported on
+        # first use so the bot.py commands that send nothing start without it)
+        import requests
+        self.telegram_session = requests.Session()
+        self.email_session = requests.Session()
+        
+        # Alerts are queued and delivered by one background worker per
+        # channel, so rule checks never wait on Telegram/Resend and the two
+        # channels send in parallel
+        self.async_dispatch = getattr(config, "ALERT_ASYNC_DISPATCH", True)
+        self._channels = {
+            "telegram": lambda message, subject: self.send_telegram(message),
+            "email": lambda message, subject: self.send_email(subject, message),
+        }
+        self._queues = {channel: queue.Queue() for channel in self._channels}
+        self._workers = {}
+        self._worker_lock = threading.Lock()
+        
+        # Digest mode - alerts raised during a check are collected and sent
+        # as one message per channel when the check ends
+        self.immediate_hard_stops = getattr(config, "ALERT_DIGEST_IMMEDIATE_HARD_STOPS", True)
+        self._digest = None  # List of (severity, message, subject) while collecting
         
     def send_telegram(self, message: str) -> bool:
         """
@@ -41,8 +128,12 @@ class AlertSystem:
             print("⚠️  Telegram not configured - skipping notification")
             return False
         
+        if len(message) > TELEGRAM_MAX_LENGTH:
+            results = [self.send_telegram(part) for part in split_message(message, TELEGRAM_MAX_LENGTH)]
+            return all(results)
+        
         try:
-            url = f"https://api.telegram.org/bot{self.telegram_token}/sendMessage"
+            url = f"{self.telegram_api_url}/bot{self.telegram_token}/sendMessage"
             
             # Convert chat_id to int if it's a numeric string
             chat_id = self.telegram_chat_id
@@ -55,7 +146,7 @@ class AlertSystem:
                 "parse_mode": "HTML"  # Allows basic formatting
             }
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = self.telegram_session.post(url, json=payload, timeout=10)
             
             if response.status_code == 200:
                 print("✅ Telegram notification sent successfully")
@@ -99,7 +190,7 @@ class AlertSystem:
             return False
         
         try:
-            url = "https://api.resend.com/emails"
+            url = f"{self.resend_api_url}/emails"
             
             headers = {
                 "Authorization": f"Bearer {self.resend_api_key}",
@@ -113,7 +204,7 @@ class AlertSystem:
                 "html": f"<pre>{body}</pre>"  # Preserve formatting with <pre> tag
             }
             
-            response = requests.post(url, json=payload, headers=headers, timeout=10)
+            response = self.email_session.post(url, json=payload, headers=headers, timeout=10)
             
             if response.status_code == 200:
                 print("✅ Email notification sent successfully")
@@ -126,15 +217,29 @@ class AlertSystem:
             print(f"❌ Failed to send email: {e}")
             return False
     
-    def send_alert(self, message: str, subject: Optional[str] = None) -> None:
+    def send_alert(self, message: str, subject: Optional[str] = None,
+                   severity: str = "info") -> None:
         """
         Send an alert via both Telegram and Email
         
+        While a digest is open (begin_digest) the alert is held back and sent
+        with the rest of the check's alerts, except hard stops when
+        ALERT_DIGEST_IMMEDIATE_HARD_STOPS is on.
+        
         Args:
             message: The alert message
             subject: Email subject (optional, auto-generated if None)
+            severity: critical, warning, profit, signal or info
         """
+        if self._digest is not None:
+            if not (severity == "critical" and self.immediate_hard_stops):
+                print(f"📥 Queued for digest: {message.splitlines()[0]}")
+                self._digest.append((severity, message, subject))
+                return
+        
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if self.account:
+            timestamp += f"\nAccount: {self.account}"
         
         # Add timestamp to message
         formatted_message = f"🚨 TRADING ALERT 🚨\n{timestamp}\n\n{message}"
@@ -147,11 +252,149 @@ class AlertSystem:
         print(formatted_message)
         print("="*60 + "\n")
         
-        # Send via Telegram (primary)
-        self.send_telegram(formatted_message)
+        # Send via Telegram (primary) and Email (fallback)
+        self.dispatch(formatted_message, subject)
+    
+    def refresh_addresses(self) -> None:
+        """
+        Re-read EMAIL_FROM and EMAIL_TO from config (after config.py was
+        reloaded) - an account's own recipient is kept
+        """
+        self.email_from = config.EMAIL_FROM
+        self.email_to = self._email_to or config.EMAIL_TO
+    
+    def begin_digest(self) -> None:
+        """
+        Start collecting alerts into a digest (call at the start of a check)
+        """
+        if self._digest is None:
+            self._digest = []
+    
+    def end_digest(self) -> None:
+        """
+        Stop collecting and send the collected alerts, grouped by severity,
+        as one message per channel
+        """
+        collected = self._digest or []
+        self._digest = None
+        
+        if not collected:
+            return
+        
+        # A lone alert goes out in its normal format
+        if len(collected) == 1:
+            severity, message, subject = collected[0]
+            self.send_alert(message, subject, severity)
+            return
+        
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if self.account:
+            timestamp += f"\nAccount: {self.account}"
+        sections = []
+        counts = {}
+        for severity, heading in SEVERITY_HEADINGS.items():
+            messages = [message for s, message, _ in collected if s == severity]
+            if not messages:
+                continue
+            counts[severity] = len(messages)
+            sections.append(f"{heading} ({len(messages)})\n{'─'*30}\n\n" + "\n\n".join(messages))
+        
+        digest = (f"🚨 TRADING ALERT DIGEST 🚨\n{timestamp}\n"
+                  f"{len(collected)} alerts this check\n\n" + "\n\n".join(sections))
+        
+        summary = ", ".join(f"{count} {severity}" for severity, count in counts.items())
+        subject = f"Trading Alert Digest - {summary}"
+        
+        print("\n" + "="*60)
+        print(digest)
+        print("="*60 + "\n")
+        
+        self.dispatch(digest, subject)
+    
+    def dispatch(self, message: str, subject: str) -> None:
+        """
+        Queue a message for delivery on all channels
+        
+        Returns immediately; call flush() to wait for delivery.
+        Sends inline instead if async dispatch is disabled.
         
-        # Send via Email (fallback)
-        self.send_email(subject, formatted_message)
+        Args:
+            message: The text message to send
+            subject: Email subject line
+        """
+        if not self.async_dispatch:
+            for channel in self._channels:
+                self._deliver(channel, message, subject)
+            return
+        
+        self._start_workers()
+        for channel_queue in self._queues.values():
+            channel_queue.put((message, subject))
+    
+    def flush(self) -> None:
+        """
+        Block until every queued alert has been delivered
+        """
+        if self._workers:
+            for channel_queue in self._queues.values():
+                channel_queue.join()
+    
+    def shutdown(self) -> None:
+        """
+        Deliver any queued alerts, then stop the background workers
+        """
+        with self._worker_lock:
+            workers = self._workers
+            self._workers = {}
+        # Drop the exit hook, so replaced systems (e.g. after an accounts
+        # reload) aren't kept alive and shut down again at exit
+        atexit.unregister(self.shutdown)
+        
+        # Sentinel - each worker exits after draining its queue
+        for channel in workers:
+            self._queues[channel].put(None)
+        for worker in workers.values():
+            worker.join()
+    
+    def _start_workers(self) -> None:
+        """Start the per-channel dispatch workers on first use"""
+        with self._worker_lock:
+            if self._workers:
+                return
+            
+            for channel in self._channels:
+                worker = threading.Thread(target=self._dispatch_loop, args=(channel,),
+                                          name=f"alert-{channel}", daemon=True)
+                worker.start()
+                self._workers[channel] = worker
+            
+            # Make sure queued alerts still go out when the process exits
+            atexit.register(self.shutdown)
+    
+    def _dispatch_loop(self, channel: str) -> None:
+        """Background worker: deliver one channel's queued alerts in order"""
+        channel_queue = self._queues[channel]
+        
+        while True:
+            item = channel_queue.get()
+            try:
+                if item is None:
+                    return
+                self._deliver(channel, *item)
+            except Exception as e:
+                print(f"❌ Failed to deliver {channel} alert: {e}")
+            finally:
+                channel_queue.task_done()
+    
+    def _deliver(self, channel: str, message: str, subject: str) -> bool:
+        """Send on one channel, recording latency and outcome"""
+        with metrics.ALERT_SEND_SECONDS.time(channel=channel):
+            sent = False
+            try:
+                sent = self._channels[channel](message, subject)
+            finally:
+                metrics.ALERTS_SENT.inc(channel=channel, result="sent" if sent else "not_sent")
+        return sent
     
     def send_hard_stop_alert(self, symbol: str, current_price: float, 
                             avg_cost: float, loss_percent: float) -> None:
@@ -166,7 +409,7 @@ class AlertSystem:
             f"Loss: {loss_percent:.1f}%\n\n"
             f"⚠️ ACTION REQUIRED: Sell 100% of position immediately!"
         )
-        self.send_alert(message, f"🔴 HARD STOP: {symbol} - SELL NOW")
+        self.send_alert(message, f"🔴 HARD STOP: {symbol} - SELL NOW", severity="critical")
     
     def send_warning_alert(self, symbol: str, current_price: float,
                           avg_cost: float, loss_percent: float) -> None:
@@ -181,7 +424,7 @@ class AlertSystem:
             f"Loss: {loss_percent:.1f}%\n\n"
             f"📊 Prepare to sell if it drops further to ${avg_cost * 0.91:.2f}"
         )
-        self.send_alert(message, f"⚠️ WARNING: {symbol} Approaching Stop")
+        self.send_alert(message, f"⚠️ WARNING: {symbol} Approaching Stop", severity="warning")
     
     def send_profit_alert(self, symbol: str, current_price: float,
                          avg_cost: float, gain_percent: float) -> None:
@@ -196,7 +439,7 @@ class AlertSystem:
             f"Gain: +{gain_percent:.1f}%\n\n"
             f"💰 Consider selling 60-75% to lock in profits"
         )
-        self.send_alert(message, f"🎯 PROFIT: {symbol} +30% Target Hit")
+        self.send_alert(message, f"🎯 PROFIT: {symbol} +30% Target Hit", severity="profit")
     
     def send_sma_breach_alert(self, symbol: str, current_price: float,
                               sma_200: float) -> None:
@@ -210,7 +453,7 @@ class AlertSystem:
             f"200-Day SMA: ${sma_200:.2f}\n\n"
             f"⚠️ PLAN TO SELL: Consider selling on Monday morning"
         )
-        self.send_alert(message, f"📉 {symbol} - 200-Day MA Breach")
+        self.send_alert(message, f"📉 {symbol} - 200-Day MA Breach", severity="warning")
     
     def send_recommendation(self, symbol: str, current_price: float,
                            sma_50: float, high_52w: float, 
@@ -229,7 +472,7 @@ class AlertSystem:
             f"✅ Momentum + Pullback criteria met\n"
             f"📈 Consider buying - price above 50-day MA with healthy pullback"
         )
-        self.send_alert(message, f"💡 BUY SIGNAL: {symbol}")
+        self.send_alert(message, f"💡 BUY SIGNAL: {symbol}", severity="signal")
     
     def send_daily_summary(self, summary_text: str) -> None:
         """
@@ -242,8 +485,7 @@ class AlertSystem:
         print(message)
         print("="*60 + "\n")
         
-        self.send_telegram(message)
-        self.send_email("📊 Daily Portfolio Summary", message)
+        self.dispatch(message, "📊 Daily Portfolio Summary")
     
     def test_notifications(self) -> None:
         """
@@ -299,14 +541,17 @@ def verify_telegram_setup() -> bool:
     Returns True if setup is correct
     """
     import config
+    import requests
     
     if "YOUR_" in config.TELEGRAM_BOT_TOKEN or "YOUR_" in config.TELEGRAM_CHAT_ID:
         print("❌ Telegram credentials not configured in config.py")
         return False
     
+    api_url = getattr(config, "TELEGRAM_API_URL", "https://api.telegram.org")
+    
     try:
         # Try to get bot info first
-        bot_info_url = f"https://api.telegram.org/bot{config.TELEGRAM_BOT_TOKEN}/getMe"
+        bot_info_url = f"{api_url}/bot{config.TELEGRAM_BOT_TOKEN}/getMe"
         response = requests.get(bot_info_url, timeout=10)
         
         if response.status_code != 200:
@@ -322,7 +567,7 @@ def verify_telegram_setup() -> bool:
         if isinstance(chat_id, str) and chat_id.isdigit():
             chat_id = int(chat_id)
         
-        chat_url = f"https://api.telegram.org/bot{config.TELEGRAM_BOT_TOKEN}/getChat"
+        chat_url = f"{api_url}/bot{config.TELEGRAM_BOT_TOKEN}/getChat"
         chat_response = requests.post(chat_url, json={"chat_id": chat_id}, timeout=10)
         
         if chat_response.status_code == 200:
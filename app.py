@@ -3,99 +3,40 @@ Trading Bot Web UI
 Beautiful interface to manage holdings, watchlist, and settings
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
+from flask import Flask, Response, g, render_template, request, jsonify, redirect, url_for, flash
 import json
 import os
 import re
+import time
 from datetime import datetime
-import yfinance as yf
+import config as config_module
+import metrics
+from batch_fetch import latest_prices
+from market_data import create_provider
+from price_cache import PriceCache
+from price_stream import PriceStream
+from portfolio_store import create_store
+from symbols import normalize_symbol
 
 app = Flask(__name__)
 app.secret_key = os.urandom(24)  # For flash messages
 
+# All price data goes through one provider (yfinance, file replay, cached)
+market_data = create_provider()
 
-# =============================================================================
-# HELPER FUNCTIONS
-# =============================================================================
+# Holdings and watchlist, shared with the bot (PORTFOLIO_PATH)
+portfolio_store = create_store()
 
-def read_portfolio_file():
-    """Read and parse portfolio.py file"""
-    try:
-        with open('portfolio.py', 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Extract holdings
-        holdings_match = re.search(r'holdings\s*=\s*\[(.*?)\]', content, re.DOTALL)
-        holdings = []
-        if holdings_match:
-            holdings_text = holdings_match.group(1)
-            # Parse each holding
-            for match in re.finditer(r'\{"symbol":\s*"([^"]+)",\s*"shares":\s*([\d.]+),\s*"avg_cost":\s*([\d.]+)\}', holdings_text):
-                holdings.append({
-                    'symbol': match.group(1),
-                    'shares': float(match.group(2)),
-                    'avg_cost': float(match.group(3))
-                })
-        
-        # Extract watchlist
-        watchlist_match = re.search(r'watchlist\s*=\s*\[(.*?)\]', content, re.DOTALL)
-        watchlist = []
-        if watchlist_match:
-            watchlist_text = watchlist_match.group(1)
-            # Extract all quoted strings
-            for match in re.finditer(r'"([A-Z]+[A-Z0-9]*)"', watchlist_text):
-                watchlist.append(match.group(1))
-        
-        return holdings, watchlist
-    except Exception as e:
-        print(f"Error reading portfolio.py: {e}")
-        return [], []
+# Symbols per multi-ticker price request (same setting as the bot)
+BATCH_DOWNLOAD_SIZE = getattr(config_module, "BATCH_DOWNLOAD_SIZE", 50)
 
+# Snapshot of the bot's metrics, written after every check (see bot.py)
+METRICS_PATH = getattr(config_module, "METRICS_PATH", "metrics.json")
 
-def write_portfolio_file(holdings, watchlist):
-    """Write holdings and watchlist back to portfolio.py"""
-    try:
-        # Read existing file
-        with open('portfolio.py', 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Format holdings
-        holdings_str = '[\n'
-        for h in holdings:
-            holdings_str += f'    {{"symbol": "{h["symbol"]}", "shares": {h["shares"]}, "avg_cost": {h["avg_cost"]}}},\n'
-        holdings_str = holdings_str.rstrip(',\n') + '\n]'
-        
-        # Replace holdings
-        content = re.sub(
-            r'holdings\s*=\s*\[.*?\]',
-            f'holdings = {holdings_str}',
-            content,
-            flags=re.DOTALL
-        )
-        
-        # Format watchlist
-        watchlist_str = '[\n'
-        for w in watchlist:
-            watchlist_str += f'    "{w}",\n'
-        watchlist_str = watchlist_str.rstrip(',\n') + '\n]'
-        
-        # Replace watchlist
-        content = re.sub(
-            r'watchlist\s*=\s*\[.*?\]',
-            f'watchlist = {watchlist_str}',
-            content,
-            flags=re.DOTALL
-        )
-        
-        # Write back
-        with open('portfolio.py', 'w', encoding='utf-8') as f:
-            f.write(content)
-        
-        return True
-    except Exception as e:
-        print(f"Error writing portfolio.py: {e}")
-        return False
 
+# =============================================================================
+# HELPER FUNCTIONS
+# =============================================================================
 
 def read_config_file():
     """Read config.py and extract editable settings"""
@@ -183,68 +124,26 @@ def write_config_file(config):
         return False
 
 
-# =============================================================================
-# ROUTES
-# =============================================================================
+def fetch_prices(symbols):
+    """Latest price for each symbol in one batched request ({symbol: price or None})"""
+    try:
+        # 1-minute bars of the latest session (may be delayed 15-20 min),
+        # falling back to the latest daily close for symbols the batch missed
+        return latest_prices(symbols, BATCH_DOWNLOAD_SIZE, provider=market_data)
+    except Exception as e:
+        print(f"Error fetching prices: {e}")
+        return {symbol: None for symbol in symbols}
 
-@app.route('/')
-def index():
-    """Main dashboard"""
-    holdings, watchlist = read_portfolio_file()
-    config = read_config_file()
-    
-    return render_template('index.html', 
-                         holdings=holdings, 
-                         watchlist=watchlist,
-                         config=config)
 
+# Prices are refreshed at most once per PRICE_CACHE_SECONDS, however many tabs poll
+price_cache = PriceCache(fetch_prices, ttl=getattr(config_module, "PRICE_CACHE_SECONDS", 30))
 
-@app.route('/api/holdings', methods=['GET'])
-def get_holdings():
-    """Get current holdings with real-time prices"""
-    holdings, _ = read_portfolio_file()
-    
-    # Fetch real-time prices for all holdings
-    symbols = [h['symbol'] for h in holdings]
-    if symbols:
-        try:
-            # Get current prices
-            tickers = yf.Tickers(' '.join(symbols))
-            prices = {}
-            
-            for symbol in symbols:
-                try:
-                    ticker = yf.Ticker(symbol)
-                    # Try to get most recent price (may be delayed 15-20 min for free data)
-                    # Use '1d' period with '1m' interval for intraday data
-                    data = ticker.history(period='1d', interval='1m')
-                    if not data.empty:
-                        # Get the most recent close price
-                        prices[symbol] = float(data['Close'].iloc[-1])
-                    else:
-                        # Fallback: try daily data
-                        data = ticker.history(period='5d', interval='1d')
-                        if not data.empty:
-                            prices[symbol] = float(data['Close'].iloc[-1])
-                        else:
-                            # Last resort: try info (may be more delayed)
-                            info = ticker.info
-                            if 'regularMarketPrice' in info:
-                                prices[symbol] = float(info['regularMarketPrice'])
-                            elif 'currentPrice' in info:
-                                prices[symbol] = float(info['currentPrice'])
-                            else:
-                                prices[symbol] = None
-                except Exception as e:
-                    print(f"Error fetching price for {symbol}: {e}")
-                    prices[symbol] = None
-        except Exception as e:
-            print(f"Error fetching prices: {e}")
-            prices = {symbol: None for symbol in symbols}
-    else:
-        prices = {}
-    
-    # Add real-time data to holdings
+# Seconds between live price stream refreshes (one refresh for all viewers)
+STREAM_REFRESH_SECONDS = getattr(config_module, "STREAM_REFRESH_SECONDS", 10)
+
+
+def enrich_holdings(holdings, prices):
+    """Add current price, value and P&L to each holding"""
     enriched_holdings = []
     for holding in holdings:
         symbol = holding['symbol']
@@ -262,92 +161,156 @@ def get_holdings():
         }
         enriched_holdings.append(enriched)
     
-    return jsonify(enriched_holdings)
+    return enriched_holdings
+
+
+def load_stream_rows():
+    """Enriched holdings for the price stream, with prices at most one refresh old"""
+    holdings = portfolio_store.holdings
+    prices = price_cache.get([h['symbol'] for h in holdings], ttl=STREAM_REFRESH_SECONDS)
+    return enrich_holdings(holdings, prices)
+
+
+price_stream = PriceStream(load_stream_rows, interval=STREAM_REFRESH_SECONDS)
+
+
+# =============================================================================
+# ROUTES
+# =============================================================================
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_time(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        metrics.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started,
+                                             endpoint=request.endpoint or 'unmatched',
+                                             method=request.method)
+    return response
+
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Bot and web UI metrics in Prometheus text format"""
+    text = metrics.render(
+        metrics.REGISTRY.snapshot(process='web'),
+        metrics.load(METRICS_PATH) if METRICS_PATH else None,
+    )
+    return Response(text, mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.route('/')
+def index():
+    """Main dashboard"""
+    holdings, watchlist = portfolio_store.load()
+    config = read_config_file()
+    
+    return render_template('index.html', 
+                         holdings=holdings, 
+                         watchlist=watchlist,
+                         config=config)
+
+
+@app.route('/api/holdings', methods=['GET'])
+def get_holdings():
+    """Get current holdings with real-time prices"""
+    holdings = portfolio_store.holdings
+    
+    # Latest prices, shared by every open tab
+    prices = price_cache.get([h['symbol'] for h in holdings])
+    
+    return jsonify(enrich_holdings(holdings, prices))
+
+
+@app.route('/api/stream')
+def stream_holdings():
+    """Live holdings: server-sent events with only the positions that changed"""
+    return Response(price_stream.events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 
 @app.route('/api/holdings', methods=['POST'])
 def add_holding():
     """Add a new holding"""
     data = request.json
-    holdings, watchlist = read_portfolio_file()
     
     # Validate
-    symbol = data.get('symbol', '').upper().strip()
+    symbol = normalize_symbol(str(data.get('symbol', '')))
     shares = float(data.get('shares', 0))
     avg_cost = float(data.get('avg_cost', 0))
     
     if not symbol or shares <= 0 or avg_cost <= 0:
         return jsonify({'success': False, 'error': 'Invalid data'}), 400
     
+    try:
+        added = portfolio_store.add_holding(symbol, shares, avg_cost)
+    except OSError as e:
+        print(f"Error saving portfolio: {e}")
+        return jsonify({'success': False, 'error': 'Failed to save'}), 500
+    
     # Check if already exists
-    if any(h['symbol'] == symbol for h in holdings):
+    if not added:
         return jsonify({'success': False, 'error': 'Stock already in holdings'}), 400
     
-    # Add
-    holdings.append({
-        'symbol': symbol,
-        'shares': shares,
-        'avg_cost': avg_cost
-    })
-    
-    if write_portfolio_file(holdings, watchlist):
-        return jsonify({'success': True})
-    else:
-        return jsonify({'success': False, 'error': 'Failed to save'}), 500
+    price_stream.refresh_now()
+    return jsonify({'success': True})
 
 
 @app.route('/api/holdings/<symbol>', methods=['DELETE'])
 def delete_holding(symbol):
     """Delete a holding"""
-    holdings, watchlist = read_portfolio_file()
-    holdings = [h for h in holdings if h['symbol'] != symbol.upper()]
-    
-    if write_portfolio_file(holdings, watchlist):
-        return jsonify({'success': True})
-    else:
+    try:
+        portfolio_store.remove_holding(symbol)
+    except OSError as e:
+        print(f"Error saving portfolio: {e}")
         return jsonify({'success': False, 'error': 'Failed to save'}), 500
+    
+    price_stream.refresh_now()
+    return jsonify({'success': True})
 
 
 @app.route('/api/watchlist', methods=['GET'])
 def get_watchlist():
     """Get current watchlist"""
-    _, watchlist = read_portfolio_file()
-    return jsonify(watchlist)
+    return jsonify(portfolio_store.watchlist)
 
 
 @app.route('/api/watchlist', methods=['POST'])
 def add_watchlist_item():
     """Add to watchlist"""
     data = request.json
-    symbol = data.get('symbol', '').upper().strip()
+    symbol = normalize_symbol(str(data.get('symbol', '')))
     
     if not symbol:
         return jsonify({'success': False, 'error': 'Invalid symbol'}), 400
     
-    holdings, watchlist = read_portfolio_file()
+    try:
+        added = portfolio_store.add_to_watchlist(symbol)
+    except OSError as e:
+        print(f"Error saving portfolio: {e}")
+        return jsonify({'success': False, 'error': 'Failed to save'}), 500
     
     # Check if already exists
-    if symbol in watchlist:
+    if not added:
         return jsonify({'success': False, 'error': 'Already in watchlist'}), 400
     
-    watchlist.append(symbol)
-    
-    if write_portfolio_file(holdings, watchlist):
-        return jsonify({'success': True})
-    else:
-        return jsonify({'success': False, 'error': 'Failed to save'}), 500
+    return jsonify({'success': True})
 
 
 @app.route('/api/watchlist/<symbol>', methods=['DELETE'])
 def delete_watchlist_item(symbol):
     """Delete from watchlist"""
-    holdings, watchlist = read_portfolio_file()
-    watchlist = [w for w in watchlist if w != symbol.upper()]
-    
-    if write_portfolio_file(holdings, watchlist):
-        return jsonify({'success': True})
-    else:
+    try:
+        portfolio_store.remove_from_watchlist(symbol)
+    except OSError as e:
+        print(f"Error saving portfolio: {e}")
         return jsonify({'success': False, 'error': 'Failed to save'}), 500
+    
+    return jsonify({'success': True})
 
 
 @app.route('/api/config', methods=['POST'])
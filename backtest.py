@@ -0,0 +1,470 @@
+"""
+Backtest - Replay The Alert Rules Over Historical Data
+Computes every rule as whole arrays (dates x symbols) instead of looping day by day
+"""
+
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+import config
+from batch_fetch import MARKET_TIMEZONE
+from signals import compact_order
+
+
+# Bars in a year - the live rules look at 1y of daily history
+BARS_PER_YEAR = 252
+
+# Rules that tell you to sell (a good alert is followed by a falling price)
+SELL_RULES = ("hard_stop", "warning", "profit_target", "sma200_breach")
+
+# Entries are processed in blocks to bound memory (entries x max_hold floats)
+ENTRY_BLOCK_SIZE = 20000
+
+
+def params_from_config() -> Dict[str, float]:
+    """
+    Current rule thresholds from config
+    """
+    return {
+        "hard_stop": config.HARD_STOP_MULTIPLIER,
+        "warning": config.WARNING_MULTIPLIER,
+        "profit_target": config.PROFIT_TARGET_MULTIPLIER,
+        "pullback_percent": config.RECOMMENDATION_PULLBACK_PERCENT,
+        "rsi_max": config.RECOMMENDATION_RSI_MAX,
+        "min_price": config.RECOMMENDATION_MIN_PRICE,
+    }
+
+
+# =============================================================================
+# DATA LOADING
+# =============================================================================
+
+def load_closes(path: str) -> pd.DataFrame:
+    """
+    Load daily closes from an offline CSV or Parquet file
+
+    Accepts either long format (columns Date, Symbol, Close - one row per
+    bar) or wide format (first column is the date, one column per symbol).
+
+    Args:
+        path: .csv, .csv.gz or .parquet file
+
+    Returns:
+        Dates x symbols close matrix
+    """
+    if path.endswith(".parquet"):
+        raw = pd.read_parquet(path)
+        if "Date" not in raw.columns and "date" not in raw.columns:
+            raw = raw.reset_index()
+    else:
+        raw = pd.read_csv(path)
+
+    columns = {c.lower(): c for c in raw.columns}
+    if "symbol" in columns and "close" in columns:
+        date_col = columns.get("date", raw.columns[0])
+        closes = raw.pivot_table(index=date_col, columns=columns["symbol"],
+                                 values=columns["close"], aggfunc="last")
+    else:
+        closes = raw.set_index(raw.columns[0])
+
+    # Naive dates are exchange-local; aware ones are converted like batch_fetch does
+    try:
+        index = pd.DatetimeIndex(pd.to_datetime(closes.index))
+    except ValueError:
+        # Offsets change across DST (e.g. a CSV written from yfinance data)
+        index = pd.DatetimeIndex(pd.to_datetime(closes.index, utc=True))
+    if index.tz is None:
+        index = index.tz_localize(MARKET_TIMEZONE)
+    closes.index = index.tz_convert(MARKET_TIMEZONE)
+    closes.index.name = "Date"
+    closes.columns.name = None
+    return _as_matrix(closes.sort_index())
+
+
+def load_closes_from_store(path: str, symbols: Optional[List[str]] = None,
+                           interval: str = "1d") -> pd.DataFrame:
+    """
+    Load closes from the bot's bar store (see bar_store.py)
+
+    Args:
+        path: Bar store SQLite file
+        symbols: Symbols to load (all stored symbols if None)
+        interval: Bar interval
+
+    Returns:
+        Dates x symbols close matrix
+    """
+    from bar_store import BarStore
+
+    store = BarStore(path)
+    try:
+        if symbols is None:
+            rows = store._conn.execute(
+                "SELECT DISTINCT symbol FROM bars WHERE interval = ?", (interval,)
+            ).fetchall()
+            symbols = [row[0] for row in rows]
+
+        frames = {}
+        for symbol in symbols:
+            data = store.load(symbol, interval)
+            if data is not None:
+                frames[symbol] = data["Close"]
+    finally:
+        store.close()
+
+    if not frames:
+        return pd.DataFrame()
+    return _as_matrix(pd.concat(frames, axis=1).sort_index())
+
+
+def _as_matrix(closes: pd.DataFrame) -> pd.DataFrame:
+    """Rebuild as one float block so column-wise operations stay vectorized"""
+    return pd.DataFrame(closes.to_numpy(dtype=float), index=closes.index, columns=closes.columns)
+
+
+# =============================================================================
+# INDICATORS
+# =============================================================================
+
+def compute_indicators(closes: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Compute every indicator the rules need, once, for all symbols
+
+    Thresholds are not involved here, so the result can be reused across
+    many parameter sets (see sweep.py).
+
+    Args:
+        closes: Dates x symbols close matrix
+
+    Returns:
+        Dictionary of dates x symbols arrays: close, sma_50, high_52w, rsi
+        and sma200_breach (bool - Friday close below the 200-day SMA)
+    """
+    # Windows count each symbol's own bars - on the union of dates a symbol
+    # that trades every day (BTC-USD) would leave NaN gaps in every stock
+    # column. Rolling runs on the compacted columns, then results go back
+    # to their dates (NaN on days a symbol has no bar).
+    values = closes.to_numpy(dtype=float)
+    order = compact_order(values)
+    compact = pd.DataFrame(np.take_along_axis(values, order, axis=0), columns=closes.columns)
+
+    delta = compact.diff()
+    gain = delta.where(delta > 0, 0).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rsi = 100 - (100 / (1 + gain / loss))
+
+    # where() turned the NaN padding into 0 - RSI needs 14 of the symbol's
+    # own bars, as calculate_rsi does on a single symbol
+    rsi = rsi.where(compact.notna().cumsum() >= 14)
+
+    def on_dates(result: pd.DataFrame) -> np.ndarray:
+        out = np.empty_like(values)
+        np.put_along_axis(out, order, result.to_numpy(dtype=float), axis=0)
+        return out
+
+    sma_200 = on_dates(compact.rolling(window=200).mean())
+    fridays = np.asarray(closes.index.weekday == 4)
+
+    return {
+        "close": values,
+        "sma_50": on_dates(compact.rolling(window=50).mean()),
+        "high_52w": on_dates(compact.rolling(window=BARS_PER_YEAR, min_periods=1).max()),
+        "rsi": on_dates(rsi),
+        "sma200_breach": (values < sma_200) & fridays[:, None],
+    }
+
+
+def buy_signals(ind: Dict[str, np.ndarray], params: Dict[str, float]) -> np.ndarray:
+    """
+    Rule 5 (momentum + pullback) for every date and symbol
+
+    Returns:
+        Dates x symbols boolean array
+    """
+    close = ind["close"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pullback = (ind["high_52w"] - close) / ind["high_52w"] * 100
+        return (
+            (close >= params["min_price"])
+            & (close > ind["sma_50"])
+            & (pullback >= params["pullback_percent"])
+            & ~(ind["rsi"] >= params["rsi_max"])
+        )
+
+
+def entry_points(signals: np.ndarray):
+    """
+    Row and column of the first day of each run of buy signals
+
+    Returns:
+        (rows, cols) arrays
+    """
+    previous = np.vstack([np.zeros((1, signals.shape[1]), dtype=bool), signals[:-1]])
+    return np.nonzero(signals & ~previous)
+
+
+# =============================================================================
+# BACKTEST
+# =============================================================================
+
+def _forward_window(values: np.ndarray, rows: np.ndarray, cols: np.ndarray,
+                    length: int) -> np.ndarray:
+    """
+    Values on the `length` bars after each (row, col), NaN past the end
+
+    Returns:
+        entries x length array
+    """
+    idx = rows[:, None] + np.arange(1, length + 1)[None, :]
+    out_of_range = idx >= values.shape[0]
+    window = values[np.minimum(idx, values.shape[0] - 1), cols[:, None]]
+    if window.dtype == bool:
+        return window & ~out_of_range
+    window = window.astype(float)
+    window[out_of_range] = np.nan
+    return window
+
+
+def position_paths(ind: Dict[str, np.ndarray], entry_rows: np.ndarray,
+                   entry_cols: np.ndarray, max_hold: int = BARS_PER_YEAR) -> Dict[str, np.ndarray]:
+    """
+    Follow positions bought at the entry close for up to max_hold bars
+
+    Only the running low and high of price / entry price are kept: the
+    first crossing of any threshold is where the running extreme passes
+    it, so one set of paths serves every hard stop, warning and profit
+    target level.
+
+    Args:
+        ind: Output of compute_indicators
+        entry_rows: Row (date) of each entry
+        entry_cols: Column (symbol) of each entry
+        max_hold: Maximum bars to follow a position
+
+    Returns:
+        Dictionary with running_low / running_high (entries x max_hold) and
+        first_breach (offset of the first 200-SMA breach, max_hold if none)
+    """
+    close = ind["close"]
+    forward = _forward_window(close, entry_rows, entry_cols, max_hold)
+    ratio = forward / close[entry_rows, entry_cols][:, None]
+
+    # Missing bars never count as a crossing
+    missing = np.isnan(ratio)
+    breach = _forward_window(ind["sma200_breach"], entry_rows, entry_cols, max_hold)
+
+    return {
+        "running_low": np.minimum.accumulate(np.where(missing, np.inf, ratio), axis=1),
+        "running_high": np.maximum.accumulate(np.where(missing, -np.inf, ratio), axis=1),
+        "first_breach": np.where(breach.any(axis=1), np.argmax(breach, axis=1), max_hold),
+    }
+
+
+def position_alerts(paths: Dict[str, np.ndarray], entry_rows: np.ndarray,
+                    params: Dict[str, float]) -> Dict[str, np.ndarray]:
+    """
+    Rules 1-4 for positions described by position_paths
+
+    Hard stop and profit target fire on their first crossing; whichever
+    comes first closes the position. The warning fires on the first close
+    inside the warning band, and the 200-SMA breach on the first Friday
+    close below the SMA, as long as the position is still open.
+
+    Args:
+        paths: Output of position_paths
+        entry_rows: Row (date) of each entry
+        params: Rule thresholds
+
+    Returns:
+        Dictionary rule -> row of the alert per entry (-1 if it never fired)
+    """
+    max_hold = paths["running_low"].shape[1]
+
+    # Bars before the first crossing (max_hold if it never happens)
+    first_hard = (paths["running_low"] > params["hard_stop"]).sum(axis=1)
+    first_warning = (paths["running_low"] > params["warning"]).sum(axis=1)
+    first_profit = (paths["running_high"] < params["profit_target"]).sum(axis=1)
+    exit_offset = np.minimum(first_hard, first_profit)
+
+    # The first close at or below the warning level is in the band unless
+    # it gapped straight through the hard stop - which closes the position
+    fired = {
+        "hard_stop": np.where(first_hard == exit_offset, first_hard, max_hold),
+        "warning": np.where(first_warning < exit_offset, first_warning, max_hold),
+        "profit_target": np.where(first_profit < first_hard, first_profit, max_hold),
+        "sma200_breach": np.where(paths["first_breach"] <= exit_offset,
+                                  paths["first_breach"], max_hold),
+    }
+
+    return {
+        rule: np.where(offset < max_hold, entry_rows + 1 + offset, -1)
+        for rule, offset in fired.items()
+    }
+
+
+def forward_returns(close: np.ndarray, rows: np.ndarray, cols: np.ndarray,
+                    horizons: Sequence[int]) -> Dict[str, np.ndarray]:
+    """
+    Return from each (row, col) close to the close `h` bars later
+
+    Returns:
+        Dictionary "fwd_{h}d" -> array (NaN past the end of the data)
+    """
+    result = {}
+    price = close[rows, cols]
+    for h in horizons:
+        later_rows = rows + h
+        valid = later_rows < close.shape[0]
+        later = np.where(valid, close[np.minimum(later_rows, close.shape[0] - 1), cols], np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result[f"fwd_{h}d"] = later / price - 1
+    return result
+
+
+def run_backtest(closes: pd.DataFrame, params: Optional[Dict[str, float]] = None,
+                 horizons: Sequence[int] = (5, 20, 60), max_hold: int = BARS_PER_YEAR,
+                 indicators: Optional[Dict[str, np.ndarray]] = None) -> pd.DataFrame:
+    """
+    Replay all five rules over history
+
+    Buy signals (Rule 5) are reported on every day they hold, like the live
+    bot's once-a-day recommendation. A position is opened on the first day
+    of each run of buy signals, and Rules 1-4 are then applied to it using
+    the entry close as the average cost.
+
+    Args:
+        closes: Dates x symbols close matrix
+        params: Rule thresholds (defaults to params_from_config())
+        horizons: Forward return horizons in bars
+        max_hold: Maximum bars to follow a position
+        indicators: Precomputed compute_indicators(closes) (optional)
+
+    Returns:
+        DataFrame with one row per alert: date, symbol, rule, price,
+        entry_date, entry_price and fwd_{h}d forward returns
+    """
+    params = params or params_from_config()
+    ind = indicators if indicators is not None else compute_indicators(closes)
+    close = ind["close"]
+
+    signals = buy_signals(ind, params)
+    signal_rows, signal_cols = np.nonzero(signals)
+    entry_rows, entry_cols = entry_points(signals)
+
+    rows = [signal_rows]
+    cols = [signal_cols]
+    rules = [np.full(len(signal_rows), "momentum_pullback", dtype=object)]
+    entries = [signal_rows]
+
+    for start in range(0, len(entry_rows), ENTRY_BLOCK_SIZE):
+        block_rows = entry_rows[start:start + ENTRY_BLOCK_SIZE]
+        block_cols = entry_cols[start:start + ENTRY_BLOCK_SIZE]
+        paths = position_paths(ind, block_rows, block_cols, max_hold)
+        fired = position_alerts(paths, block_rows, params)
+
+        for rule, alert_rows in fired.items():
+            hit = alert_rows >= 0
+            rows.append(alert_rows[hit])
+            cols.append(block_cols[hit])
+            rules.append(np.full(hit.sum(), rule, dtype=object))
+            entries.append(block_rows[hit])
+
+    rows = np.concatenate(rows)
+    cols = np.concatenate(cols)
+    entries = np.concatenate(entries)
+
+    alerts = pd.DataFrame({
+        "date": closes.index[rows],
+        "symbol": closes.columns[cols],
+        "rule": np.concatenate(rules),
+        "price": close[rows, cols],
+        "entry_date": closes.index[entries],
+        "entry_price": close[entries, cols],
+    })
+    for name, values in forward_returns(close, rows, cols, horizons).items():
+        alerts[name] = values
+
+    return alerts.sort_values(["date", "symbol", "rule"], ignore_index=True)
+
+
+def summarize(alerts: pd.DataFrame, horizon: int = 20) -> pd.DataFrame:
+    """
+    Per-rule statistics
+
+    hit_rate is the share of alerts that were right at the horizon: price
+    up after a buy signal, price down after a sell alert.
+    drawdown_avoided is the average loss not taken by acting on sell
+    alerts (-forward return), in percent.
+
+    Args:
+        alerts: Output of run_backtest
+        horizon: Forward return horizon used for scoring
+
+    Returns:
+        DataFrame indexed by rule
+    """
+    column = f"fwd_{horizon}d"
+    rows = []
+
+    for rule, group in alerts.groupby("rule"):
+        returns = group[column].dropna()
+        sell = rule in SELL_RULES
+        hits = (returns < 0) if sell else (returns > 0)
+        row = {
+            "rule": rule,
+            "alerts": len(group),
+            "symbols": group["symbol"].nunique(),
+            "hit_rate": hits.mean() * 100 if len(returns) else np.nan,
+        }
+        for fwd in [c for c in alerts.columns if c.startswith("fwd_")]:
+            row[f"avg_{fwd}"] = group[fwd].mean() * 100
+        row["drawdown_avoided"] = -returns.mean() * 100 if sell and len(returns) else np.nan
+        rows.append(row)
+
+    return pd.DataFrame(rows).set_index("rule") if rows else pd.DataFrame()
+
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Usage:
+        python backtest.py prices.csv [--out alerts.csv]
+        python backtest.py --store market_data.db [--out alerts.csv]
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(main.__doc__)
+        return
+
+    out_path = None
+    if "--out" in argv:
+        out_path = argv[argv.index("--out") + 1]
+
+    started = time.perf_counter()
+    if argv[0] == "--store":
+        closes = load_closes_from_store(argv[1])
+    else:
+        closes = load_closes(argv[0])
+    loaded = time.perf_counter()
+
+    alerts = run_backtest(closes)
+    finished = time.perf_counter()
+
+    print(f"\n📼 Backtest: {closes.shape[1]} symbols x {closes.shape[0]} bars "
+          f"({closes.index[0].date()} → {closes.index[-1].date()})")
+    print(f"⏱️  Load {loaded - started:.2f}s | Backtest {finished - loaded:.2f}s\n")
+    print(summarize(alerts).round(2).to_string())
+
+    if out_path:
+        alerts.to_csv(out_path, index=False)
+        print(f"\n💾 {len(alerts)} alerts written to {os.path.abspath(out_path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+Bar Store - Persistent OHLCV Cache
+Keeps downloaded price history on disk so each check only fetches new bars
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Optional, Tuple
+import numpy as np
+import pandas as pd
+
+
+# Columns stored for every bar (matches yfinance history() output)
+BAR_COLUMNS = ["Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"]
+
+
+# Relative close difference on a re-fetched, completed bar that means the
+# provider's split/dividend adjustment has changed since it was stored
+ADJUSTMENT_TOLERANCE = 1e-4
+
+
+def provider_store_path(path: str, provider: str) -> str:
+    """
+    Bar store file for one market data source: `path` itself for live
+    yfinance data, "market_data.replay.db" etc. for the others
+    """
+    if provider == "yfinance":
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{provider}{ext}"
+
+
+def period_start(period: str, now: Optional[pd.Timestamp] = None) -> Optional[pd.Timestamp]:
+    """
+    Convert a yfinance period string into the calendar start date it covers
+
+    Args:
+        period: Time period (5d, 3mo, 1y, ytd, max)
+        now: Reference time (defaults to current time)
+
+    Returns:
+        Start timestamp, or None for "max" (all history)
+    """
+    if now is None:
+        now = pd.Timestamp.now()
+
+    if period == "max":
+        return None
+    if period == "ytd":
+        return pd.Timestamp(year=now.year, month=1, day=1, tz=now.tz)
+
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+
+    amount, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        return now - pd.Timedelta(days=amount)
+    if unit == "wk":
+        return now - pd.Timedelta(weeks=amount)
+    if unit == "mo":
+        return now - pd.DateOffset(months=amount)
+    return now - pd.DateOffset(years=amount)
+
+
+def period_length(period: str) -> pd.Timedelta:
+    """
+    Approximate calendar length of a period, for comparing periods
+
+    Args:
+        period: Time period (5d, 3mo, 1y, ytd, max)
+
+    Returns:
+        Approximate length ("max" is treated as unbounded)
+    """
+    if period == "max":
+        return pd.Timedelta.max
+
+    # Day periods count trading days - convert to calendar days
+    match = re.fullmatch(r"(\d+)d", period)
+    if match:
+        return pd.Timedelta(days=int(match.group(1)) * 7 / 5)
+
+    now = pd.Timestamp.now()
+    return now - period_start(period, now)
+
+
+def slice_period(data: pd.DataFrame, period: str) -> pd.DataFrame:
+    """
+    Trim a history DataFrame down to the bars a period would return
+
+    Day periods count trading bars ("5d" = last 5 bars) like yfinance does,
+    longer periods are cut on the calendar.
+
+    Args:
+        data: DataFrame with a DatetimeIndex
+        period: Time period (5d, 3mo, 1y, ytd, max)
+
+    Returns:
+        Sliced DataFrame
+    """
+    match = re.fullmatch(r"(\d+)d", period)
+    if match:
+        return data.tail(int(match.group(1)))
+
+    now = data.index[-1] if len(data) else pd.Timestamp.now()
+    start = period_start(period, now)
+    if start is None:
+        return data
+    return data[data.index > start]
+
+
+def adjustment_changed(stored: pd.DataFrame, fresh: pd.DataFrame) -> bool:
+    """
+    Check whether re-fetched bars are on a different adjustment basis than
+    the stored ones
+
+    yfinance history is split/dividend adjusted back from the latest event,
+    so after a new event every older stored bar is off. Detected by a split
+    or dividend on a fresh bar that the store does not already have, or by
+    a completed overlap bar (any but the last stored one, which may still
+    have been forming) whose close moved.
+
+    Args:
+        stored: Most recent stored bars (see BarStore.tail)
+        fresh: Bars just downloaded from the first of those onwards
+
+    Returns:
+        True if the stored series should be re-downloaded in full
+    """
+    if fresh is None or fresh.empty:
+        return False
+
+    # A handful of bars each - plain loops beat pandas alignment here
+    last = stored.index[-1]
+    before = dict(zip(stored.index, zip(stored["Close"].to_numpy(dtype=float),
+                                        _events(stored, "Dividends"), _events(stored, "Stock Splits"))))
+    for ts, close, dividend, split in zip(fresh.index, fresh["Close"].to_numpy(dtype=float),
+                                          _events(fresh, "Dividends"), _events(fresh, "Stock Splits")):
+        stored_bar = before.get(ts)
+        if (dividend or split) and (stored_bar is None or stored_bar[1:] != (dividend, split)):
+            return True
+        if stored_bar is not None and ts != last and \
+                abs(close - stored_bar[0]) > abs(stored_bar[0]) * ADJUSTMENT_TOLERANCE:
+            return True
+    return False
+
+
+def _events(data: pd.DataFrame, column: str) -> list:
+    """Dividend or split amounts per bar (0 where missing)"""
+    if column not in data.columns:
+        return [0.0] * len(data)
+    return data[column].fillna(0.0).astype(float).tolist()
+
+
+class BarStore:
+    """
+    SQLite-backed store of OHLCV bars keyed by symbol and interval
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the bar database
+
+        Args:
+            path: Path to the SQLite file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS bars (
+                    symbol TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    ts INTEGER NOT NULL,
+                    open REAL, high REAL, low REAL, close REAL,
+                    volume REAL, dividends REAL, splits REAL,
+                    PRIMARY KEY (symbol, interval, ts)
+                ) WITHOUT ROWID
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS series (
+                    symbol TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    tz TEXT,
+                    updated_at TEXT,
+                    PRIMARY KEY (symbol, interval)
+                )
+                """
+            )
+
+    def span(self, symbol: str, interval: str) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp], int]:
+        """
+        Get the first and last stored bar times and the bar count
+
+        Returns:
+            (first, last, count) - first/last are None if nothing is stored
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(ts), MAX(ts), COUNT(*) FROM bars WHERE symbol = ? AND interval = ?",
+                (symbol, interval)
+            ).fetchone()
+            tz = self._get_tz(symbol, interval)
+
+        if row is None or row[2] == 0:
+            return None, None, 0
+
+        first = self._to_timestamp(row[0], tz)
+        last = self._to_timestamp(row[1], tz)
+        return first, last, row[2]
+
+    def load(self, symbol: str, interval: str,
+             start: Optional[pd.Timestamp] = None) -> Optional[pd.DataFrame]:
+        """
+        Load stored bars for a symbol
+
+        Args:
+            symbol: Stock ticker symbol
+            interval: Bar interval (1d, 1h, etc.)
+            start: Only return bars after this time (optional)
+
+        Returns:
+            DataFrame shaped like yfinance history(), or None if nothing is stored
+        """
+        query = ("SELECT ts, open, high, low, close, volume, dividends, splits "
+                 "FROM bars WHERE symbol = ? AND interval = ?")
+        params = [symbol, interval]
+        if start is not None:
+            query += " AND ts > ?"
+            params.append(self._to_epoch(start))
+        query += " ORDER BY ts"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+            tz = self._get_tz(symbol, interval)
+
+        return self._to_frame(rows, tz)
+
+    def tail(self, symbol: str, interval: str, count: int) -> Optional[pd.DataFrame]:
+        """
+        Load the last `count` stored bars for a symbol
+
+        Returns:
+            DataFrame shaped like load(), or None if nothing is stored
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ts, open, high, low, close, volume, dividends, splits "
+                "FROM bars WHERE symbol = ? AND interval = ? ORDER BY ts DESC LIMIT ?",
+                (symbol, interval, count)
+            ).fetchall()
+            tz = self._get_tz(symbol, interval)
+
+        return self._to_frame(rows[::-1], tz)
+
+    def append(self, symbol: str, interval: str, data: pd.DataFrame) -> int:
+        """
+        Insert new bars, replacing any bars with the same timestamp
+
+        The last stored bar of a session is usually partial, so re-fetched
+        bars always overwrite what is already on disk.
+
+        Args:
+            symbol: Stock ticker symbol
+            interval: Bar interval (1d, 1h, etc.)
+            data: DataFrame from yfinance history()
+
+        Returns:
+            Number of bars written
+        """
+        return self._write(symbol, interval, data, replace=False)
+
+    def replace(self, symbol: str, interval: str, data: pd.DataFrame) -> int:
+        """
+        Replace everything stored for a symbol with freshly downloaded bars
+        (after a split or dividend changed the adjustment of its history)
+
+        Returns:
+            Number of bars written
+        """
+        return self._write(symbol, interval, data, replace=True)
+
+    def _write(self, symbol: str, interval: str, data: pd.DataFrame, replace: bool) -> int:
+        """Insert bars, optionally dropping the stored series first (one transaction)"""
+        if data is None or data.empty:
+            return 0
+
+        frame = data.reindex(columns=BAR_COLUMNS)
+        frame[["Dividends", "Stock Splits"]] = frame[["Dividends", "Stock Splits"]].fillna(0.0)
+        tz = str(data.index.tz) if data.index.tz is not None else None
+        epochs = [self._to_epoch(ts) for ts in data.index]
+
+        rows = [
+            (symbol, interval, ts, *(None if pd.isna(v) else float(v) for v in values))
+            for ts, values in zip(epochs, frame.itertuples(index=False, name=None))
+        ]
+
+        with self._lock, self._conn:
+            if replace:
+                self._conn.execute("DELETE FROM bars WHERE symbol = ? AND interval = ?",
+                                   (symbol, interval))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?)",
+                (symbol, interval, tz, datetime.now().isoformat())
+            )
+
+        return len(rows)
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def _get_tz(self, symbol: str, interval: str) -> Optional[str]:
+        """Look up the exchange timezone recorded for a series (lock must be held)"""
+        row = self._conn.execute(
+            "SELECT tz FROM series WHERE symbol = ? AND interval = ?", (symbol, interval)
+        ).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _to_epoch(ts) -> int:
+        """Convert a timestamp to UTC epoch seconds (naive times are treated as UTC)"""
+        ts = pd.Timestamp(ts)
+        if ts.tz is None:
+            ts = ts.tz_localize("UTC")
+        return int(ts.timestamp())
+
+    @staticmethod
+    def _to_timestamp(epoch: int, tz: Optional[str]) -> pd.Timestamp:
+        """Convert UTC epoch seconds back to a timestamp in the series timezone"""
+        ts = pd.Timestamp(epoch, unit="s", tz="UTC")
+        return ts.tz_convert(tz) if tz else ts
+
+    @staticmethod
+    def _to_frame(rows: list, tz: Optional[str]) -> Optional[pd.DataFrame]:
+        """Build a history DataFrame from (ts, open, ..., splits) rows"""
+        if not rows:
+            return None
+
+        # One float block (NULL -> NaN) - much cheaper than per-column inference
+        values = np.array(rows, dtype=float)
+        index = pd.to_datetime(values[:, 0].astype("int64"), unit="s", utc=True)
+        if tz:
+            index = index.tz_convert(tz)
+        return pd.DataFrame(values[:, 1:], index=index.rename("Date"), columns=BAR_COLUMNS)
@@ -0,0 +1,184 @@
+"""
+Batch Fetch - Multi-Symbol Market Data Downloads
+Requests many symbols per HTTP call instead of one round-trip per symbol
+"""
+
+from typing import Dict, List, Optional
+import pandas as pd
+
+
+# yfinance takes ~150 ms to import, so it is loaded by the first download
+# (commands that never fetch don't pay for it). Kept as a module attribute
+# so benchmark.py can swap in its offline stand-in.
+yf = None
+
+
+def load_yfinance():
+    """The yfinance module (or whatever replaced it), imported on first use"""
+    global yf
+    if yf is None:
+        import yfinance
+        yf = yfinance
+    return yf
+
+
+# Exchange timezone used to line batched bars up with Ticker.history() output
+MARKET_TIMEZONE = "America/New_York"
+
+
+def chunked(symbols: List[str], chunk_size: int) -> List[List[str]]:
+    """
+    Split a symbol list into chunks of at most chunk_size symbols
+    """
+    chunk_size = max(1, int(chunk_size))
+    return [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+
+
+def split_download(data: pd.DataFrame, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+    """
+    Split a multi-ticker download into one history DataFrame per symbol
+
+    Args:
+        data: DataFrame from yf.download(group_by="ticker")
+        symbols: Symbols that were requested
+
+    Returns:
+        Dictionary mapping symbol to its history (symbols without data are left out)
+    """
+    frames = {}
+    if data is None or data.empty:
+        return frames
+
+    for symbol in symbols:
+        if isinstance(data.columns, pd.MultiIndex):
+            if symbol not in data.columns.get_level_values(0):
+                continue
+            frame = data[symbol]
+        elif len(symbols) == 1:
+            frame = data
+        else:
+            continue
+
+        # The batch index is the union of all symbols' trading days
+        frame = frame[frame["Close"].notna()].copy()
+        if frame.empty:
+            continue
+
+        if frame.index.tz is None:
+            frame.index = frame.index.tz_localize(MARKET_TIMEZONE)
+        else:
+            frame.index = frame.index.tz_convert(MARKET_TIMEZONE)
+        frame.index.name = "Date"
+        frame.columns.name = None
+
+        frames[symbol] = frame
+
+    return frames
+
+
+def download_batch(symbols: List[str], chunk_size: int = 50, pool=None, provider=None,
+                   record_errors: bool = True, **kwargs) -> Dict[str, pd.DataFrame]:
+    """
+    Download history for many symbols with one request per chunk
+
+    Args:
+        symbols: Stock ticker symbols
+        chunk_size: Maximum symbols per request
+        pool: FetchPool to run chunks concurrently (optional, serial if None)
+        provider: MarketDataProvider to download from (optional, yfinance if None)
+        record_errors: Count missed symbols as pool errors (False when the
+            caller falls back to another fetch and records what still fails)
+        **kwargs: Passed to provider.download / yf.download (period, start, interval, ...)
+
+    Returns:
+        Dictionary mapping symbol to its history (failed symbols are left out)
+    """
+    frames = {}
+    symbols = list(dict.fromkeys(symbols))
+    chunks = chunked(symbols, chunk_size)
+    fetch = provider.download if provider is not None else download_chunk
+
+    if pool is None:
+        for chunk in chunks:
+            frames.update(fetch(chunk, **kwargs))
+        return frames
+
+    tasks = [(chunk, lambda chunk=chunk: fetch(chunk, **kwargs)) for chunk in chunks]
+    for chunk, result in zip(chunks, pool.run(tasks, record_errors=record_errors)):
+        if result is None:
+            continue  # Failure/timeout already counted by the pool
+        frames.update(result)
+
+        missing = [symbol for symbol in chunk if symbol not in result]
+        if missing and record_errors:
+            pool.stats.record_error(missing)
+
+    return frames
+
+
+def latest_prices(symbols: List[str], chunk_size: int = 50, pool=None,
+                  provider=None) -> Dict[str, Optional[float]]:
+    """
+    Latest price for many symbols - the last 1-minute close of the latest
+    session, downloaded in batches (a few KB per symbol instead of months
+    of daily bars)
+
+    Symbols the batches miss fall back to provider.quote() one by one, and
+    only those the fallback can't price either count as fetch errors.
+
+    Args:
+        symbols: Stock ticker symbols
+        chunk_size: Maximum symbols per request
+        pool: FetchPool to run requests on (optional, serial if None)
+        provider: MarketDataProvider to use (optional, yfinance if None - no fallback)
+
+    Returns:
+        Dictionary mapping every symbol to its price (None if unavailable)
+    """
+    intraday = download_batch(symbols, chunk_size, pool=pool, provider=provider,
+                              record_errors=provider is None, period="1d", interval="1m")
+    prices = {symbol: float(data["Close"].iloc[-1]) for symbol, data in intraday.items()}
+
+    missing = [symbol for symbol in dict.fromkeys(symbols) if symbol not in prices]
+    if missing and provider is not None:
+        if pool is not None:
+            def quote(symbol: str) -> float:
+                # Raise so the pool counts (and reports) a symbol without a price
+                price = provider.quote(symbol)
+                if price is None:
+                    raise ValueError("no price returned")
+                return price
+
+            prices.update(pool.map(quote, missing))
+        else:
+            for symbol in missing:
+                try:
+                    prices[symbol] = provider.quote(symbol)
+                except Exception as e:
+                    print(f"Error fetching price for {symbol}: {e}")
+
+    return {symbol: prices.get(symbol) for symbol in symbols}
+
+
+def download_chunk(symbols: List[str], **kwargs) -> Dict[str, pd.DataFrame]:
+    """
+    Download one chunk of symbols in a single multi-ticker request
+
+    Returns:
+        Dictionary mapping symbol to its history (empty if the request failed)
+    """
+    try:
+        data = load_yfinance().download(
+            symbols,
+            group_by="ticker",
+            actions=True,
+            auto_adjust=True,
+            ignore_tz=False,
+            progress=False,
+            **kwargs
+        )
+    except Exception as e:
+        print(f"❌ Error downloading batch of {len(symbols)} symbols: {e}")
+        return {}
+
+    return split_download(data, symbols)
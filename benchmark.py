@@ -0,0 +1,673 @@
+"""
+Benchmark - Offline Performance Suite
+Times the rules engine, alert delivery and web API on synthetic data, with no network
+"""
+
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+import numpy as np
+import pandas as pd
+import config
+from bar_store import period_start
+from portfolio_store import PortfolioStore
+
+
+# Universe sizes benchmarked by default
+SIZES = (10, 300, 5000)
+
+# Timed iterations per size (after one warm-up run)
+DEFAULT_ITERATIONS = {10: 20, 300: 5, 5000: 2}
+
+# Entry points, in the order they run
+ENTRY_POINTS = ("evaluate_portfolio", "scan_watchlist", "generate_daily_summary",
+                "alerts", "api_holdings", "api_holdings_cached", "startup")
+
+# bot.py commands timed from a cold interpreter by the startup benchmark
+STARTUP_COMMANDS = ("--help", "--verify")
+
+# Runs one bot.py command with Telegram pointed at the HTTP sink
+STARTUP_SCRIPT = """
+import os, sys
+import config
+config.TELEGRAM_BOT_TOKEN = config.TELEGRAM_CHAT_ID = "1"
+config.TELEGRAM_API_URL = os.environ["BENCHMARK_SINK_URL"]
+sys.argv = ["bot.py"] + sys.argv[1:]
+import bot
+bot.main()
+"""
+
+DEFAULT_BASELINE = "benchmark_baseline.json"
+
+# Slowdown (or memory growth) tolerated before a result counts as a regression
+REGRESSION_TOLERANCE = 0.20
+
+# Daily bars served per symbol (enough for the 200-day SMA and 1y periods)
+HISTORY_BARS = 300
+
+
+# =============================================================================
+# FAKE MARKET DATA
+# =============================================================================
+
+class FakeTicker:
+    """Stand-in for yfinance.Ticker backed by FakeYFinance"""
+
+    def __init__(self, market: "FakeYFinance", symbol: str):
+        self.market = market
+        self.symbol = symbol
+
+    def history(self, period: Optional[str] = None, start: Optional[str] = None,
+                interval: str = "1d", **kwargs) -> pd.DataFrame:
+        self.market.request()
+        return self.market.bars(self.symbol, interval, period, start)
+
+    @property
+    def info(self) -> Dict:
+        self.market.request()
+        close = self.market.bars(self.symbol, "1d")["Close"]
+        return {"regularMarketPrice": float(close.iloc[-1])}
+
+
+class FakeYFinance:
+    """
+    Offline stand-in for the yfinance module
+
+    Serves deterministic synthetic OHLCV (a random walk seeded by the
+    symbol) for daily and 1-minute bars, in the same layout yfinance
+    returns. An optional per-request latency mimics network round-trips.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        """
+        Args:
+            latency: Seconds added to every request
+        """
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._today = pd.Timestamp.now(tz="America/New_York").normalize()
+
+    def Ticker(self, symbol: str) -> FakeTicker:
+        return FakeTicker(self, symbol)
+
+    def download(self, tickers, period: Optional[str] = None, start: Optional[str] = None,
+                 interval: str = "1d", **kwargs) -> pd.DataFrame:
+        """Multi-ticker download, grouped by ticker like group_by="ticker" """
+        self.request()
+        symbols = [tickers] if isinstance(tickers, str) else list(tickers)
+        frames = {symbol: self.bars(symbol, interval, period, start) for symbol in symbols}
+        return pd.concat(frames, axis=1)
+
+    def request(self) -> None:
+        """Count a request and wait out the simulated latency"""
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def bars(self, symbol: str, interval: str, period: Optional[str] = None,
+             start: Optional[str] = None) -> pd.DataFrame:
+        """Synthetic bars for a symbol, sliced to a period or start date"""
+        key = (symbol, interval)
+        with self._lock:
+            data = self._cache.get(key)
+        if data is None:
+            data = self._generate(symbol, interval)
+            with self._lock:
+                self._cache[key] = data
+
+        if start is not None:
+            return data[data.index >= pd.Timestamp(start, tz=data.index.tz)].copy()
+        if period is not None and interval == "1d":
+            begin = period_start(period, now=data.index[-1])
+            if begin is not None:
+                return data[data.index > begin].copy()
+        return data.copy()
+
+    def _generate(self, symbol: str, interval: str) -> pd.DataFrame:
+        rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+        first_price = rng.uniform(10, 500)
+
+        if interval == "1d":
+            index = pd.bdate_range(end=self._today.tz_localize(None), periods=HISTORY_BARS)
+            index = index.tz_localize("America/New_York")
+            drift, volatility = 0.0003, 0.02
+        else:
+            session = self._today + pd.Timedelta(hours=9, minutes=30)
+            index = pd.date_range(session, periods=390, freq="1min")
+            drift, volatility = 0.0, 0.001
+
+        close = first_price * np.exp(np.cumsum(rng.normal(drift, volatility, len(index))))
+        spread = close * rng.uniform(0.001, 0.01, len(index))
+
+        data = pd.DataFrame({
+            "Open": close + rng.uniform(-1, 1, len(index)) * spread,
+            "High": close + spread,
+            "Low": close - spread,
+            "Close": close,
+            "Volume": rng.integers(10_000, 5_000_000, len(index)).astype(float),
+            "Dividends": 0.0,
+            "Stock Splits": 0.0,
+        }, index=index)
+        data.index.name = "Datetime" if interval != "1d" else "Date"
+        return data
+
+
+# =============================================================================
+# DUMMY HTTP SINK
+# =============================================================================
+
+class HttpSink:
+    """
+    Local HTTP server that accepts Telegram and Resend API calls
+
+    Answers every request with 200 and a minimal JSON body, and counts
+    what it received.
+    """
+
+    def __init__(self):
+        sink = self
+        self.requests = 0
+        self._lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real APIs
+            disable_nagle_algorithm = True  # Headers and body go out in separate writes
+
+            def _reply(self):
+                length = int(self.headers.get("Content-Length", 0))
+                if length:
+                    self.rfile.read(length)
+                with sink._lock:
+                    sink.requests += 1
+                body = b'{"ok": true, "result": {"username": "benchmark"}, "id": "0"}'
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _reply
+            do_POST = _reply
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# =============================================================================
+# ENVIRONMENT
+# =============================================================================
+
+@contextlib.contextmanager
+def offline_environment(workdir: str, market: FakeYFinance, sink: HttpSink):
+    """
+    Point the bot at the fake market data and HTTP sink
+
+    Config values and the yfinance references behind YFinanceProvider are
+    swapped for the duration of the block and restored afterwards.
+    Databases and the portfolio store go to workdir.
+    """
+    import batch_fetch
+    import market_data
+
+    overrides = {
+        "BAR_CACHE_ENABLED": True,
+        "BAR_CACHE_PATH": os.path.join(workdir, "market_data.db"),
+        "ALERT_STATE_PATH": os.path.join(workdir, "alert_state.db"),
+        "PORTFOLIO_PATH": os.path.join(workdir, "portfolio.json"),
+        "TELEGRAM_ENABLED": True,
+        "TELEGRAM_BOT_TOKEN": "benchmark-token",
+        "TELEGRAM_CHAT_ID": "1",
+        "TELEGRAM_API_URL": sink.url,
+        "EMAIL_ENABLED": True,
+        "RESEND_API_KEY": "benchmark-key",
+        "EMAIL_FROM": "bench@example.com",
+        "RESEND_API_URL": sink.url,
+        "ALERT_DIGEST_ENABLED": False,
+        # Measure the live code path, not a provider-level cache
+        "MARKET_DATA_PROVIDER": "yfinance",
+        "MARKET_DATA_CACHE_SECONDS": 0,
+        # Requests are local - don't benchmark the rate limiter
+        "FETCH_RATE_PER_SECOND": 1e9,
+        "FETCH_BURST": 1e9,
+    }
+    modules = [batch_fetch, market_data]
+    web_app = sys.modules.get("app")
+
+    missing = object()
+    saved_config = {name: getattr(config, name, missing) for name in overrides}
+    saved_yf = {module: module.yf for module in modules}
+    saved_web = (web_app.market_data, web_app.portfolio_store) if web_app else None
+
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    for module in modules:
+        module.yf = market
+    if web_app:
+        web_app.market_data = market_data.create_provider()
+        web_app.portfolio_store = PortfolioStore(config.PORTFOLIO_PATH, legacy_path=None)
+
+    try:
+        yield
+    finally:
+        for name, value in saved_config.items():
+            if value is missing:
+                delattr(config, name)
+            else:
+                setattr(config, name, value)
+        for module, yf_module in saved_yf.items():
+            module.yf = yf_module
+        if web_app:
+            web_app.market_data, web_app.portfolio_store = saved_web
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the bot's console output while it is being timed"""
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def make_portfolio(market: FakeYFinance, size: int):
+    """
+    Synthetic holdings and watchlist of `size` symbols each
+
+    Average costs are spread around the current price so some holdings
+    trigger hard stops, warnings and profit alerts.
+    """
+    symbols = [f"S{i:04d}" for i in range(size)]
+    factors = np.random.default_rng(size).uniform(0.7, 1.4, size)
+    holdings = [
+        {"symbol": symbol, "shares": 10.0,
+         "avg_cost": round(float(market.bars(symbol, "1d")["Close"].iloc[-1] * factor), 2)}
+        for symbol, factor in zip(symbols, factors)
+    ]
+    return holdings, symbols
+
+
+# =============================================================================
+# MEASUREMENT
+# =============================================================================
+
+def summarize_times(times: List[float], units: int, peak_bytes: int,
+                    cold: Optional[float] = None) -> Dict:
+    """Latency percentiles (ms), throughput (units/s) and peak memory (MB)"""
+    values = np.array(times) * 1000
+    result = {
+        "iterations": len(times),
+        "units": units,
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+        "throughput": units / (values.mean() / 1000) if values.mean() else float("inf"),
+        "peak_mb": peak_bytes / 1024 / 1024,
+    }
+    if cold is not None:
+        result["cold_ms"] = cold * 1000
+    return result
+
+
+def measure(fn: Callable[[], None], iterations: int, units: int,
+            after: Optional[Callable[[], None]] = None) -> Dict:
+    """
+    Time fn: one untimed warm-up (reported as cold_ms), `iterations` timed
+    runs, then one run under tracemalloc for peak memory
+
+    Args:
+        fn: Entry point call
+        iterations: Timed runs
+        units: Work items per call (symbols) for throughput
+        after: Untimed cleanup after every call (e.g. drain alert queues)
+    """
+    def run() -> float:
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        if after:
+            after()
+        return elapsed
+
+    with quiet():
+        cold = run()
+        times = [run() for _ in range(iterations)]
+
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return summarize_times(times, units, peak, cold)
+
+
+def measure_alerts(count: int, iterations: int) -> Dict:
+    """
+    Alert path: per-alert latency of send_alert (what a rule check waits
+    for) and end-to-end delivery throughput to the HTTP sink
+    """
+    from alerts import AlertSystem
+
+    system = AlertSystem()
+    severities = ["critical", "warning", "profit", "signal", "info"]
+
+    def send_all() -> List[float]:
+        latencies = []
+        for i in range(count):
+            started = time.perf_counter()
+            system.send_alert(f"🔔 Benchmark alert {i}\nS{i:04d} crossed a threshold",
+                              severity=severities[i % len(severities)])
+            latencies.append(time.perf_counter() - started)
+        system.flush()
+        return latencies
+
+    latencies = []
+    elapsed = []
+    with quiet():
+        send_all()  # Warm-up: opens keep-alive connections, starts workers
+        for _ in range(iterations):
+            started = time.perf_counter()
+            latencies.extend(send_all())
+            elapsed.append(time.perf_counter() - started)
+
+        tracemalloc.start()
+        try:
+            send_all()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        system.shutdown()
+
+    result = summarize_times(latencies, 1, peak)
+    result["iterations"] = iterations
+    result["units"] = count
+    result["throughput"] = count * iterations / sum(elapsed)
+    return result
+
+
+def measure_startup(iterations: int, sink: HttpSink) -> Dict[str, Dict]:
+    """
+    Wall time of a fresh `python bot.py <command>` process per STARTUP_COMMANDS
+    entry, plus a bare interpreter (`startup_python`) to compare against
+
+    Peak memory isn't measured (it belongs to the child processes).
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, BENCHMARK_SINK_URL=sink.url)
+    commands = {"python": [sys.executable, "-c", "pass"]}
+    for command in STARTUP_COMMANDS:
+        commands[command.lstrip("-")] = [sys.executable, "-c", STARTUP_SCRIPT, command]
+
+    results = {}
+    for name, args in commands.items():
+        def run() -> float:
+            started = time.perf_counter()
+            subprocess.run(args, cwd=here, env=env, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            return time.perf_counter() - started
+
+        cold = run()
+        result = results[f"startup_{name}"] = summarize_times(
+            [run() for _ in range(iterations)], 1, 0, cold)
+        print(f"   {'startup_' + name:<24} {'':>13}  p50 {result['p50_ms']:9.2f} ms  "
+              f"p95 {result['p95_ms']:9.2f} ms  cold {result['cold_ms']:9.2f} ms")
+    return results
+
+
+def run_size(size: int, iterations: int, entry_points: List[str], market: FakeYFinance,
+             sink: HttpSink) -> Dict[str, Dict]:
+    """
+    Benchmark every entry point for one universe size
+
+    Returns:
+        Dictionary entry point -> result
+    """
+    from rules import TradingRules
+
+    results = {}
+    holdings, watchlist = make_portfolio(market, size)
+    workdir = tempfile.mkdtemp(prefix=f"bench{size}_")
+    cwd = os.getcwd()
+
+    # Imported first so offline_environment swaps its provider too
+    web_app = None
+    if "api_holdings" in entry_points or "api_holdings_cached" in entry_points:
+        try:
+            import app as web_app
+        except ImportError as e:
+            print(f"⚠️  Skipping api_holdings (web UI not importable: {e})")
+
+    with offline_environment(workdir, market, sink):
+        with quiet():
+            engine = TradingRules()
+
+        def check(fn: Callable[[], None]) -> Callable[[], None]:
+            def call():
+                engine.start_cycle()
+                engine.quote_cache.invalidate()  # So every run fetches prices
+                engine.alert_store.clear()  # So every run exercises the alert path
+                fn()
+            return call
+
+        cases = {
+            "evaluate_portfolio": lambda: engine.evaluate_portfolio(holdings),
+            "scan_watchlist": lambda: engine.scan_watchlist(watchlist),
+            "generate_daily_summary": lambda: engine.generate_daily_summary(holdings),
+        }
+
+        try:
+            for name, fn in cases.items():
+                if name in entry_points:
+                    results[name] = measure(check(fn), iterations, size,
+                                            after=engine.alert_system.flush)
+                    _progress(name, size, results[name])
+
+            if "alerts" in entry_points:
+                results["alerts"] = measure_alerts(size, iterations)
+                _progress("alerts", size, results["alerts"])
+
+            if web_app is not None:
+                web_app.portfolio_store.replace(holdings, watchlist)
+                os.chdir(workdir)
+                client = web_app.app.test_client()
+
+                def get_holdings():
+                    response = client.get("/api/holdings")
+                    if response.status_code != 200:
+                        raise RuntimeError(f"/api/holdings returned {response.status_code}")
+
+                # Uncached: every request refreshes prices
+                if "api_holdings" in entry_points:
+                    web_app.price_cache.invalidate()
+                    results["api_holdings"] = measure(get_holdings, iterations, size,
+                                                      after=web_app.price_cache.invalidate)
+                    _progress("api_holdings", size, results["api_holdings"])
+
+                # Cached: what every tab polling within PRICE_CACHE_SECONDS gets
+                if "api_holdings_cached" in entry_points:
+                    web_app.price_cache.invalidate()
+                    results["api_holdings_cached"] = measure(get_holdings, iterations, size)
+                    _progress("api_holdings_cached", size, results["api_holdings_cached"])
+                web_app.price_cache.invalidate()
+        finally:
+            os.chdir(cwd)
+            with quiet():
+                engine.alert_system.shutdown()
+            engine.fetch_pool.shutdown()
+            engine.alert_store.close()
+            if engine.bar_store is not None:
+                engine.bar_store.close()
+
+    return results
+
+
+def _progress(name: str, size: int, result: Dict) -> None:
+    print(f"   {name:<24} {size:>5} symbols  p50 {result['p50_ms']:9.2f} ms  "
+          f"p95 {result['p95_ms']:9.2f} ms  {result['throughput']:10.1f}/s  "
+          f"peak {result['peak_mb']:7.1f} MB")
+
+
+# =============================================================================
+# BASELINE COMPARISON
+# =============================================================================
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict],
+            tolerance: float = REGRESSION_TOLERANCE) -> List[str]:
+    """
+    Compare results with a baseline
+
+    A result regresses if its p95 latency or peak memory grew by more than
+    `tolerance` (a fraction). Entries missing from either side are skipped.
+
+    Returns:
+        One line per regression
+    """
+    regressions = []
+    print(f"\n{'Benchmark':<32} {'p95 ms':>10} {'baseline':>10} {'Δ':>8} "
+          f"{'peak MB':>9} {'baseline':>9} {'Δ':>8}")
+
+    for key, current in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+
+        line = f"{key:<32}"
+        for metric, width in (("p95_ms", 10), ("peak_mb", 9)):
+            change = current[metric] / base[metric] - 1 if base[metric] else 0.0
+            flag = " ⚠️" if change > tolerance else ""
+            line += f" {current[metric]:>{width}.2f} {base[metric]:>{width}.2f} {change:>+7.0%}{flag}"
+            if change > tolerance:
+                regressions.append(f"{key}: {metric} {base[metric]:.2f} → {current[metric]:.2f} "
+                                   f"({change:+.0%})")
+        print(line)
+
+    return regressions
+
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def _option(argv: List[str], name: str, default=None):
+    """Value following a --name flag, or default"""
+    if name in argv:
+        return argv[argv.index(name) + 1]
+    return default
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Usage:
+        python benchmark.py [options]
+
+    Options:
+        --sizes 10,300,5000     Universe sizes
+        --only a,b              Entry points (evaluate_portfolio, scan_watchlist,
+                                generate_daily_summary, alerts, api_holdings,
+                                api_holdings_cached, startup)
+        --iterations N          Timed runs per benchmark (default depends on size)
+        --latency-ms X          Simulated market data round-trip (default 0)
+        --baseline FILE         Baseline to compare with (default benchmark_baseline.json)
+        --save-baseline         Write this run's results as the new baseline
+        --tolerance F           Allowed slowdown before failing (default 0.20)
+        --out FILE              Write results JSON
+
+    Exits with status 1 if any benchmark regressed against the baseline.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in ("-h", "--help"):
+        print(main.__doc__)
+        return 0
+
+    sizes = [int(s) for s in _option(argv, "--sizes", ",".join(map(str, SIZES))).split(",")]
+    entry_points = _option(argv, "--only", ",".join(ENTRY_POINTS)).split(",")
+    iterations = _option(argv, "--iterations")
+    latency = float(_option(argv, "--latency-ms", 0)) / 1000
+    baseline_path = _option(argv, "--baseline", DEFAULT_BASELINE)
+    tolerance = float(_option(argv, "--tolerance", REGRESSION_TOLERANCE))
+    out_path = _option(argv, "--out")
+
+    market = FakeYFinance(latency=latency)
+    sink = HttpSink()
+    results = {}
+
+    print(f"\n⏱️  Benchmarking {', '.join(entry_points)} (offline, sink at {sink.url})")
+    try:
+        if "startup" in entry_points:
+            results.update(measure_startup(int(iterations) if iterations else 10, sink))
+        if set(entry_points) - {"startup"}:
+            for size in sizes:
+                count = int(iterations) if iterations else DEFAULT_ITERATIONS.get(size, 3)
+                for name, result in run_size(size, count, entry_points, market, sink).items():
+                    results[f"{name}@{size}"] = result
+    finally:
+        sink.close()
+
+    print(f"\n📡 {market.requests} market data request(s), {sink.requests} HTTP sink request(s)")
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "latency_ms": latency * 1000,
+        },
+        "results": results,
+    }
+
+    if out_path:
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results written to {os.path.abspath(out_path)}")
+
+    if "--save-baseline" in argv:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Baseline saved to {os.path.abspath(baseline_path)}")
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print(f"ℹ️  No baseline at {baseline_path} - run with --save-baseline to create one")
+        return 0
+
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline.get("results", {}), tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {tolerance:.0%}:")
+        for line in regressions:
+            print(f"   {line}")
+        return 1
+
+    print(f"\n✅ No regressions beyond {tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,15 +3,25 @@ Trading Alert Bot - Main Application
 Monitors portfolio and sends alerts during market hours
 """
 
-import schedule
+import threading
 import time
-import pytz
-from datetime import datetime, date
-from typing import List
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
 import config
-import portfolio
-from rules import TradingRules
-from alerts import AlertSystem
+from portfolio_store import create_store
+from accounts import DEFAULT_ACCOUNT, DEFAULT_ACCOUNTS_PATH, PositionIndex, load_accounts
+from market_calendar import Scheduler, create_calendar
+from tick_stream import TickProcessor, create_source
+from hot_reload import FileWatcher, SettingsReloader, diff_holdings
+from symbols import ROLE_WATCHLIST, SymbolUniverse
+import metrics
+
+
+# Warn when a check uses more than this share of CHECK_INTERVAL_MINUTES
+CYCLE_WARN_FRACTION = 0.8
+
+# Seconds between portfolio/config reload checks and metrics writes in streaming mode
+STREAM_HOUSEKEEPING_SECONDS = 5
 
 
 class TradingBot:
@@ -21,16 +31,44 @@ class TradingBot:
     
     def __init__(self):
         """Initialize the trading bot"""
+        # Imported here rather than at the top: rules pulls in pandas and
+        # yfinance, which the lighter commands in main() never need
+        from rules import TradingRules
+        from alerts import AlertSystem
+        
         self.rules_engine = TradingRules()
         self.alert_system = AlertSystem()
-        self.eastern = pytz.timezone('America/New_York')
+        self.calendar = create_calendar()
+        self.eastern = self.calendar.tz
         self.last_summary_date = None
         
+        # Holdings and watchlist come from the same store the web UI edits
+        self.portfolio_store = create_store()
+        
+        self.holdings, self.watchlist = self.portfolio_store.load()
+        
+        # Further accounts (ACCOUNTS_PATH) share each symbol's market data
+        self.accounts_path = getattr(config, "ACCOUNTS_PATH", DEFAULT_ACCOUNTS_PATH)
+        self.accounts = load_accounts(self.portfolio_store, self.accounts_path)
+        self.rules_engine.set_accounts(self.accounts)
+        self.positions = PositionIndex.from_accounts(self.accounts)
+        
+        # Edits to the portfolios or config.py are picked up between checks
+        self.config_path = config.__file__
+        self.watcher = FileWatcher(self.watched_paths())
+        self.settings = SettingsReloader(config, self.config_path)
+        
+        # Every account's holdings + watchlist as one deduplicated set of symbols
+        self.universe = SymbolUniverse(self.positions.unique_holdings(), self.watchlist)
+        
         print("\n" + "="*60)
         print("🤖 TRADING ALERT BOT INITIALIZED")
         print("="*60)
-        print(f"Portfolio Holdings: {len(portfolio.holdings)} positions")
-        print(f"Watchlist: {len(portfolio.watchlist)} symbols")
+        print(f"Portfolio Holdings: {len(self.holdings)} positions")
+        if len(self.accounts) > 1:
+            print(f"Accounts: {self.positions.describe()}")
+        print(f"Watchlist: {len(self.watchlist)} symbols")
+        print(f"Universe: {self.universe.describe()}")
         print(f"Check Interval: Every {config.CHECK_INTERVAL_MINUTES} minutes")
         print(f"Market Hours: {config.MARKET_OPEN_HOUR}:{config.MARKET_OPEN_MINUTE:02d} - "
               f"{config.MARKET_CLOSE_HOUR}:{config.MARKET_CLOSE_MINUTE:02d} ET")
@@ -43,13 +81,16 @@ class TradingBot:
         Returns:
             True if today is a holiday
         """
-        today_str = date.today().strftime("%Y-%m-%d")
-        return today_str in config.MARKET_HOLIDAYS_2025
+        return self.calendar.is_holiday(datetime.now(self.eastern).date())
     
-    def is_market_hours(self) -> bool:
+    def is_market_hours(self, at: Optional[datetime] = None) -> bool:
         """
         Check if current time is within market hours
         
+        Args:
+            at: Moment to check instead of now (a scheduled check passes its
+                deadline, so the check due at the close still counts as open)
+        
         Returns:
             True if market is currently open
         """
@@ -58,35 +99,13 @@ class TradingBot:
             return True
         
         # Check if today is a holiday
-        if self.is_market_holiday():
+        moment = at or datetime.now(self.eastern)
+        if self.calendar.is_holiday(moment.astimezone(self.eastern).date()):
             print("📅 Market is closed today (holiday)")
             return False
         
-        # Get current time in Eastern timezone
-        now_et = datetime.now(self.eastern)
-        
-        # Check if it's a weekday (0=Monday, 6=Sunday)
-        if now_et.weekday() >= 5:  # Saturday or Sunday
-            return False
-        
-        # Market open time
-        market_open = now_et.replace(
-            hour=config.MARKET_OPEN_HOUR,
-            minute=config.MARKET_OPEN_MINUTE,
-            second=0,
-            microsecond=0
-        )
-        
-        # Market close time
-        market_close = now_et.replace(
-            hour=config.MARKET_CLOSE_HOUR,
-            minute=config.MARKET_CLOSE_MINUTE,
-            second=0,
-            microsecond=0
-        )
-        
-        # Check if current time is between open and close
-        return market_open <= now_et <= market_close
+        # Weekday, between open and close (Eastern time)
+        return self.calendar.is_open(moment)
     
     def should_send_daily_summary(self) -> bool:
         """
@@ -99,7 +118,7 @@ class TradingBot:
         today = now_et.date()
         
         # Skip weekends and holidays
-        if now_et.weekday() >= 5 or self.is_market_holiday():
+        if not self.calendar.is_trading_day(today):
             return False
         
         # Check if we already sent summary today
@@ -116,33 +135,69 @@ class TradingBot:
         
         return now_et >= summary_time
     
-    def check_portfolio(self) -> None:
+    def check_portfolio(self, scheduled_for: Optional[datetime] = None) -> None:
         """
         Main job: Check portfolio against all rules
         Runs every 5 minutes during market hours
+        
+        Args:
+            scheduled_for: Deadline the scheduler ran this check for (None = now)
         """
         # Check if market is open
-        if not self.is_market_hours():
+        if not self.is_market_hours(scheduled_for):
             print(f"⏸️  Market is closed - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             return
         
+        started = time.perf_counter()
+        self.reload_if_changed()
+        
         try:
             # Log to file if enabled
             if config.LOG_TO_FILE:
                 self.log_to_file("Starting portfolio check")
             
+            # Fresh market data for this check, shared by every rule
+            self.rules_engine.start_cycle()
+            
+            # Collect this check's alerts into one digest per channel
+            if getattr(config, "ALERT_DIGEST_ENABLED", False):
+                for alert_system in self.rules_engine.alert_systems():
+                    alert_system.begin_digest()
+            
+            # History for the watchlist scan, fetched once for the whole check.
+            # Holdings only need quotes; evaluate_accounts fetches their
+            # history itself when the 200-day SMA rule is due.
+            if config.ENABLE_WATCHLIST_SCANNING:
+                with metrics.STAGE_SECONDS.time(stage="prefetch"):
+                    self.rules_engine.prefetch(self.universe.with_role(ROLE_WATCHLIST))
+            
             # Evaluate all portfolio positions
-            self.rules_engine.evaluate_portfolio(portfolio.holdings)
+            with metrics.STAGE_SECONDS.time(stage="evaluate_portfolio"):
+                self.rules_engine.evaluate_accounts(self.positions)
             
             # Optional: Scan watchlist for buy opportunities
             if config.ENABLE_WATCHLIST_SCANNING:
-                self.rules_engine.scan_watchlist(portfolio.watchlist)
+                with metrics.STAGE_SECONDS.time(stage="scan_watchlist"):
+                    self.rules_engine.scan_watchlist(self.universe.with_role(ROLE_WATCHLIST))
+            
+            # Report per-symbol fetch latency and errors for this check
+            fetch_report = self.rules_engine.fetch_report()
+            print(fetch_report)
+            if config.LOG_TO_FILE:
+                self.log_to_file(fetch_report)
             
         except Exception as e:
             error_msg = f"❌ Error during portfolio check: {e}"
             print(error_msg)
             if config.LOG_TO_FILE:
                 self.log_to_file(error_msg)
+        
+        finally:
+            # Send whatever was collected, even if the check failed part way
+            with metrics.STAGE_SECONDS.time(stage="alert_digest"):
+                for alert_system in self.rules_engine.alert_systems():
+                    alert_system.end_digest()
+            self.record_cycle("check", time.perf_counter() - started)
     
     def send_daily_summary(self) -> None:
         """
@@ -151,12 +206,24 @@ class TradingBot:
         if not self.should_send_daily_summary():
             return
         
+        self.reload_if_changed()
+        
+        started = time.perf_counter()
         try:
             print("\n📊 Generating daily summary...")
             
-            summary_text = self.rules_engine.generate_daily_summary(portfolio.holdings)
+            self.rules_engine.start_cycle()
+            summary_text = self.rules_engine.generate_daily_summary(
+                self.positions.holdings_for(DEFAULT_ACCOUNT))
             self.alert_system.send_daily_summary(summary_text)
             
+            # Each further account gets its own summary (prices are cached by now)
+            for account in self.positions.accounts:
+                if account != DEFAULT_ACCOUNT:
+                    account_summary = self.rules_engine.generate_daily_summary(
+                        self.positions.holdings_for(account))
+                    self.rules_engine.alert_system_for(account).send_daily_summary(account_summary)
+            
             # Mark that we sent summary today
             self.last_summary_date = datetime.now(self.eastern).date()
             
@@ -168,20 +235,192 @@ class TradingBot:
             print(error_msg)
             if config.LOG_TO_FILE:
                 self.log_to_file(error_msg)
+        
+        finally:
+            self.record_cycle("summary", time.perf_counter() - started)
+    
+    def record_cycle(self, job: str, seconds: float) -> None:
+        """
+        Record a job's duration and publish this process's metrics
+        
+        Warns when a portfolio check takes most of CHECK_INTERVAL_MINUTES,
+        since checks would start overlapping or getting skipped. The metrics
+        snapshot is written to METRICS_PATH for the web UI's /metrics.
+        
+        Args:
+            job: Job name ("check" or "summary")
+            seconds: How long the job took
+        """
+        interval = config.CHECK_INTERVAL_MINUTES * 60
+        metrics.CYCLE_SECONDS.observe(seconds, job=job)
+        metrics.CYCLE_LAST_SECONDS.set(seconds, job=job)
+        metrics.CYCLE_LAST_TIMESTAMP.set(time.time(), job=job)
+        metrics.CHECK_INTERVAL_SECONDS.set(interval)
+        
+        if job == "check" and seconds > interval * CYCLE_WARN_FRACTION:
+            warning = (f"⚠️  Check took {seconds:.0f}s - {seconds / interval:.0%} of the "
+                       f"{config.CHECK_INTERVAL_MINUTES} minute interval")
+            print(warning)
+            if config.LOG_TO_FILE:
+                self.log_to_file(warning)
+        
+        self.save_metrics()
+    
+    def save_metrics(self) -> None:
+        """
+        Write this process's metrics snapshot to METRICS_PATH
+        """
+        metrics_path = getattr(config, "METRICS_PATH", "metrics.json")
+        if metrics_path:
+            try:
+                metrics.REGISTRY.save(metrics_path, process="bot")
+            except OSError as e:
+                print(f"⚠️  Failed to write metrics to {metrics_path}: {e}")
     
     def reset_daily_state(self) -> None:
         """
-        Reset daily tracking at market open
+        Reset daily tracking (scheduled at each market open)
         """
-        now_et = datetime.now(self.eastern)
+        print("\n🔄 New trading day - resetting state...")
+        self.rules_engine.reset_daily_alerts()
+        self.last_summary_date = None
+    
+    def next_check_time(self, after: datetime) -> Optional[datetime]:
+        """
+        When the next portfolio check is due: the next bar boundary during
+        the session, or the next open (every interval in testing mode)
+        """
+        if config.TESTING_MODE:
+            return after + self.calendar.check_interval
+        return self.calendar.next_check(after)
+    
+    def reload_if_changed(self) -> bool:
+        """
+        Apply portfolio and threshold edits made since the last check
         
-        # Only run once at market open
-        if (now_et.hour == config.MARKET_OPEN_HOUR and 
-            now_et.minute == config.MARKET_OPEN_MINUTE):
-            
-            print("\n🔄 New trading day - resetting state...")
-            self.rules_engine.reset_daily_alerts()
-            self.last_summary_date = None
+        Only the symbols that changed lose state: removed symbols drop their
+        indicator state, and removed or re-costed positions can alert again.
+        Cached bars and every other symbol's alert state stay as they are.
+        
+        Returns:
+            True if anything was reloaded
+        """
+        reloaded = False
+        for path in self.watcher.changed():
+            try:
+                if path == self.portfolio_store.path:
+                    self.reload_portfolio()
+                elif path == self.config_path:
+                    self.reload_thresholds()
+                else:
+                    self.reload_accounts()
+                reloaded = True
+            except Exception as e:
+                error_msg = f"⚠️  Failed to reload {path}, keeping current settings: {e}"
+                print(error_msg)
+                if config.LOG_TO_FILE:
+                    self.log_to_file(error_msg)
+        return reloaded
+    
+    def reload_portfolio(self) -> None:
+        """
+        Switch to the holdings and watchlist currently in the store
+        """
+        holdings, watchlist = self.portfolio_store.load()
+        watch_added = set(watchlist) - set(self.watchlist)
+        watch_removed = set(self.watchlist) - set(watchlist)
+        self.holdings, self.watchlist = holdings, watchlist
+        
+        added, removed, cost_changed = self.update_positions()
+        if not (added or removed or cost_changed or watch_added or watch_removed):
+            # Shares-only edits need no reset
+            return
+        
+        message = (f"🔄 Portfolio reloaded: holdings +{added} -{removed} "
+                   f"({cost_changed} cost change(s)), watchlist +{len(watch_added)} "
+                   f"-{len(watch_removed)} - {self.universe.describe()}")
+        print(message)
+        if config.LOG_TO_FILE:
+            self.log_to_file(message)
+    
+    def reload_accounts(self) -> None:
+        """
+        Re-read the accounts file and every account's holdings
+        """
+        accounts = load_accounts(self.portfolio_store, self.accounts_path)
+        
+        def routing(account_list):
+            return [(a.name, a.store.path, a.telegram_chat_id, a.email_to) for a in account_list]
+        
+        if routing(accounts) != routing(self.accounts):
+            self.rules_engine.set_accounts(accounts)
+            self.accounts = accounts
+            self.watcher = FileWatcher(self.watched_paths())
+        
+        added, removed, cost_changed = self.update_positions()
+        message = (f"🔄 Accounts reloaded: positions +{added} -{removed} "
+                   f"({cost_changed} cost change(s)) - {self.positions.describe()}")
+        print(message)
+        if config.LOG_TO_FILE:
+            self.log_to_file(message)
+    
+    def update_positions(self) -> Tuple[int, int, int]:
+        """
+        Rebuild the position index and symbol universe from the accounts
+        
+        Only the positions that changed lose state: removed or re-costed
+        positions can alert again (in their own account only), and symbols
+        nobody holds or watches any more drop their indicator state.
+        
+        Returns:
+            (positions added, removed, re-costed) across all accounts
+        """
+        old_positions = self.positions
+        self.positions = PositionIndex.from_accounts(self.accounts)
+        
+        totals = [0, 0, 0]
+        for account in dict.fromkeys(old_positions.accounts + self.positions.accounts):
+            added, removed, cost_changed = diff_holdings(old_positions.holdings_for(account),
+                                                         self.positions.holdings_for(account))
+            for symbol in removed | cost_changed:
+                self.rules_engine.reset_position_alerts(symbol, account)
+            totals[0] += len(added)
+            totals[1] += len(removed)
+            totals[2] += len(cost_changed)
+        
+        old_symbols = set(self.universe.symbols)
+        self.universe = SymbolUniverse(self.positions.unique_holdings(), self.watchlist)
+        dropped = old_symbols - set(self.universe.symbols)
+        if dropped:
+            self.rules_engine.forget_symbols(dropped)
+        return tuple(totals)
+    
+    def watched_paths(self) -> List[str]:
+        """Files whose edits are applied between checks"""
+        paths = [self.portfolio_store.path, self.config_path]
+        if self.accounts_path:
+            paths.append(self.accounts_path)
+        paths += [account.store.path for account in self.accounts if account.name != DEFAULT_ACCOUNT]
+        return paths
+    
+    def reload_thresholds(self) -> None:
+        """
+        Re-read alert thresholds and email addresses from config.py
+        """
+        changes = self.settings.reload()
+        if not changes:
+            return
+        
+        # AlertSystem copies the addresses when it is created
+        for alert_system in [self.alert_system] + self.rules_engine.alert_systems():
+            alert_system.refresh_addresses()
+        
+        message = "🔄 Settings reloaded: " + ", ".join(
+            f"{name} {old} → {new}" for name, (old, new) in changes.items()
+        )
+        print(message)
+        if config.LOG_TO_FILE:
+            self.log_to_file(message)
     
     def log_to_file(self, message: str) -> None:
         """
@@ -214,6 +453,124 @@ class TradingBot:
         
         print("\n✅ Test check complete!\n")
     
+    def run_stream(self, source_name: Optional[str] = None) -> None:
+        """
+        React to every price tick instead of checking every few minutes
+        
+        Each tick runs only the hard stop, warning and profit target checks
+        whose price level it crossed (see tick_stream.py). History-based rules
+        and the daily summary still need the scheduled bot.
+        
+        Args:
+            source_name: "simulated" or "poll" (default: TICK_SOURCE from config)
+        """
+        source_name = source_name or getattr(config, "TICK_SOURCE", "poll")
+        processor = TickProcessor(self.rules_engine, self.positions)
+        source = create_source(source_name, self.positions, self.rules_engine.market_data,
+                               lambda: processor.index.symbols)
+        
+        print(f"\n📶 Streaming {len(processor.index.symbols)} held symbols from the {source_name} source")
+        print("\n⌨️  Press Ctrl+C to stop\n")
+        if config.LOG_TO_FILE:
+            self.log_to_file(f"Streaming mode started ({source_name})")
+        
+        # Reloads and metrics writes run on a timer, not between ticks - a
+        # poll source yields nothing while prices are flat (e.g. overnight).
+        # The lock keeps a reload from rebuilding the index mid-tick.
+        lock = threading.Lock()
+        stopped = threading.Event()
+        
+        def housekeeping() -> None:
+            while not stopped.wait(STREAM_HOUSEKEEPING_SECONDS):
+                try:
+                    with lock:
+                        if self.reload_if_changed():
+                            processor.update_positions(self.positions)
+                    self.save_metrics()
+                except Exception as e:
+                    print(f"⚠️  Streaming housekeeping failed: {e}")
+        
+        housekeeper = threading.Thread(target=housekeeping, name="stream-housekeeping", daemon=True)
+        housekeeper.start()
+        
+        ticks = alerts = 0
+        try:
+            for tick in source.ticks():
+                ticks += 1
+                with lock:
+                    alerts += processor.process(tick)
+        
+        except KeyboardInterrupt:
+            print("\n\n⏹️  Streaming stopped by user")
+        
+        finally:
+            stopped.set()
+            housekeeper.join()
+            source.close()
+            self.save_metrics()
+            print(f"📶 {ticks} ticks processed, {alerts} alert(s) raised")
+            if config.LOG_TO_FILE:
+                self.log_to_file(f"Streaming mode stopped - {ticks} ticks, {alerts} alert(s)")
+            for alert_system in [self.alert_system] + self.rules_engine.alert_systems():
+                alert_system.shutdown()
+    
+    def run_replay(self, start: Optional[str] = None, end: Optional[str] = None) -> None:
+        """
+        Step the scheduled checks through recorded bars (see use_replay_settings)
+        
+        The replay clock is moved to each check's deadline and the check runs
+        straight away: every scheduled check of a session when 1-minute bars
+        were recorded, otherwise one check at the close of each recorded day.
+        Nothing waits on the wall clock, so a year of daily bars replays in
+        seconds, and the same recording always raises the same alerts.
+        
+        Args:
+            start: First day to replay (YYYY-MM-DD, default: first recorded day)
+            end: Last day to replay (YYYY-MM-DD, default: last recorded day)
+        """
+        from market_data import ReplayProvider
+        
+        provider = self.rules_engine.market_data
+        if not isinstance(provider, ReplayProvider):
+            print("❌ Replay needs MARKET_DATA_PROVIDER=replay without MARKET_DATA_CACHE_SECONDS")
+            return
+        
+        intraday = bool(provider.symbols("1m"))
+        days = [day.date() for day in provider.sessions("1m" if intraday else "1d")]
+        days = [day for day in days
+                if self.calendar.is_trading_day(day)
+                and (start is None or day >= date.fromisoformat(start))
+                and (end is None or day <= date.fromisoformat(end))]
+        if not days:
+            print(f"❌ No recorded trading days to replay in {provider.path}")
+            return
+        
+        print(f"\n📼 Replaying {len(days)} session(s) from {provider.path} "
+              f"({days[0]} → {days[-1]}, {'every check' if intraday else 'one check at each close'})")
+        
+        started = time.perf_counter()
+        checks = 0
+        try:
+            for day in days:
+                market_open, market_close = self.calendar.session(day)
+                provider.set_time(market_open)
+                self.reset_daily_state()
+                
+                due = market_open if intraday else market_close
+                while due is not None and due <= market_close:
+                    provider.set_time(due)
+                    self.check_portfolio(scheduled_for=due)
+                    checks += 1
+                    due = self.calendar.next_check(due) if intraday else None
+        
+        except KeyboardInterrupt:
+            print("\n\n⏹️  Replay stopped by user")
+        
+        finally:
+            for alert_system in [self.alert_system] + self.rules_engine.alert_systems():
+                alert_system.shutdown()
+            print(f"📼 {checks} check(s) replayed in {time.perf_counter() - started:.1f}s")
+    
     def run(self) -> None:
         """
         Start the bot with scheduled tasks
@@ -229,23 +586,19 @@ class TradingBot:
             self.log_to_file("Bot started")
             self.log_to_file("="*60)
         
-        # Schedule the main portfolio check
-        schedule.every(config.CHECK_INTERVAL_MINUTES).minutes.do(self.check_portfolio)
-        
-        # Schedule daily summary check (runs every minute to catch the right time)
-        schedule.every(1).minutes.do(self.send_daily_summary)
-        
-        # Schedule daily reset check
-        schedule.every(1).minutes.do(self.reset_daily_state)
+        # Each job is scheduled for its next real deadline; between them the
+        # bot sleeps (the reset is added first so it runs before the open's check)
+        scheduler = Scheduler(self.calendar)
+        scheduler.add("market_open", self.calendar.next_open, lambda due: self.reset_daily_state())
+        scheduler.add("check", self.next_check_time, self.check_portfolio)
+        scheduler.add("summary", self.calendar.next_summary, lambda due: self.send_daily_summary())
         
-        # Run initial check immediately
-        self.check_portfolio()
-        
-        # Main loop
         try:
-            while True:
-                schedule.run_pending()
-                time.sleep(1)  # Check every second
+            # Run initial check immediately, and catch up on a missed summary
+            self.check_portfolio()
+            self.send_daily_summary()
+            
+            scheduler.run()
                 
         except KeyboardInterrupt:
             print("\n\n⏹️  Bot stopped by user")
@@ -259,74 +612,173 @@ class TradingBot:
             if config.LOG_TO_FILE:
                 self.log_to_file(error_msg)
                 self.log_to_file("="*60)
+        
+        finally:
+            # Deliver alerts still waiting in the dispatch queues
+            for alert_system in [self.alert_system] + self.rules_engine.alert_systems():
+                alert_system.shutdown()
 
 
 # =============================================================================
 # MAIN ENTRY POINT
 # =============================================================================
 
+def load_positions() -> Tuple[List[Dict], List[str], PositionIndex]:
+    """
+    Holdings, watchlist and every account's positions, without building a TradingBot
+    
+    Returns:
+        (holdings, watchlist, positions)
+    """
+    store = create_store()
+    holdings, watchlist = store.load()
+    accounts = load_accounts(store, getattr(config, "ACCOUNTS_PATH", DEFAULT_ACCOUNTS_PATH))
+    return holdings, watchlist, PositionIndex.from_accounts(accounts)
+
+
+def option_value(args: List[str], name: str, default: Optional[str] = None) -> Optional[str]:
+    """Value following `name` in the command line arguments (default if absent)"""
+    return args[args.index(name) + 1] if name in args[:-1] else default
+
+
+def use_replay_settings(path: str) -> None:
+    """
+    Point the bot at recorded bars for a replay run
+    
+    Alerts are printed but not sent, and nothing the live bot keeps on disk
+    (alert state, bar store, metrics) is read or written.
+    """
+    config.MARKET_DATA_PROVIDER = "replay"
+    config.MARKET_DATA_REPLAY_PATH = path
+    # Nothing to save on a local file, and the replay clock moves under any TTL
+    config.MARKET_DATA_CACHE_SECONDS = 0
+    config.QUOTE_CACHE_SECONDS = 0
+    config.BAR_CACHE_ENABLED = False
+    # No requests to rate limit, so checks run at full CPU speed
+    config.FETCH_RATE_PER_SECOND = 1e9
+    config.FETCH_BURST = 1e9
+    config.ALERT_STATE_PATH = ":memory:"
+    config.METRICS_PATH = ""
+    config.TELEGRAM_ENABLED = False
+    config.EMAIL_ENABLED = False
+    config.TESTING_MODE = False
+
+
+def command_run(args: List[str]) -> None:
+    TradingBot().run()
+
+
+def command_test(args: List[str]) -> None:
+    TradingBot().run_test_check()
+
+
+def command_test_alerts(args: List[str]) -> None:
+    from alerts import test_alerts
+    test_alerts()
+
+
+def command_verify(args: List[str]) -> None:
+    from alerts import verify_telegram_setup
+    verify_telegram_setup()
+
+
+def command_summary(args: List[str]) -> None:
+    from rules import TradingRules
+    _, _, positions = load_positions()
+    print(TradingRules().generate_daily_summary(positions.holdings_for(DEFAULT_ACCOUNT)))
+
+
+def command_scan(args: List[str]) -> None:
+    from rules import TradingRules
+    _, watchlist, positions = load_positions()
+    universe = SymbolUniverse(positions.unique_holdings(), watchlist)
+    TradingRules().scan_watchlist(universe.with_role(ROLE_WATCHLIST))
+
+
+def command_scan_file(args: List[str]) -> None:
+    if not args or args[0].startswith("--"):
+        print("❌ Usage: python bot.py --scan-file SYMBOLS_FILE [--out signals.csv]")
+        return
+    from rules import TradingRules
+    from scan_pipeline import scan_file
+    out_path = args[args.index("--out") + 1] if "--out" in args[:-1] else None
+    scan_file(TradingRules(), args[0], out_path=out_path)
+
+
+def command_stream(args: List[str]) -> None:
+    TradingBot().run_stream(args[0] if args else None)
+
+
+def command_record(args: List[str]) -> None:
+    if not args or args[0].startswith("--"):
+        print("❌ Usage: python bot.py --record FILE [--period 1y] [--interval 1d]")
+        return
+    from market_data import create_provider, record
+    _, watchlist, positions = load_positions()
+    symbols = SymbolUniverse(positions.unique_holdings(), watchlist).symbols
+    count = record(create_provider(), symbols, args[0],
+                   period=option_value(args, "--period", "1y"),
+                   interval=option_value(args, "--interval", "1d"))
+    print(f"💾 Recorded {count} bar(s) for {len(symbols)} symbol(s) to {args[0]}")
+
+
+def command_replay(args: List[str]) -> None:
+    if not args or args[0].startswith("--"):
+        print("❌ Usage: python bot.py --replay PATH [--from YYYY-MM-DD] [--to YYYY-MM-DD]")
+        return
+    use_replay_settings(args[0])
+    TradingBot().run_replay(option_value(args, "--from"), option_value(args, "--to"))
+
+
+def command_help(args: List[str]) -> None:
+    print("\n🤖 Trading Alert Bot - Usage:")
+    print("\nCommands:")
+    print(f"  {'python bot.py':<26} - Start the bot (runs continuously)")
+    for usage, description, _ in COMMANDS.values():
+        print(f"  {'python bot.py ' + usage:<26} - {description}")
+    print()
+
+
+# Command line option -> (usage, description, handler). Handlers import the
+# rules engine and alert system themselves, so --help and --verify start
+# without loading pandas/yfinance and only --test/--stream/--replay build a TradingBot.
+COMMANDS = {
+    "--test": ("--test", "Run a single portfolio check", command_test),
+    "--test-alerts": ("--test-alerts", "Test Telegram and email notifications", command_test_alerts),
+    "--verify": ("--verify", "Verify Telegram bot setup", command_verify),
+    "--summary": ("--summary", "Generate portfolio summary", command_summary),
+    "--scan": ("--scan", "Scan watchlist for buy signals", command_scan),
+    "--scan-file": ("--scan-file FILE [--out CSV]", "Scan every symbol in a file, chunk by chunk",
+                    command_scan_file),
+    "--stream": ("--stream [simulated|poll]", "Alert on price ticks as they arrive", command_stream),
+    "--record": ("--record FILE [--period P] [--interval I]",
+                 "Save the portfolio's bars for --replay", command_record),
+    "--replay": ("--replay PATH [--from D] [--to D]",
+                 "Run the checks against recorded bars (alerts printed only)", command_replay),
+    "--help": ("--help", "Show this help message", command_help),
+}
+
+
 def main():
     """
     Main function to run the trading bot
     """
     import sys
     
-    # Check for command line arguments
-    if len(sys.argv) > 1:
-        if sys.argv[1] == "--test":
-            # Run a single test check
-            bot = TradingBot()
-            bot.run_test_check()
-            return
-        
-        elif sys.argv[1] == "--test-alerts":
-            # Test notification system
-            from alerts import test_alerts
-            test_alerts()
-            return
-        
-        elif sys.argv[1] == "--verify":
-            # Verify Telegram setup
-            from alerts import verify_telegram_setup
-            verify_telegram_setup()
-            return
-        
-        elif sys.argv[1] == "--summary":
-            # Generate and print summary
-            bot = TradingBot()
-            summary = bot.rules_engine.generate_daily_summary(portfolio.holdings)
-            print(summary)
-            return
-        
-        elif sys.argv[1] == "--scan":
-            # Scan watchlist for buy opportunities
-            bot = TradingBot()
-            bot.rules_engine.scan_watchlist(portfolio.watchlist)
-            return
-        
-        elif sys.argv[1] == "--help":
-            print("\n🤖 Trading Alert Bot - Usage:")
-            print("\nCommands:")
-            print("  python bot.py              - Start the bot (runs continuously)")
-            print("  python bot.py --test       - Run a single portfolio check")
-            print("  python bot.py --test-alerts - Test Telegram and email notifications")
-            print("  python bot.py --verify     - Verify Telegram bot setup")
-            print("  python bot.py --summary    - Generate portfolio summary")
-            print("  python bot.py --scan       - Scan watchlist for buy signals")
-            print("  python bot.py --help       - Show this help message")
-            print()
-            return
-        
-        else:
-            print(f"❌ Unknown command: {sys.argv[1]}")
-            print("Run 'python bot.py --help' for usage information")
-            return
+    if len(sys.argv) == 1:
+        # Default: start the bot
+        command_run([])
+        return
     
-    # Default: start the bot
-    bot = TradingBot()
-    bot.run()
+    command = COMMANDS.get(sys.argv[1])
+    if command is None:
+        print(f"❌ Unknown command: {sys.argv[1]}")
+        print("Run 'python bot.py --help' for usage information")
+        return
+    
+    _, _, handler = command
+    handler(sys.argv[2:])
 
 
 if __name__ == "__main__":
     main()
-
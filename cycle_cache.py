@@ -0,0 +1,92 @@
+"""
+Cycle Cache - Shared Market Data For One Portfolio Check
+Lets every rule in a check reuse the same download for a symbol
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Hashable, Iterable, Optional, Tuple
+import pandas as pd
+
+
+class CycleCache:
+    """
+    LRU cache of history DataFrames, cleared at the start of each check
+    """
+
+    def __init__(self, max_bytes: int):
+        """
+        Initialize the cache
+
+        Args:
+            max_bytes: Memory bound - least recently used frames are evicted beyond this
+        """
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (period, data, size)
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Tuple[str, pd.DataFrame]]:
+        """
+        Look up a cached frame and mark it as recently used
+
+        Returns:
+            (period, data) tuple, or None if not cached
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, key: Hashable, period: str, data: pd.DataFrame) -> None:
+        """
+        Store a frame, evicting least recently used frames to stay within the bound
+
+        Args:
+            key: Cache key (symbol, interval)
+            period: Period the frame covers
+            data: History DataFrame
+        """
+        size = int(data.memory_usage(index=True, deep=True).sum())
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[2]
+
+            self._entries[key] = (period, data, size)
+            self.total_bytes += size
+
+            # Always keep the newest entry, even if it alone exceeds the bound
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def discard(self, keys: Iterable[Hashable]) -> None:
+        """Drop some frames (keys that aren't cached are ignored)"""
+        with self._lock:
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self.total_bytes -= entry[2]
+
+    def clear(self) -> None:
+        """Drop all cached frames and reset hit counters"""
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
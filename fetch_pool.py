@@ -0,0 +1,269 @@
+"""
+Fetch Pool - Concurrent, Rate-Limited Market Data Requests
+Runs data downloads on a bounded thread pool so one slow symbol can't stall a check
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import metrics
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter - allows short bursts, then `rate` requests per second
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait_time = (1 - self._tokens) / self.rate
+
+            time.sleep(wait_time)
+
+
+class FetchStats:
+    """
+    Per-symbol fetch latency and error counts for one check
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear all counters (call at the start of each check)"""
+        with self._lock:
+            self.requests = 0
+            self.latencies = {}  # symbol -> seconds of the request that delivered it
+            self.errors = {}     # symbol -> error count
+            self.timeouts = {}   # symbol -> timeout count
+
+    def record(self, symbols: List[str], seconds: float) -> None:
+        """Record one completed request covering one or more symbols"""
+        with self._lock:
+            self.requests += 1
+            for symbol in symbols:
+                self.latencies[symbol] = seconds
+        metrics.FETCH_REQUEST_SECONDS.observe(seconds)
+        metrics.FETCH_SYMBOLS.inc(len(symbols))
+
+    def record_error(self, symbols: List[str], timeout: bool = False) -> None:
+        """Record a failed (or timed out) fetch for symbols"""
+        with self._lock:
+            counts = self.timeouts if timeout else self.errors
+            for symbol in symbols:
+                counts[symbol] = counts.get(symbol, 0) + 1
+        metrics.FETCH_ERRORS.inc(len(symbols), kind="timeout" if timeout else "error")
+
+    def summary(self, slowest: int = 5) -> str:
+        """
+        Format a short report of this check's fetches
+
+        Args:
+            slowest: Number of slowest symbols to list
+
+        Returns:
+            Multi-line report text
+        """
+        with self._lock:
+            latencies = sorted(self.latencies.items(), key=lambda item: item[1], reverse=True)
+            errors = dict(self.errors)
+            timeouts = dict(self.timeouts)
+            requests = self.requests
+
+        lines = [f"📡 Fetch stats: {requests} request(s), {len(latencies)} symbol(s), "
+                 f"{sum(errors.values())} error(s), {sum(timeouts.values())} timeout(s)"]
+
+        if latencies:
+            values = sorted(seconds for _, seconds in latencies)
+            p50 = values[len(values) // 2]
+            p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+            lines.append(f"   Latency: p50 {p50:.2f}s | p95 {p95:.2f}s | max {values[-1]:.2f}s")
+            lines.append("   Slowest: " + ", ".join(
+                f"{symbol} {seconds:.2f}s" for symbol, seconds in latencies[:slowest]
+            ))
+
+        if errors:
+            lines.append("   Errors: " + ", ".join(f"{s} ×{n}" for s, n in sorted(errors.items())))
+        if timeouts:
+            lines.append("   Timeouts: " + ", ".join(f"{s} ×{n}" for s, n in sorted(timeouts.items())))
+
+        return "\n".join(lines)
+
+
+class FetchPool:
+    """
+    Bounded thread pool for market data requests with rate limiting and timeouts
+    """
+
+    def __init__(self, max_workers: int = 4, rate_per_second: float = 2.0,
+                 burst: int = 5, timeout: float = 10.0):
+        """
+        Args:
+            max_workers: Maximum concurrent requests
+            rate_per_second: Sustained request rate
+            burst: Requests allowed back to back before rate limiting kicks in
+            timeout: Seconds a single request may run before it is abandoned
+        """
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.stats = FetchStats()
+        self.cycle = 0  # Bumped by start_cycle(); results from older checks are dropped
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="fetch")
+        self._held = set()  # Abandoned requests still occupying one of _executor's workers
+
+    def start_cycle(self) -> None:
+        """
+        Start a new check - reset stats and disown requests still running
+        from the previous one
+        """
+        self.cycle += 1
+        self.stats.reset()
+
+    def run(self, tasks: List[Tuple[List[str], Callable[[], Any]]],
+            record_errors: bool = True) -> List[Optional[Any]]:
+        """
+        Run fetch tasks concurrently
+
+        Each task is (symbols, function). Failed or timed out tasks return
+        None and are counted against their symbols. A timed out request is
+        abandoned - its thread finishes in the background (the underlying
+        HTTP call has its own timeout) while the check carries on, and
+        whatever it returns is dropped. Tasks are tagged with the cycle they
+        were submitted in, so nothing from a previous check is recorded or
+        returned after start_cycle().
+
+        An abandoned request still holds its worker, so once every worker is
+        held that way the queued tasks move to fresh workers instead of
+        waiting behind them. The batch as a whole also has a deadline (one
+        timeout per round of workers plus the rate limiter's schedule),
+        after which whatever has not finished is abandoned.
+
+        Functions should hand their result back rather than write it to a
+        shared cache themselves - only the caller knows the result arrived
+        in time.
+
+        Args:
+            tasks: List of (symbols covered, zero-argument fetch function)
+            record_errors: Count failures against their symbols (False when
+                the caller retries the misses and records what still fails)
+
+        Returns:
+            Results in the same order as tasks
+        """
+        results = [None] * len(tasks)
+        started = {}
+        abandoned = set()
+
+        cycle = self.cycle
+        rounds = -(-len(tasks) // self.max_workers)
+        deadline = time.monotonic() + self.timeout * rounds + len(tasks) / self.bucket.rate
+
+        def execute(index: int, fn: Callable[[], Any]) -> Any:
+            self.bucket.acquire()
+            started[index] = time.monotonic()
+            result = fn()
+            if index not in abandoned and cycle == self.cycle:
+                self.stats.record(tasks[index][0], time.monotonic() - started[index])
+            return result
+
+        if len(self._held) >= self.max_workers:
+            self._replace_executor()
+        futures = {self._executor.submit(execute, i, fn): i for i, (_, fn) in enumerate(tasks)}
+        pending = set(futures)
+
+        while pending:
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                index = futures[future]
+                if cycle != self.cycle:
+                    continue  # A new check started meanwhile - drop the late result
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    print(f"❌ Error fetching {', '.join(tasks[index][0])}: {e}")
+                    if record_errors:
+                        self.stats.record_error(tasks[index][0])
+
+            # Abandon requests that have been running longer than the timeout
+            # (or everything left once the batch is past its deadline)
+            now = time.monotonic()
+            for future in list(pending):
+                index = futures[future]
+                if now > deadline or (index in started and now - started[index] > self.timeout):
+                    print(f"⏱️  Timed out fetching {', '.join(tasks[index][0])}")
+                    if record_errors:
+                        self.stats.record_error(tasks[index][0], timeout=True)
+                    abandoned.add(index)
+                    pending.discard(future)
+                    if not future.cancel():
+                        self._hold(future)
+
+            # Every worker is stuck on an abandoned request - queued tasks
+            # would never start, so hand them to new workers
+            if pending and len(self._held) >= self.max_workers:
+                self._replace_executor()
+                for future in list(pending):
+                    if future.cancel():
+                        index = futures.pop(future)
+                        pending.discard(future)
+                        retry = self._executor.submit(execute, index, tasks[index][1])
+                        futures[retry] = index
+                        pending.add(retry)
+
+        return results
+
+    def map(self, fn: Callable[[str], Any], symbols: List[str]) -> Dict[str, Any]:
+        """
+        Run fn(symbol) for every symbol concurrently
+
+        Returns:
+            Dictionary mapping symbol to result (None if it failed)
+        """
+        tasks = [([symbol], lambda symbol=symbol: fn(symbol)) for symbol in symbols]
+        return dict(zip(symbols, self.run(tasks)))
+
+    def _hold(self, future) -> None:
+        """Count an abandoned request against its worker until it finishes"""
+        held = self._held
+        held.add(future)
+        future.add_done_callback(held.discard)
+
+    def _replace_executor(self) -> None:
+        """Start fresh workers, leaving the stuck ones to finish on their own"""
+        print(f"⚠️  All {self.max_workers} fetch workers are stuck on abandoned requests, "
+              f"starting new ones")
+        self._executor.shutdown(wait=False)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="fetch")
+        self._held = set()
+
+    def shutdown(self) -> None:
+        """Stop accepting work without waiting for abandoned requests"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
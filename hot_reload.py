@@ -0,0 +1,128 @@
+"""
+Hot Reload - Pick Up Portfolio And Threshold Edits Without A Restart
+Polls file modification times between checks and reports what changed
+"""
+
+import os
+import runpy
+from types import ModuleType
+from typing import Dict, List, Set, Tuple
+
+
+# Settings the running bot re-reads from config.py. Everything else (paths,
+# schedules, credentials, pool sizes) is wired up at startup and still needs
+# a restart.
+RELOADABLE_SETTINGS = (
+    "HARD_STOP_MULTIPLIER",
+    "WARNING_MULTIPLIER",
+    "PROFIT_TARGET_MULTIPLIER",
+    "RECOMMENDATION_PULLBACK_PERCENT",
+    "RECOMMENDATION_RSI_MAX",
+    "RECOMMENDATION_MIN_PRICE",
+    "EMAIL_FROM",
+    "EMAIL_TO",
+)
+
+
+class FileWatcher:
+    """
+    Detects changes to a set of files by polling their mtime and size
+
+    Polling costs one stat() per file, so it is cheap enough to run before
+    every check and works on every platform and filesystem.
+    """
+
+    def __init__(self, paths: List[str]):
+        """
+        Args:
+            paths: Files to watch (they don't have to exist yet)
+        """
+        self.paths = list(paths)
+        self._signatures = {path: self._signature(path) for path in self.paths}
+
+    def changed(self) -> List[str]:
+        """
+        Files that changed, appeared or disappeared since the last call
+        """
+        changed = []
+        for path in self.paths:
+            signature = self._signature(path)
+            if signature != self._signatures[path]:
+                self._signatures[path] = signature
+                changed.append(path)
+        return changed
+
+    @staticmethod
+    def _signature(path: str):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+
+class SettingsReloader:
+    """
+    Re-reads RELOADABLE_SETTINGS from config.py and applies the ones edited
+
+    config.py is executed again, so environment variables are applied the
+    same way as at startup. Only settings whose value in the file changed
+    since the last read are copied onto the loaded module, which leaves
+    values set at runtime alone unless that setting itself was edited.
+    """
+
+    def __init__(self, config_module: ModuleType, path: str):
+        """
+        Args:
+            config_module: The imported config module
+            path: Path of config.py
+        """
+        self.config = config_module
+        self.path = path
+        self._values = self._read()
+
+    def reload(self) -> Dict[str, Tuple]:
+        """
+        Apply edited settings (nothing changes if config.py fails to run,
+        e.g. when caught half-written)
+
+        Returns:
+            Dictionary setting name -> (old value, new value) for settings applied
+        """
+        values = self._read()
+
+        changes = {}
+        for name, value in values.items():
+            if name in self._values and value == self._values[name]:
+                continue
+            old = getattr(self.config, name, None)
+            if value != old:
+                setattr(self.config, name, value)
+                changes[name] = (old, value)
+
+        self._values = values
+        return changes
+
+    def _read(self) -> Dict:
+        values = runpy.run_path(self.path)
+        return {name: values[name] for name in RELOADABLE_SETTINGS if name in values}
+
+
+def diff_holdings(old: List[Dict], new: List[Dict]) -> Tuple[Set[str], Set[str], Set[str]]:
+    """
+    Compare two holdings lists by symbol
+
+    Returns:
+        (added symbols, removed symbols, symbols whose avg_cost changed)
+        A shares-only change isn't reported, since no rule depends on it.
+    """
+    old_by_symbol = {h["symbol"]: h for h in old}
+    new_by_symbol = {h["symbol"]: h for h in new}
+
+    added = new_by_symbol.keys() - old_by_symbol.keys()
+    removed = old_by_symbol.keys() - new_by_symbol.keys()
+    cost_changed = {
+        symbol for symbol in new_by_symbol.keys() & old_by_symbol.keys()
+        if new_by_symbol[symbol]["avg_cost"] != old_by_symbol[symbol]["avg_cost"]
+    }
+    return set(added), set(removed), cost_changed
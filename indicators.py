@@ -0,0 +1,225 @@
+"""
+Streaming Indicators - Incremental SMA and RSI
+Keeps running state per symbol so each new bar or tick costs O(1)
+"""
+
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+import pandas as pd
+
+
+class RollingMean:
+    """
+    Mean of the last `window` values using a ring buffer and a compensated
+    running sum (so rounding error does not build up over months of updates)
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque()
+        self._sum = 0.0
+        self._compensation = 0.0
+
+    def _add(self, x: float) -> None:
+        """Neumaier-compensated addition to the running sum"""
+        total = self._sum + x
+        if abs(self._sum) >= abs(x):
+            self._compensation += (self._sum - total) + x
+        else:
+            self._compensation += (x - total) + self._sum
+        self._sum = total
+
+    def push(self, x: float) -> None:
+        """Add a new value, dropping the oldest once the window is full"""
+        if len(self.values) == self.window:
+            self._add(-self.values.popleft())
+        self.values.append(x)
+        self._add(x)
+
+    def replace_last(self, x: float) -> None:
+        """Revise the most recent value"""
+        self._add(x - self.values[-1])
+        self.values[-1] = x
+
+    def clear(self) -> None:
+        self.values.clear()
+        self._sum = 0.0
+        self._compensation = 0.0
+
+    @property
+    def mean(self) -> float:
+        """Current mean, NaN until the window is full (like rolling().mean())"""
+        if len(self.values) < self.window:
+            return math.nan
+        return (self._sum + self._compensation) / self.window
+
+
+class StreamingIndicator(ABC):
+    """
+    Base class - tracks which bar the indicator has seen so it can be
+    brought up to date from a history DataFrame
+    """
+
+    def __init__(self, lookback: int):
+        """
+        Args:
+            lookback: Number of recent closes the indicator depends on
+        """
+        self.lookback = lookback
+        self.closes = deque(maxlen=lookback)
+        self.last_timestamp = None
+
+    def update(self, close: float) -> float:
+        """
+        Add a new bar
+
+        Returns:
+            Updated indicator value
+        """
+        self._push(float(close))
+        self.closes.append(float(close))
+        return self.value
+
+    def update_last(self, close: float) -> float:
+        """
+        Revise the forming bar (intraday tick) without adding a new one
+
+        Returns:
+            Updated indicator value
+        """
+        if not self.closes:
+            return self.update(close)
+        self._replace_last(float(close))
+        self.closes[-1] = float(close)
+        return self.value
+
+    def seed(self, closes: pd.Series) -> float:
+        """
+        Rebuild state from history
+
+        Returns:
+            Indicator value at the last bar
+        """
+        self._reset()
+        self.closes.clear()
+        for close in closes.iloc[-self.lookback:]:
+            self.update(close)
+        self.last_timestamp = closes.index[-1] if len(closes) else None
+        return self.value
+
+    def sync(self, closes: pd.Series) -> float:
+        """
+        Bring the indicator up to date with a close series
+
+        Only bars after the last one seen are applied. The last seen bar is
+        re-applied because it may still have been forming. The series is
+        re-seeded if it no longer lines up with the stored state (first run,
+        gap in the data, or history re-adjusted for a dividend or split).
+
+        Args:
+            closes: Close prices indexed by timestamp
+
+        Returns:
+            Indicator value at the last bar
+        """
+        if self.last_timestamp is None or self.last_timestamp not in closes.index:
+            return self.seed(closes)
+
+        pos = closes.index.get_loc(self.last_timestamp)
+        oldest = pos - len(self.closes) + 1
+        if (not isinstance(pos, int) or oldest < 0
+                or not math.isclose(closes.iloc[oldest], self.closes[0], rel_tol=1e-12)):
+            return self.seed(closes)
+
+        self.update_last(closes.iloc[pos])
+        for close in closes.iloc[pos + 1:]:
+            self.update(close)
+
+        self.last_timestamp = closes.index[-1]
+        return self.value
+
+    @abstractmethod
+    def _push(self, close: float) -> None:
+        """Apply a new bar's close"""
+
+    @abstractmethod
+    def _replace_last(self, close: float) -> None:
+        """Apply a revised close for the latest bar"""
+
+    @abstractmethod
+    def _reset(self) -> None:
+        """Forget all state"""
+
+    @property
+    @abstractmethod
+    def value(self) -> float:
+        """Indicator value at the last bar"""
+
+
+class StreamingSMA(StreamingIndicator):
+    """
+    Simple Moving Average - matches TradingRules.calculate_sma(...).iloc[-1]
+    """
+
+    def __init__(self, window: int):
+        super().__init__(lookback=window)
+        self.window = window
+        self._mean = RollingMean(window)
+
+    def _push(self, close: float) -> None:
+        self._mean.push(close)
+
+    def _replace_last(self, close: float) -> None:
+        self._mean.replace_last(close)
+
+    def _reset(self) -> None:
+        self._mean.clear()
+
+    @property
+    def value(self) -> float:
+        return self._mean.mean
+
+
+class StreamingRSI(StreamingIndicator):
+    """
+    Relative Strength Index - matches TradingRules.calculate_rsi
+
+    Uses simple averages of gains and losses over `period` bars, like the
+    batch version. The batch version counts the first bar of a series as a
+    zero change, so a series of exactly `period` bars already has an RSI.
+    """
+
+    def __init__(self, period: int = 14):
+        super().__init__(lookback=period + 1)
+        self.period = period
+        self._gains = RollingMean(period)
+        self._losses = RollingMean(period)
+
+    def _push(self, close: float) -> None:
+        delta = close - self.closes[-1] if self.closes else 0.0
+        self._gains.push(max(delta, 0.0))
+        self._losses.push(max(-delta, 0.0))
+
+    def _replace_last(self, close: float) -> None:
+        if len(self.closes) < 2:
+            # Only one bar so far - its change is always zero
+            return
+        delta = close - self.closes[-2]
+        self._gains.replace_last(max(delta, 0.0))
+        self._losses.replace_last(max(-delta, 0.0))
+
+    def _reset(self) -> None:
+        self._gains.clear()
+        self._losses.clear()
+
+    @property
+    def value(self) -> float:
+        gain = self._gains.mean
+        loss = self._losses.mean
+        if math.isnan(gain) or math.isnan(loss):
+            return math.nan
+        if loss == 0:
+            # gain / 0 -> RSI 100, 0 / 0 -> undefined (same as the batch version)
+            return 100.0 if gain > 0 else math.nan
+        return 100 - (100 / (1 + gain / loss))
@@ -0,0 +1,220 @@
+"""
+Market Calendar - Trading Sessions And Event Scheduling
+Works out when the next check, summary or market open is due and sleeps until then
+"""
+
+import threading
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterable, List, Optional, Tuple
+import pytz
+import metrics
+
+
+# Longest single sleep, so a suspended machine or clock change is noticed
+# within the hour even when the next event is days away
+MAX_SLEEP_SECONDS = 3600
+
+# How far ahead to look for the next trading day (covers weekends plus holidays)
+LOOKAHEAD_DAYS = 14
+
+
+class MarketCalendar:
+    """
+    Regular trading sessions in the exchange's timezone
+
+    A trading day is a weekday that isn't listed as a holiday. Checks are
+    aligned to bar boundaries: the open, then every `check_minutes` after
+    it, with the close as the last check of the day.
+    """
+
+    def __init__(self, open_time: Tuple[int, int], close_time: Tuple[int, int],
+                 check_minutes: int, summary_time: Tuple[int, int],
+                 holidays: Iterable[str] = (), timezone: str = "America/New_York"):
+        """
+        Args:
+            open_time: (hour, minute) of the open
+            close_time: (hour, minute) of the close
+            check_minutes: Minutes between checks (bar length)
+            summary_time: (hour, minute) of the daily summary
+            holidays: Dates the market is closed, as "YYYY-MM-DD"
+            timezone: Exchange timezone
+        """
+        self.tz = pytz.timezone(timezone)
+        self.open_time = open_time
+        self.close_time = close_time
+        self.check_interval = timedelta(minutes=check_minutes)
+        self.summary_time = summary_time
+        self.holidays = set(holidays)
+
+    def now(self) -> datetime:
+        return datetime.now(self.tz)
+
+    def is_holiday(self, day: date) -> bool:
+        return day.strftime("%Y-%m-%d") in self.holidays
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and not self.is_holiday(day)
+
+    def session(self, day: date) -> Tuple[datetime, datetime]:
+        """(open, close) of a day as timezone-aware datetimes"""
+        return self._at(day, self.open_time), self._at(day, self.close_time)
+
+    def is_open(self, now: Optional[datetime] = None) -> bool:
+        """True between the open and the close (inclusive) of a trading day"""
+        now = self._local(now)
+        if not self.is_trading_day(now.date()):
+            return False
+        market_open, market_close = self.session(now.date())
+        return market_open <= now <= market_close
+
+    def next_check(self, after: datetime) -> Optional[datetime]:
+        """
+        First bar boundary strictly after `after` - the next open when the
+        market is closed
+
+        Returns:
+            Timezone-aware datetime, or None if no trading day is coming up
+        """
+        after = self._local(after)
+        for day in self._trading_days(after.date()):
+            market_open, market_close = self.session(day)
+            if after < market_open:
+                return market_open
+            if after < market_close:
+                bars = (after - market_open) // self.check_interval + 1
+                return min(market_open + bars * self.check_interval, market_close)
+        return None
+
+    def next_open(self, after: datetime) -> Optional[datetime]:
+        """First open strictly after `after`"""
+        after = self._local(after)
+        for day in self._trading_days(after.date()):
+            market_open, _ = self.session(day)
+            if after < market_open:
+                return market_open
+        return None
+
+    def next_summary(self, after: datetime) -> Optional[datetime]:
+        """First daily summary time strictly after `after`"""
+        after = self._local(after)
+        for day in self._trading_days(after.date()):
+            summary = self._at(day, self.summary_time)
+            if after < summary:
+                return summary
+        return None
+
+    def _trading_days(self, start: date):
+        for offset in range(LOOKAHEAD_DAYS):
+            day = start + timedelta(days=offset)
+            if self.is_trading_day(day):
+                yield day
+
+    def _at(self, day: date, hour_minute: Tuple[int, int]) -> datetime:
+        hour, minute = hour_minute
+        return self.tz.localize(datetime(day.year, day.month, day.day, hour, minute))
+
+    def _local(self, moment: Optional[datetime]) -> datetime:
+        return self.now() if moment is None else moment.astimezone(self.tz)
+
+
+class Job:
+    """A scheduled callable and the function that picks its next run time"""
+
+    def __init__(self, name: str, next_run: Callable[[datetime], Optional[datetime]],
+                 action: Callable[[datetime], None]):
+        self.name = name
+        self.next_run = next_run
+        self.action = action
+        self.due: Optional[datetime] = None
+
+
+class Scheduler:
+    """
+    Runs jobs at computed deadlines instead of polling a clock
+
+    Each job says when it is next due; the loop sleeps until the earliest
+    deadline, runs every job that is due (in the order they were added) and
+    asks each one for its following deadline. Nothing wakes up in between,
+    apart from one safety wakeup per MAX_SLEEP_SECONDS.
+    """
+
+    def __init__(self, calendar: MarketCalendar):
+        self.calendar = calendar
+        self.jobs: List[Job] = []
+        self._stop = threading.Event()
+
+    def add(self, name: str, next_run: Callable[[datetime], Optional[datetime]],
+            action: Callable[[datetime], None]) -> Job:
+        """
+        Args:
+            name: Job name (for logs and metrics)
+            next_run: Function returning the first run time strictly after a
+                given moment, or None if there is none
+            action: Function to call when the job is due, with the deadline
+                it was due at (it runs a moment later - e.g. just after the
+                close for the close's check)
+        """
+        job = Job(name, next_run, action)
+        self.jobs.append(job)
+        return job
+
+    def stop(self) -> None:
+        """Make run() return (from another thread)"""
+        self._stop.set()
+
+    def describe(self) -> str:
+        """Next run of every job"""
+        return ", ".join(
+            f"{job.name} {job.due.strftime('%a %Y-%m-%d %H:%M %Z') if job.due else 'never'}"
+            for job in self.jobs
+        )
+
+    def run(self) -> None:
+        """Run jobs until stop() is called"""
+        now = self.calendar.now()
+        for job in self.jobs:
+            self._plan(job, now)
+
+        announce = True
+        while not self._stop.is_set():
+            now = self.calendar.now()
+            due = [job for job in self.jobs if job.due is not None and job.due <= now]
+
+            if not due:
+                if announce:
+                    print(f"💤 Next: {self.describe()}")
+                    announce = False
+                deadlines = [job.due for job in self.jobs if job.due is not None]
+                wait = min(deadlines) - now if deadlines else None
+                seconds = MAX_SLEEP_SECONDS if wait is None else wait.total_seconds()
+                # Waiting on an Event lets stop() cut the sleep short
+                self._stop.wait(min(max(seconds, 0), MAX_SLEEP_SECONDS))
+                metrics.SCHEDULER_WAKEUPS.inc()
+                continue
+
+            for job in due:
+                try:
+                    job.action(job.due)
+                except Exception as e:
+                    print(f"❌ Scheduled job {job.name} failed: {e}")
+                # A job that overran later deadlines skips them rather than
+                # running back to back
+                self._plan(job, max(job.due, self.calendar.now()))
+            announce = True
+
+    def _plan(self, job: Job, after: datetime) -> None:
+        job.due = job.next_run(after)
+        if job.due is not None:
+            metrics.SCHEDULER_NEXT_RUN.set(job.due.timestamp(), job=job.name)
+
+
+def create_calendar() -> MarketCalendar:
+    """Calendar built from the market hours and holidays in config"""
+    import config
+    return MarketCalendar(
+        open_time=(config.MARKET_OPEN_HOUR, config.MARKET_OPEN_MINUTE),
+        close_time=(config.MARKET_CLOSE_HOUR, config.MARKET_CLOSE_MINUTE),
+        check_minutes=config.CHECK_INTERVAL_MINUTES,
+        summary_time=(config.DAILY_SUMMARY_HOUR, config.DAILY_SUMMARY_MINUTE),
+        holidays=getattr(config, "MARKET_HOLIDAYS_2025", []),
+    )
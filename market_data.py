@@ -0,0 +1,404 @@
+"""
+Market Data - Pluggable Price Data Providers
+One interface for live (yfinance), recorded (file replay) and cached market data
+"""
+
+import glob
+import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import pandas as pd
+import config
+import batch_fetch
+from bar_store import BAR_COLUMNS, slice_period
+from batch_fetch import MARKET_TIMEZONE, download_chunk
+
+
+# Imported on first use, like batch_fetch.yf
+yf = None
+
+
+def load_yfinance():
+    """The yfinance module used for Ticker lookups"""
+    global yf
+    if yf is None:
+        yf = batch_fetch.load_yfinance()
+    return yf
+
+
+class MarketDataProvider(ABC):
+    """
+    Base class - everything the bot and web UI need from a market data source
+
+    Frames are shaped like yfinance history() output: a tz-aware
+    DatetimeIndex and Open/High/Low/Close/Volume/Dividends/Stock Splits
+    columns. Callers should treat returned frames as read-only, since
+    providers may share them (see CachingProvider).
+    """
+
+    # Names the provider's bar store (see rules.py), so bars from one source
+    # are never served as another's
+    name = "yfinance"
+
+    # Replay clock (see ReplayProvider) - None for live sources
+    clock: Optional[pd.Timestamp] = None
+
+    def now(self) -> pd.Timestamp:
+        """The provider's current time (what "latest bar" is measured against)"""
+        return pd.Timestamp.now(tz=MARKET_TIMEZONE)
+
+    @abstractmethod
+    def history(self, symbol: str, period: Optional[str] = None, start: Optional[str] = None,
+                interval: str = "1d") -> pd.DataFrame:
+        """
+        Price history for one symbol
+
+        Args:
+            symbol: Stock ticker symbol
+            period: Time period (5d, 3mo, 1y, ytd, max) - ignored if start is given
+            start: First date to return (YYYY-MM-DD)
+            interval: Bar interval (1m, 1h, 1d, ...)
+
+        Returns:
+            History DataFrame (empty if there is no data)
+        """
+
+    def download(self, symbols: List[str], period: Optional[str] = None,
+                 start: Optional[str] = None, interval: str = "1d") -> Dict[str, pd.DataFrame]:
+        """
+        Price history for many symbols in one request
+
+        Returns:
+            Dictionary mapping symbol to history (symbols without data are left out)
+        """
+        frames = {}
+        for symbol in symbols:
+            data = self.history(symbol, period=period, start=start, interval=interval)
+            if data is not None and not data.empty:
+                frames[symbol] = data
+        return frames
+
+    def quote(self, symbol: str) -> Optional[float]:
+        """
+        Latest known price, or None if unavailable
+        """
+        data = self.history(symbol, period="5d", interval="1d")
+        if data is None or data.empty:
+            return None
+        return float(data["Close"].iloc[-1])
+
+
+class YFinanceProvider(MarketDataProvider):
+    """
+    Live data from Yahoo Finance
+    """
+
+    def __init__(self, timeout: float = 10):
+        """
+        Args:
+            timeout: Seconds before a request is abandoned
+        """
+        self.timeout = timeout
+
+    def history(self, symbol: str, period: Optional[str] = None, start: Optional[str] = None,
+                interval: str = "1d") -> pd.DataFrame:
+        ticker = load_yfinance().Ticker(symbol)
+        if start is not None:
+            return ticker.history(start=start, interval=interval, timeout=self.timeout)
+        return ticker.history(period=period or "1mo", interval=interval, timeout=self.timeout)
+
+    def download(self, symbols: List[str], period: Optional[str] = None,
+                 start: Optional[str] = None, interval: str = "1d") -> Dict[str, pd.DataFrame]:
+        kwargs = {"start": start} if start is not None else {"period": period or "1mo"}
+        return download_chunk(symbols, interval=interval, timeout=self.timeout, **kwargs)
+
+    def quote(self, symbol: str) -> Optional[float]:
+        price = super().quote(symbol)
+        if price is not None:
+            return price
+
+        # Last resort: info (may be more delayed)
+        info = load_yfinance().Ticker(symbol).info
+        for key in ("regularMarketPrice", "currentPrice"):
+            if key in info:
+                return float(info[key])
+        return None
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Recorded bars from CSV or Parquet files, served as if live
+
+    Files are long format - one row per bar with Symbol, Date (or
+    Datetime), Open, High, Low, Close, Volume and optionally Interval
+    (default "1d"), Dividends and Stock Splits. A replay clock hides bars
+    after `now`, so a recorded session can be stepped through check by
+    check. There is no I/O or waiting once the files are loaded.
+    """
+
+    name = "replay"
+
+    def __init__(self, path: str, now: Optional[pd.Timestamp] = None):
+        """
+        Args:
+            path: A .csv/.csv.gz/.parquet file, or a directory of them
+            now: Replay clock (None = serve everything)
+        """
+        self.path = path
+        self.frames: Dict[tuple, pd.DataFrame] = {}
+        self.clock: Optional[pd.Timestamp] = None
+        self._load(path)
+        self.set_time(now)
+
+    def set_time(self, now) -> None:
+        """Move the replay clock (None = end of the recording)"""
+        if now is None:
+            self.clock = None
+            return
+        now = pd.Timestamp(now)
+        self.clock = now.tz_localize(MARKET_TIMEZONE) if now.tz is None else now
+
+    def now(self) -> pd.Timestamp:
+        """The replay clock, or the last recorded bar if it isn't set"""
+        if self.clock is not None:
+            return self.clock
+        ends = [frame.index[-1] for frame in self.frames.values() if len(frame)]
+        return max(ends) if ends else super().now()
+
+    def symbols(self, interval: str = "1d") -> List[str]:
+        """Symbols recorded at an interval"""
+        return sorted(symbol for symbol, frame_interval in self.frames if frame_interval == interval)
+
+    def sessions(self, interval: str = "1d") -> List[pd.Timestamp]:
+        """Days (midnight, exchange time) with at least one bar recorded at an interval"""
+        days = set()
+        for (_, frame_interval), frame in self.frames.items():
+            if frame_interval == interval:
+                days.update(frame.index.normalize())
+        return sorted(days)
+
+    def history(self, symbol: str, period: Optional[str] = None, start: Optional[str] = None,
+                interval: str = "1d") -> pd.DataFrame:
+        data = self.frames.get((symbol, interval))
+        if data is None:
+            return pd.DataFrame(columns=BAR_COLUMNS)
+
+        if self.clock is not None:
+            data = data[data.index <= self.clock]
+        if start is not None:
+            return data[data.index >= pd.Timestamp(start, tz=data.index.tz)]
+        if not len(data):
+            return data
+
+        period = period or "1mo"
+        match = re.fullmatch(r"(\d+)d", period)
+        if match and interval[-1] in "mh":
+            # Intraday day periods cover whole sessions, not bars
+            sessions = data.index.normalize().unique()[-int(match.group(1)):]
+            return data[data.index >= sessions[0]]
+        return slice_period(data, period)
+
+    def quote(self, symbol: str) -> Optional[float]:
+        for interval in ("1m", "1d"):
+            data = self.history(symbol, period="5d", interval=interval)
+            if len(data):
+                return float(data["Close"].iloc[-1])
+        return None
+
+    def _load(self, path: str) -> None:
+        if os.path.isdir(path):
+            files = sorted(
+                name for pattern in ("*.csv", "*.csv.gz", "*.parquet")
+                for name in glob.glob(os.path.join(path, pattern))
+            )
+        else:
+            files = [path]
+
+        for name in files:
+            raw = pd.read_parquet(name) if name.endswith(".parquet") else pd.read_csv(name)
+            if "Date" not in raw.columns and "Datetime" not in raw.columns:
+                raw = raw.reset_index()
+            self._add_rows(raw)
+
+    def _add_rows(self, raw: pd.DataFrame) -> None:
+        date_col = "Datetime" if "Datetime" in raw.columns else "Date"
+        if "Interval" not in raw.columns:
+            raw = raw.assign(Interval="1d")
+
+        # Naive timestamps are exchange-local; offsets that change across DST
+        # can only be parsed via UTC
+        try:
+            dates = pd.to_datetime(raw[date_col])
+        except ValueError:
+            dates = pd.to_datetime(raw[date_col], utc=True)
+        if dates.dt.tz is None:
+            dates = dates.dt.tz_localize(MARKET_TIMEZONE)
+        raw[date_col] = dates.dt.tz_convert(MARKET_TIMEZONE)
+
+        for (symbol, interval), rows in raw.groupby(["Symbol", "Interval"], sort=False):
+            frame = rows.set_index(date_col).reindex(columns=BAR_COLUMNS)
+            frame[["Dividends", "Stock Splits"]] = frame[["Dividends", "Stock Splits"]].fillna(0.0)
+            frame.index.name = "Date"
+
+            key = (symbol, interval)
+            if key in self.frames:
+                frame = pd.concat([self.frames[key], frame])
+            frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+            self.frames[key] = frame
+
+
+class CachingProvider(MarketDataProvider):
+    """
+    Decorator that remembers another provider's answers for `ttl` seconds
+
+    Batched downloads are split per symbol, so a later request only goes
+    to the wrapped provider for symbols that aren't cached. Keys include
+    the wrapped provider's replay clock, so stepping a replay never serves
+    frames cut at an earlier time.
+    """
+
+    def __init__(self, provider: MarketDataProvider, ttl: float = 60, max_entries: int = 10000):
+        """
+        Args:
+            provider: Provider to wrap
+            ttl: Seconds an answer stays fresh
+            max_entries: Cached answers kept (least recently used are dropped)
+        """
+        self.provider = provider
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+
+    def history(self, symbol: str, period: Optional[str] = None, start: Optional[str] = None,
+                interval: str = "1d") -> pd.DataFrame:
+        key = ("history", symbol, period, start, interval, self.clock)
+        found, data = self._get(key)
+        if not found:
+            data = self.provider.history(symbol, period=period, start=start, interval=interval)
+            self._put(key, data)
+        return data
+
+    def download(self, symbols: List[str], period: Optional[str] = None,
+                 start: Optional[str] = None, interval: str = "1d") -> Dict[str, pd.DataFrame]:
+        frames = {}
+        missing = []
+        for symbol in symbols:
+            found, data = self._get(("history", symbol, period, start, interval, self.clock))
+            if not found:
+                missing.append(symbol)
+            elif data is not None and not data.empty:
+                frames[symbol] = data
+
+        if missing:
+            fetched = self.provider.download(missing, period=period, start=start, interval=interval)
+            for symbol in missing:
+                # Symbols the batch missed aren't cached, so they get retried
+                if symbol in fetched:
+                    self._put(("history", symbol, period, start, interval, self.clock),
+                              fetched[symbol])
+            frames.update(fetched)
+
+        return frames
+
+    @property
+    def name(self) -> str:
+        return self.provider.name
+
+    @property
+    def clock(self) -> Optional[pd.Timestamp]:
+        return self.provider.clock
+
+    def now(self) -> pd.Timestamp:
+        return self.provider.now()
+
+    def quote(self, symbol: str) -> Optional[float]:
+        key = ("quote", symbol, self.clock)
+        found, price = self._get(key)
+        if not found:
+            price = self.provider.quote(symbol)
+            if price is not None:
+                self._put(key, price)
+        return price
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _get(self, key: tuple):
+        """(True, value) for a fresh entry, else (False, None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            self.misses += 1
+            return False, None
+
+    def _put(self, key: tuple, value) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def create_provider() -> MarketDataProvider:
+    """
+    Build the provider selected in config
+
+    MARKET_DATA_PROVIDER: "yfinance" (default) or "replay"
+    MARKET_DATA_REPLAY_PATH: File or directory of recorded bars (replay)
+    MARKET_DATA_CACHE_SECONDS: Wrap in a CachingProvider if > 0
+    """
+    name = getattr(config, "MARKET_DATA_PROVIDER", "yfinance")
+    if name == "replay":
+        provider = ReplayProvider(getattr(config, "MARKET_DATA_REPLAY_PATH", "replay"))
+    elif name == "yfinance":
+        provider = YFinanceProvider(timeout=getattr(config, "FETCH_TIMEOUT_SECONDS", 10))
+    else:
+        raise ValueError(f"Unknown MARKET_DATA_PROVIDER: {name}")
+
+    cache_seconds = getattr(config, "MARKET_DATA_CACHE_SECONDS", 0)
+    if cache_seconds:
+        provider = CachingProvider(provider, ttl=cache_seconds)
+    return provider
+
+
+def record(provider: MarketDataProvider, symbols: List[str], path: str,
+           period: str = "1y", interval: str = "1d") -> int:
+    """
+    Save history from any provider to a file ReplayProvider can load
+
+    Args:
+        provider: Source of the bars
+        symbols: Symbols to record
+        path: Output .csv/.csv.gz/.parquet file
+        period: History period to record
+        interval: Bar interval
+
+    Returns:
+        Number of bars written
+    """
+    frames = provider.download(symbols, period=period, interval=interval)
+    if not frames:
+        return 0
+
+    rows = pd.concat(
+        [frame.reindex(columns=BAR_COLUMNS).assign(Symbol=symbol, Interval=interval)
+         for symbol, frame in frames.items()]
+    )
+    rows.index.name = "Date"
+    rows = rows.reset_index()
+    if path.endswith(".parquet"):
+        rows.to_parquet(path, index=False)
+    else:
+        rows.to_csv(path, index=False)
+    return len(rows)
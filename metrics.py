@@ -0,0 +1,400 @@
+"""
+Metrics - In-Process Timers, Counters And Histograms
+Hot-path telemetry for the bot and web UI, rendered in Prometheus text format
+"""
+
+import bisect
+import functools
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Sequence
+
+
+# Bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CYCLE_BUCKETS = (1, 5, 10, 30, 60, 120, 180, 300, 600, 900)
+TICK_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+
+class Metric:
+    """
+    One metric family - a value (or histogram) per combination of label values
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        """
+        Args:
+            name: Metric name (e.g. tradingbot_rule_seconds)
+            help_text: One-line description shown in /metrics
+            labels: Label names every sample must provide
+        """
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._series = {}  # label values tuple -> value
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> tuple:
+        if len(labels) != len(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def clear(self) -> None:
+        """Drop every series"""
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self) -> Dict:
+        """JSON-friendly copy of the family (see Registry.snapshot)"""
+        with self._lock:
+            series = [
+                {"labels": dict(zip(self.labels, key)), "value": value}
+                for key, value in self._series.items()
+            ]
+        return {"type": self.kind, "help": self.help, "series": series}
+
+
+class Counter(Metric):
+    """
+    Monotonically increasing count (requests, alerts sent, errors)
+    """
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._series.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    """
+    Value that can go up and down (last cycle duration, queue depth)
+    """
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+    def value(self, **labels) -> Optional[float]:
+        with self._lock:
+            return self._series.get(self._key(labels))
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values (durations) in fixed buckets
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Args:
+            name: Metric name, should end in _seconds for durations
+            help_text: One-line description shown in /metrics
+            labels: Label names every sample must provide
+            buckets: Increasing bucket upper bounds (+Inf is added automatically)
+        """
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket (not cumulative) counts, then sum and count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with-block (also when it raises)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return series[2] if series else 0
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            series = [
+                {"labels": dict(zip(self.labels, key)), "counts": list(counts),
+                 "sum": total, "count": count}
+                for key, (counts, total, count) in self._series.items()
+            ]
+        return {"type": self.kind, "help": self.help, "buckets": list(self.buckets),
+                "series": series}
+
+
+class Registry:
+    """
+    All metrics of one process, by name
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, help_text, labels)
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help_text, labels, buckets=buckets)
+
+    def _register(self, cls, name: str, help_text: str, labels: Sequence[str], **kwargs):
+        """Create a metric, or return the existing one (modules may be re-imported)"""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labels, **kwargs)
+            elif not isinstance(metric, cls) or metric.labels != tuple(labels):
+                raise ValueError(f"Metric {name} already registered with a different type or labels")
+            return metric
+
+    def reset(self) -> None:
+        """Clear every metric's values (registrations are kept)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+
+    def snapshot(self, **extra_labels) -> Dict[str, Dict]:
+        """
+        Copy of every metric, safe to JSON-encode
+
+        Args:
+            **extra_labels: Labels added to every series (e.g. process="bot")
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        families = {}
+        for metric in metrics:
+            family = metric.snapshot()
+            for series in family["series"]:
+                series["labels"] = dict(extra_labels, **series["labels"])
+            families[metric.name] = family
+        return families
+
+    def save(self, path: str, **extra_labels) -> None:
+        """
+        Write a snapshot to disk so another process can serve it (see load)
+
+        The file is replaced atomically, so readers never see half a snapshot.
+        """
+        snapshot = self.snapshot(**extra_labels)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": time.time(), "metrics": snapshot}, f)
+        os.replace(temp_path, path)
+
+
+def load(path: str) -> Optional[Dict[str, Dict]]:
+    """
+    Read a snapshot written by Registry.save
+
+    Returns:
+        The metric families, or None if the file is missing or unreadable
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["metrics"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def render(*snapshots: Dict[str, Dict]) -> str:
+    """
+    Format snapshots in the Prometheus text exposition format
+
+    Families with the same name in several snapshots (one per process) are
+    merged, so their series need a label that tells them apart.
+
+    Args:
+        *snapshots: Results of Registry.snapshot / load
+
+    Returns:
+        Text for a /metrics response (version 0.0.4)
+    """
+    families = {}
+    for snapshot in snapshots:
+        for name, family in (snapshot or {}).items():
+            if name not in families:
+                families[name] = dict(family, series=[])
+            elif families[name]["type"] != family["type"]:
+                continue
+            families[name]["series"].extend(
+                dict(series, buckets=family.get("buckets")) for series in family["series"]
+            )
+
+    lines = []
+    for name in sorted(families):
+        family = families[name]
+        lines.append(f"# HELP {name} {_escape_help(family['help'])}")
+        lines.append(f"# TYPE {name} {family['type']}")
+
+        for series in family["series"]:
+            labels = series["labels"]
+            if family["type"] != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(series['value'])}")
+                continue
+
+            cumulative = 0
+            bounds = list(series["buckets"]) + [math.inf]
+            for bound, count in zip(bounds, series["counts"]):
+                cumulative += count
+                bucket_labels = dict(labels, le=_format_value(bound))
+                lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(series['sum'])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {series['count']}")
+
+    return "\n".join(lines) + "\n"
+
+
+def timed(histogram: Histogram, **labels) -> Callable:
+    """
+    Decorator - observe how long each call takes
+
+    Example:
+        @timed(RULE_SECONDS, rule="hard_stop")
+        def check_hard_stop(...): ...
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items()) + "}"
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+# Process-wide registry used by the bot and the web UI
+REGISTRY = Registry()
+
+
+# =============================================================================
+# HOT-PATH METRICS
+# =============================================================================
+
+CYCLE_SECONDS = REGISTRY.histogram(
+    "tradingbot_cycle_seconds", "Duration of a full scheduled job", ["job"], buckets=CYCLE_BUCKETS
+)
+CYCLE_LAST_SECONDS = REGISTRY.gauge(
+    "tradingbot_cycle_last_seconds", "Duration of the most recent run of each job", ["job"]
+)
+CYCLE_LAST_TIMESTAMP = REGISTRY.gauge(
+    "tradingbot_cycle_last_timestamp_seconds", "Unix time the most recent run of each job ended", ["job"]
+)
+CHECK_INTERVAL_SECONDS = REGISTRY.gauge(
+    "tradingbot_check_interval_seconds", "Configured time between portfolio checks"
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "tradingbot_stage_seconds", "Duration of each stage of a portfolio check", ["stage"],
+    buckets=CYCLE_BUCKETS
+)
+SYMBOL_DATA_SECONDS = REGISTRY.histogram(
+    "tradingbot_symbol_data_seconds", "Time to get one symbol's history, by where it came from",
+    ["source"]
+)
+FETCH_REQUEST_SECONDS = REGISTRY.histogram(
+    "tradingbot_fetch_request_seconds", "Latency of market data requests on the fetch pool"
+)
+FETCH_SYMBOLS = REGISTRY.counter(
+    "tradingbot_fetch_symbols_total", "Symbols delivered by fetch pool requests"
+)
+FETCH_ERRORS = REGISTRY.counter(
+    "tradingbot_fetch_errors_total", "Symbols whose fetch failed or timed out", ["kind"]
+)
+INDICATOR_SECONDS = REGISTRY.histogram(
+    "tradingbot_indicator_seconds", "Time spent computing indicators", ["indicator"]
+)
+SCAN_SYMBOLS = REGISTRY.counter(
+    "tradingbot_scan_symbols_total", "Symbols run through the buy signal scan"
+)
+RULE_SECONDS = REGISTRY.histogram(
+    "tradingbot_rule_seconds", "Time spent in each alert rule check", ["rule"]
+)
+RULE_TRIGGERED = REGISTRY.counter(
+    "tradingbot_rule_triggered_total", "Alerts raised by each rule", ["rule"]
+)
+ALERT_SEND_SECONDS = REGISTRY.histogram(
+    "tradingbot_alert_send_seconds", "Time to deliver one alert on each channel", ["channel"]
+)
+ALERTS_SENT = REGISTRY.counter(
+    "tradingbot_alerts_sent_total", "Alert deliveries per channel and outcome", ["channel", "result"]
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "tradingbot_http_request_seconds", "Web UI request latency", ["endpoint", "method"]
+)
+SCHEDULER_NEXT_RUN = REGISTRY.gauge(
+    "tradingbot_scheduler_next_run_timestamp_seconds", "Unix time each scheduled job is next due", ["job"]
+)
+SCHEDULER_WAKEUPS = REGISTRY.counter(
+    "tradingbot_scheduler_wakeups_total", "Times the scheduler woke from a sleep (once per deadline, plus hourly safety wakeups)"
+)
+TICKS = REGISTRY.counter(
+    "tradingbot_ticks_total", "Price ticks processed in streaming mode"
+)
+TICK_LEVEL_CROSSINGS = REGISTRY.counter(
+    "tradingbot_tick_level_crossings_total", "Ticks that crossed a rule's price level", ["rule"]
+)
+TICK_TRIGGER_SECONDS = REGISTRY.histogram(
+    "tradingbot_tick_trigger_seconds", "Time from a tick arriving to its crossed rules being checked",
+    buckets=TICK_BUCKETS
+)
+STREAM_CLIENTS = REGISTRY.gauge(
+    "tradingbot_stream_clients", "Browsers connected to the live price stream"
+)
+STREAM_UPDATES = REGISTRY.counter(
+    "tradingbot_stream_updates_total", "Price stream refreshes that changed at least one position"
+)
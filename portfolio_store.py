@@ -0,0 +1,304 @@
+"""
+Portfolio Store - Holdings And Watchlist On Disk
+One structured file shared by the bot and the web UI, parsed only when it changes
+"""
+
+import ast
+import json
+import os
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+from symbols import normalize_symbol
+
+
+DEFAULT_PATH = "portfolio.json"
+LEGACY_PATH = "portfolio.py"
+
+
+class PortfolioStore:
+    """
+    Holdings and watchlist kept in a JSON file
+
+    The parsed file is cached in memory and only re-read when its mtime or
+    size changes, so reads are cheap no matter how often they happen.
+    Holdings are keyed by symbol, so lookups, adds and deletes don't scan
+    the list. Every change is written to disk atomically.
+
+    File format:
+        {"holdings": [{"symbol": "AAPL", "shares": 10, "avg_cost": 150.0}, ...],
+         "watchlist": ["MSFT", ...]}
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, legacy_path: Optional[str] = LEGACY_PATH):
+        """
+        Args:
+            path: JSON file (created on first write)
+            legacy_path: portfolio.py to import from if the JSON file doesn't exist yet
+        """
+        self.path = path
+        self.legacy_path = legacy_path
+        self._holdings: Dict[str, Dict] = {}   # symbol -> holding, in portfolio order
+        self._watchlist: Dict[str, None] = {}  # ordered set of symbols
+        self._signature = None                 # (mtime_ns, size) of the parsed file
+        self._lock = threading.RLock()
+
+    @property
+    def holdings(self) -> List[Dict]:
+        """Current holdings (treat the dicts as read-only)"""
+        with self._lock:
+            self._refresh()
+            return list(self._holdings.values())
+
+    @property
+    def watchlist(self) -> List[str]:
+        """Current watchlist symbols"""
+        with self._lock:
+            self._refresh()
+            return list(self._watchlist)
+
+    def load(self) -> Tuple[List[Dict], List[str]]:
+        """Holdings and watchlist read together (one consistent version)"""
+        with self._lock:
+            self._refresh()
+            return list(self._holdings.values()), list(self._watchlist)
+
+    def get_holding(self, symbol: str) -> Optional[Dict]:
+        with self._lock:
+            self._refresh()
+            return self._holdings.get(normalize_symbol(symbol))
+
+    def add_holding(self, symbol: str, shares: float, avg_cost: float) -> bool:
+        """
+        Add a position
+
+        Returns:
+            False if the symbol is already held
+        """
+        holding = make_holding(symbol, shares, avg_cost)
+        with self._lock:
+            self._refresh()
+            if holding["symbol"] in self._holdings:
+                return False
+            self._holdings[holding["symbol"]] = holding
+            self._save()
+        return True
+
+    def update_holding(self, symbol: str, shares: float, avg_cost: float) -> bool:
+        """
+        Change an existing position's shares and average cost
+
+        Returns:
+            False if the symbol isn't held
+        """
+        holding = make_holding(symbol, shares, avg_cost)
+        with self._lock:
+            self._refresh()
+            if holding["symbol"] not in self._holdings:
+                return False
+            self._holdings[holding["symbol"]] = holding
+            self._save()
+        return True
+
+    def remove_holding(self, symbol: str) -> bool:
+        """
+        Returns:
+            False if the symbol wasn't held
+        """
+        with self._lock:
+            self._refresh()
+            if self._holdings.pop(normalize_symbol(symbol), None) is None:
+                return False
+            self._save()
+        return True
+
+    def add_to_watchlist(self, symbol: str) -> bool:
+        """
+        Returns:
+            False if the symbol is already on the watchlist
+        """
+        symbol = require_symbol(symbol)
+        with self._lock:
+            self._refresh()
+            if symbol in self._watchlist:
+                return False
+            self._watchlist[symbol] = None
+            self._save()
+        return True
+
+    def remove_from_watchlist(self, symbol: str) -> bool:
+        """
+        Returns:
+            False if the symbol wasn't on the watchlist
+        """
+        symbol = normalize_symbol(symbol)
+        with self._lock:
+            self._refresh()
+            if symbol not in self._watchlist:
+                return False
+            del self._watchlist[symbol]
+            self._save()
+        return True
+
+    def replace(self, holdings: List[Dict], watchlist: List[str]) -> None:
+        """Overwrite everything (used by the importer)"""
+        parsed_holdings, parsed_watchlist = parse_portfolio(
+            {"holdings": holdings, "watchlist": watchlist}, source="replace()"
+        )
+        with self._lock:
+            self._holdings = parsed_holdings
+            self._watchlist = parsed_watchlist
+            self._save()
+
+    def _refresh(self) -> None:
+        """Re-read the file if it changed since it was last parsed"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self._signature is None and self.legacy_path and os.path.exists(self.legacy_path):
+                count = import_portfolio_py(self, self.legacy_path)
+                print(f"📥 Imported {count} holding(s) from {self.legacy_path} into {self.path}")
+            return
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self._holdings, self._watchlist = parse_portfolio(data, source=self.path)
+        self._signature = signature
+
+    def _save(self) -> None:
+        """Write the current state atomically and remember its signature"""
+        data = {
+            "holdings": list(self._holdings.values()),
+            "watchlist": list(self._watchlist),
+        }
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+            f.write("\n")
+        os.replace(temp_path, self.path)
+
+        stat = os.stat(self.path)
+        self._signature = (stat.st_mtime_ns, stat.st_size)
+
+
+def require_symbol(symbol: str) -> str:
+    """symbols.normalize_symbol, raising ValueError for an empty symbol"""
+    symbol = normalize_symbol(str(symbol))
+    if not symbol:
+        raise ValueError("Empty symbol")
+    return symbol
+
+
+def make_holding(symbol: str, shares: float, avg_cost: float) -> Dict:
+    """Validated holding dict"""
+    shares = float(shares)
+    avg_cost = float(avg_cost)
+    if shares <= 0 or avg_cost <= 0:
+        raise ValueError(f"{symbol}: shares and avg_cost must be positive")
+    return {"symbol": require_symbol(symbol), "shares": shares, "avg_cost": avg_cost}
+
+
+def parse_portfolio(data: Dict, source: str) -> Tuple[Dict[str, Dict], Dict[str, None]]:
+    """
+    Validate raw holdings/watchlist data
+
+    Invalid entries are reported and skipped rather than failing the whole
+    file; a repeated holding keeps its last entry.
+
+    Returns:
+        (symbol -> holding, ordered watchlist set)
+    """
+    holdings = {}
+    for entry in data.get("holdings", []):
+        try:
+            holding = make_holding(entry["symbol"], entry["shares"], entry["avg_cost"])
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"⚠️  {source}: skipping invalid holding {entry!r} ({e})")
+            continue
+        holdings[holding["symbol"]] = holding
+
+    watchlist = {}
+    for entry in data.get("watchlist", []):
+        try:
+            watchlist[require_symbol(entry)] = None
+        except ValueError:
+            print(f"⚠️  {source}: skipping invalid watchlist entry {entry!r}")
+
+    return holdings, watchlist
+
+
+def read_portfolio_py(path: str = LEGACY_PATH) -> Tuple[List[Dict], List[str]]:
+    """
+    Read holdings and watchlist from a portfolio.py without running it
+
+    The `holdings = [...]` and `watchlist = [...]` assignments are evaluated
+    as literals, so any formatting (spacing, comments, trailing commas) works.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    values = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name) and target.id in ("holdings", "watchlist"):
+                    values[target.id] = ast.literal_eval(node.value)
+
+    return values.get("holdings", []), values.get("watchlist", [])
+
+
+def import_portfolio_py(store: PortfolioStore, path: str = LEGACY_PATH) -> int:
+    """
+    Replace a store's contents with a portfolio.py
+
+    Returns:
+        Number of holdings imported
+    """
+    holdings, watchlist = read_portfolio_py(path)
+    store.replace(holdings, watchlist)
+    return len(store.holdings)
+
+
+def create_store() -> PortfolioStore:
+    """Store at PORTFOLIO_PATH from config"""
+    import config
+    return PortfolioStore(getattr(config, "PORTFOLIO_PATH", DEFAULT_PATH))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Usage:
+        python portfolio_store.py --import [portfolio.py]   Replace the store with portfolio.py
+        python portfolio_store.py --show                    Print holdings and watchlist
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(main.__doc__)
+        return 0
+
+    store = create_store()
+
+    if argv[0] == "--import":
+        path = argv[1] if len(argv) > 1 else LEGACY_PATH
+        count = import_portfolio_py(store, path)
+        print(f"✅ Imported {count} holding(s) and {len(store.watchlist)} watchlist symbol(s) "
+              f"from {path} into {store.path}")
+        return 0
+
+    if argv[0] == "--show":
+        holdings, watchlist = store.load()
+        for h in holdings:
+            print(f"{h['symbol']:6s} {h['shares']:>10.3f} @ ${h['avg_cost']:.2f}")
+        print(f"Watchlist ({len(watchlist)}): {', '.join(watchlist)}")
+        return 0
+
+    print(f"❌ Unknown command: {argv[0]}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
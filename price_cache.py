@@ -0,0 +1,117 @@
+"""
+Price Cache - Shared Latest Prices For The Web UI
+Serves every open tab from one refresh instead of one download per request
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+
+class PriceCache:
+    """
+    TTL cache of latest prices with single-flight refresh
+
+    When prices are stale, the first request fetches them (all stale
+    symbols in one call) and concurrent requests wait for that refresh
+    instead of starting their own. If a refresh fails, the last known
+    prices are served.
+    """
+
+    def __init__(self, fetch: Callable[[List[str]], Dict[str, Optional[float]]],
+                 ttl: float = 30, max_age: Optional[float] = None):
+        """
+        Args:
+            fetch: Function returning {symbol: price or None} for a list of symbols
+            ttl: Seconds a price is served before it is refreshed
+            max_age: Seconds before an unused price is forgotten (default 10 × ttl)
+        """
+        self.fetch = fetch
+        self.ttl = ttl
+        self.max_age = max_age if max_age is not None else ttl * 10
+        self.hits = 0
+        self.refreshes = 0
+        self._prices = {}      # symbol -> (fetched_at, price)
+        self._flight = None    # (symbols, done event) while a refresh runs
+        self._lock = threading.Lock()
+
+    def get(self, symbols: List[str], ttl: Optional[float] = None) -> Dict[str, Optional[float]]:
+        """
+        Latest prices for symbols, refreshing stale ones first
+
+        Args:
+            symbols: Stock ticker symbols
+            ttl: Maximum age in seconds for this call (default: the cache's ttl)
+
+        Returns:
+            Dictionary mapping every symbol to its price (None if unavailable)
+        """
+        symbols = list(dict.fromkeys(symbols))
+        ttl = self.ttl if ttl is None else ttl
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                stale = [s for s in symbols
+                         if s not in self._prices or now - self._prices[s][0] >= ttl]
+                if not stale:
+                    self.hits += 1
+                    return {s: self._prices[s][1] for s in symbols}
+
+                flight = self._flight
+                if flight is None:
+                    flight = self._flight = (set(stale), threading.Event())
+                    leader = True
+                else:
+                    leader = False
+
+            if leader:
+                self._refresh(stale, flight)
+                return self._current(symbols)
+
+            # Another request is already refreshing - wait for it, then start
+            # our own refresh only for symbols it didn't cover
+            flight[1].wait()
+            if flight[0].issuperset(stale):
+                return self._current(symbols)
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        """Forget one symbol's price (or all prices) so the next get refetches"""
+        with self._lock:
+            if symbol is None:
+                self._prices.clear()
+            else:
+                self._prices.pop(symbol, None)
+
+    def _refresh(self, symbols: List[str], flight: tuple) -> None:
+        """Fetch symbols in one call and publish them to waiting requests"""
+        try:
+            prices = self.fetch(symbols)
+        except Exception as e:
+            print(f"Error refreshing prices: {e}")
+            prices = {}
+
+        with self._lock:
+            now = time.monotonic()
+            self.refreshes += 1
+            for symbol in symbols:
+                price = prices.get(symbol)
+                if price is not None or symbol not in self._prices:
+                    self._prices[symbol] = (now, price)
+                else:
+                    # Keep the last good price, but don't retry until the TTL passes
+                    self._prices[symbol] = (now, self._prices[symbol][1])
+
+            # Strictly older, so a cache with ttl=0 (always refresh) still
+            # returns what this refresh just fetched
+            for symbol in [s for s, (fetched_at, _) in self._prices.items()
+                           if now - fetched_at > self.max_age]:
+                del self._prices[symbol]
+
+            self._flight = None
+        flight[1].set()
+
+    def _current(self, symbols: List[str]) -> Dict[str, Optional[float]]:
+        """Whatever is cached for symbols, fresh or not"""
+        with self._lock:
+            return {s: self._prices[s][1] if s in self._prices else None for s in symbols}
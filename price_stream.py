@@ -0,0 +1,158 @@
+"""
+Price Stream - Server-Sent Events For The Dashboard
+One background refresh pushes changed positions to every connected browser
+"""
+
+import json
+import queue
+import threading
+from typing import Callable, Dict, Iterator, List, Optional
+import metrics
+
+
+# Seconds between keep-alive comments (also how fast a closed tab is noticed)
+HEARTBEAT_SECONDS = 15
+
+# Events a slow client may fall behind by before it is sent a full snapshot instead
+MAX_BACKLOG = 50
+
+
+class PriceStream:
+    """
+    Publishes position updates to any number of subscribers
+
+    A single thread calls `load` every `interval` seconds while at least one
+    client is connected and compares the rows with the previous refresh.
+    Only rows that changed (and symbols that disappeared) are broadcast, so
+    the cost of a refresh doesn't depend on the number of viewers.
+    """
+
+    def __init__(self, load: Callable[[], List[Dict]], interval: float = 10):
+        """
+        Args:
+            load: Function returning the current rows, each with a "symbol" key
+            interval: Seconds between refreshes
+        """
+        self.load = load
+        self.interval = interval
+        self._rows: Dict[str, Dict] = {}  # symbol -> row as last published
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def subscribe(self) -> "queue.Queue":
+        """
+        Register a client - its queue starts with a snapshot of every row
+        (until the first refresh there is none, and the first update
+        carries every row instead)
+
+        Returns:
+            Queue of (event, data) tuples for this client
+        """
+        client = queue.Queue(maxsize=MAX_BACKLOG)
+        with self._lock:
+            snapshot = list(self._rows.values())
+            self._subscribers.add(client)
+            metrics.STREAM_CLIENTS.set(len(self._subscribers))
+        if snapshot:
+            client.put(("snapshot", {"rows": snapshot}))
+        self._start()
+        self._wake.set()  # First client gets fresh prices right away
+        return client
+
+    def unsubscribe(self, client: "queue.Queue") -> None:
+        """Forget a client (its tab was closed)"""
+        with self._lock:
+            self._subscribers.discard(client)
+            metrics.STREAM_CLIENTS.set(len(self._subscribers))
+
+    def refresh_now(self) -> None:
+        """Refresh before the next interval (e.g. after a holding was added)"""
+        self._wake.set()
+
+    def events(self, client: Optional["queue.Queue"] = None) -> Iterator[str]:
+        """
+        SSE-formatted events for one client, until it disconnects
+
+        Args:
+            client: Queue from subscribe() (subscribes if None)
+
+        Yields:
+            text/event-stream chunks
+        """
+        client = client or self.subscribe()
+        try:
+            while True:
+                try:
+                    event, data = client.get(timeout=HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            # Runs when the server closes the response after a disconnect
+            self.unsubscribe(client)
+
+    def publish(self) -> int:
+        """
+        Load the rows once and broadcast what changed
+
+        Returns:
+            Number of changed or removed rows
+        """
+        rows = self.load()
+        current = {row["symbol"]: row for row in rows}
+
+        with self._lock:
+            changed = [row for symbol, row in current.items() if self._rows.get(symbol) != row]
+            removed = [symbol for symbol in self._rows if symbol not in current]
+            # Rows keep portfolio order so new positions can be placed correctly
+            order = list(current)
+            self._rows = current
+            subscribers = list(self._subscribers)
+
+        if not changed and not removed:
+            return 0
+
+        update = {"changed": changed, "removed": removed, "order": order}
+        for client in subscribers:
+            self._send(client, "update", update)
+        metrics.STREAM_UPDATES.inc()
+        return len(changed) + len(removed)
+
+    def _send(self, client: "queue.Queue", event: str, data: Dict) -> None:
+        """Queue an event, replacing a client's backlog with a snapshot if it fell behind"""
+        try:
+            client.put_nowait((event, data))
+        except queue.Full:
+            while True:
+                try:
+                    client.get_nowait()
+                except queue.Empty:
+                    break
+            with self._lock:
+                snapshot = list(self._rows.values())
+            client.put_nowait(("snapshot", {"rows": snapshot}))
+
+    def _start(self) -> None:
+        """Start the refresh thread on first subscription"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="price-stream", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        """Refresh loop - idles while nobody is connected"""
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+            with self._lock:
+                if not self._subscribers:
+                    continue
+            try:
+                self.publish()
+            except Exception as e:
+                print(f"Error refreshing price stream: {e}")
@@ -3,12 +3,51 @@ Trading Rules Engine - Evaluates Alert Conditions
 Contains all logic for stop losses, profit targets, and buy signals
 """
 
-import yfinance as yf
+import functools
+import time
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 import config
 from alerts import AlertSystem
+from accounts import DEFAULT_ACCOUNT, PositionIndex, alert_scope
+from alert_store import (AlertStore, RULE_HARD_STOP, RULE_MOMENTUM_PULLBACK,
+                         RULE_PROFIT_TARGET, RULE_SMA200_BREACH, RULE_WARNING)
+from batch_fetch import MARKET_TIMEZONE, download_batch, latest_prices
+from market_data import MarketDataProvider, create_provider
+from fetch_pool import FetchPool
+from bar_store import (BarStore, adjustment_changed, period_start, period_length,
+                       provider_store_path, slice_period)
+from cycle_cache import CycleCache
+from price_cache import PriceCache
+from scan_pipeline import ScanPipeline
+from indicators import StreamingRSI, StreamingSMA
+import metrics
+
+
+# Stored history may start a few days after the requested period start
+# (weekends, holidays), so allow some slack before treating it as incomplete
+STORE_START_TOLERANCE = pd.Timedelta(days=7)
+
+# Widest history any rule needs (52-week high, 200-day SMA) - fetched once
+# per symbol per check, narrower periods are sliced from it
+CYCLE_FETCH_PERIOD = "1y"
+
+
+def timed_rule(rule: str):
+    """
+    Decorator for check_* rules - records time spent and alerts raised per rule
+    """
+    def decorator(check):
+        @functools.wraps(check)
+        def wrapper(*args, **kwargs):
+            with metrics.RULE_SECONDS.time(rule=rule):
+                triggered = check(*args, **kwargs)
+            if triggered:
+                metrics.RULE_TRIGGERED.inc(rule=rule)
+            return triggered
+        return wrapper
+    return decorator
 
 
 class TradingRules:
@@ -16,36 +55,364 @@ class TradingRules:
     Evaluates trading rules against current market data
     """
     
-    def __init__(self):
-        """Initialize the trading rules engine"""
+    def __init__(self, market_data: Optional[MarketDataProvider] = None):
+        """
+        Initialize the trading rules engine
+        
+        Args:
+            market_data: Source of price data (default: create_provider() from config)
+        """
         self.alert_system = AlertSystem()
-        self.triggered_alerts = {}  # Track which alerts already fired to avoid spam
+        # Accounts with their own recipients (others use alert_system)
+        self.account_alerts: Dict[str, AlertSystem] = {}
+        self.market_data = market_data or create_provider()
+        
+        # Fired alerts are kept on disk so a restart doesn't re-send them
+        position_ttl_days = getattr(config, "ALERT_POSITION_TTL_DAYS", 0)
+        position_ttl = position_ttl_days * 24 if position_ttl_days else None
+        self.alert_store = AlertStore(
+            getattr(config, "ALERT_STATE_PATH", "alert_state.db"),
+            ttl_hours={
+                RULE_HARD_STOP: position_ttl,
+                RULE_WARNING: position_ttl,
+                RULE_PROFIT_TARGET: position_ttl,
+            },
+            history_days=getattr(config, "ALERT_HISTORY_DAYS", 365),
+        )
+        self.alert_store.evict_expired()
+        
+        # Persistent bar cache - only bars newer than the last stored one are
+        # downloaded. Each provider has its own file, so recorded (replay)
+        # bars never end up in the live cache.
+        self.bar_store = None
+        if getattr(config, "BAR_CACHE_ENABLED", True):
+            self.bar_store = BarStore(provider_store_path(
+                getattr(config, "BAR_CACHE_PATH", "market_data.db"), self.market_data.name))
+        
+        # Per-check cache so each symbol is downloaded at most once per check
+        max_mb = getattr(config, "CYCLE_CACHE_MAX_MB", 256)
+        self.cycle_cache = CycleCache(max_bytes=int(max_mb * 1024 * 1024))
+        
+        # Concurrent, rate-limited fetching so one slow symbol can't stall a check
+        self.fetch_timeout = getattr(config, "FETCH_TIMEOUT_SECONDS", 10)
+        self.fetch_pool = FetchPool(
+            max_workers=getattr(config, "FETCH_MAX_WORKERS", 4),
+            rate_per_second=getattr(config, "FETCH_RATE_PER_SECOND", 2.0),
+            burst=getattr(config, "FETCH_BURST", 5),
+            timeout=self.fetch_timeout,
+        )
+        
+        # Latest prices for the price-threshold rules - a few small batched
+        # requests, reused for QUOTE_CACHE_SECONDS
+        self.quote_cache = PriceCache(self._fetch_quotes,
+                                      ttl=getattr(config, "QUOTE_CACHE_SECONDS", 15))
+        
+        # Streaming indicator state per (symbol, indicator, window) - only new
+        # bars are applied each check instead of recomputing full rolling series
+        self.indicators = {}
+        
+    def alert_system_for(self, account: str) -> AlertSystem:
+        """Where an account's alerts are sent"""
+        return self.account_alerts.get(account, self.alert_system)
+    
+    def alert_systems(self) -> List[AlertSystem]:
+        """Every alert system in use (for digests and shutdown)"""
+        return [self.alert_system] + list(self.account_alerts.values())
+    
+    def set_accounts(self, accounts: List) -> None:
+        """
+        Route alerts per account - every account except the main one gets an
+        AlertSystem that names the account and uses its own recipients
+        (falling back to the configured ones)
+        
+        Args:
+            accounts: accounts.Account list
+        """
+        for alert_system in self.account_alerts.values():
+            alert_system.shutdown()
+        self.account_alerts = {
+            account.name: AlertSystem(account=account.name,
+                                      telegram_chat_id=account.telegram_chat_id,
+                                      email_to=account.email_to)
+            for account in accounts if account.name != DEFAULT_ACCOUNT
+        }
+    
+    def start_cycle(self) -> None:
+        """
+        Start a new check - forget market data cached by the previous one
+        """
+        self.cycle_cache.clear()
+        self.fetch_pool.start_cycle()
+    
+    def fetch_report(self) -> str:
+        """
+        Per-symbol fetch latency and error counts for the current check
+        """
+        return self.fetch_pool.stats.summary()
         
-    def get_stock_data(self, symbol: str, period: str = "1y") -> Optional[pd.DataFrame]:
+    def get_stock_data(self, symbol: str, period: str = "1y",
+                       interval: str = "1d") -> Optional[pd.DataFrame]:
         """
-        Fetch historical stock data from yfinance
+        Fetch historical stock data from the market data provider
+        
+        The widest period any rule needs is downloaded once per check and
+        narrower periods are served from it.
         
         Args:
             symbol: Stock ticker symbol
             period: Time period (1y, 6mo, etc.)
+            interval: Bar interval (1d, 1h, etc.)
             
         Returns:
             DataFrame with historical data or None if failed
         """
         try:
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(period=period)
+            started = time.perf_counter()
+            cache_key = (symbol, interval)
+            cached = self.cycle_cache.get(cache_key)
+            if cached is not None and period_length(cached[0]) >= period_length(period):
+                data = slice_period(cached[1], period)
+                metrics.SYMBOL_DATA_SECONDS.observe(time.perf_counter() - started, source="cache")
+                return data
             
-            if data.empty:
+            fetch_period = period
+            if period_length(CYCLE_FETCH_PERIOD) > period_length(period):
+                fetch_period = CYCLE_FETCH_PERIOD
+            
+            data = self._load_history(symbol, fetch_period, interval)
+            if data is None or data.empty:
                 print(f"⚠️  No data available for {symbol}")
                 return None
             
-            return data
+            self.cycle_cache.put(cache_key, fetch_period, data)
+            return slice_period(data, period)
             
         except Exception as e:
             print(f"❌ Error fetching data for {symbol}: {e}")
             return None
     
+    def _load_history(self, symbol: str, period: str,
+                      interval: str) -> Optional[pd.DataFrame]:
+        """
+        History from the bar store or the provider, without touching the
+        per-check cache (errors propagate to the caller)
+        """
+        started = time.perf_counter()
+        if self.bar_store is not None:
+            data = self._get_stored_history(symbol, period, interval)
+            source = "store"
+        else:
+            data = self.market_data.history(symbol, period=period, interval=interval)
+            source = "provider"
+        metrics.SYMBOL_DATA_SECONDS.observe(time.perf_counter() - started, source=source)
+        return data
+    
+    def get_quotes(self, symbols: List[str]) -> Dict[str, Optional[float]]:
+        """
+        Latest price per symbol, for rules that need nothing else
+        
+        Symbols whose history was already fetched this check reuse its last
+        close; the rest come from the quote cache.
+        
+        Returns:
+            Dictionary mapping every symbol to its price (None if unavailable)
+        """
+        prices = {}
+        for symbol in symbols:
+            cached = self.cycle_cache.get((symbol, "1d"))
+            if cached is not None:
+                prices[symbol] = float(cached[1]['Close'].iloc[-1])
+        
+        missing = [symbol for symbol in symbols if symbol not in prices]
+        if missing:
+            prices.update(self.quote_cache.get(missing))
+        return prices
+    
+    def _fetch_quotes(self, symbols: List[str]) -> Dict[str, Optional[float]]:
+        """Quote cache refresh - batched latest prices on the fetch pool"""
+        return latest_prices(symbols, getattr(config, "BATCH_DOWNLOAD_SIZE", 50),
+                             pool=self.fetch_pool, provider=self.market_data)
+    
+    def _get_stored_history(self, symbol: str, period: str,
+                            interval: str) -> Optional[pd.DataFrame]:
+        """
+        Serve history from the bar store, downloading only what is missing
+        
+        Cold start downloads the full period once. After that only bars from
+        the last two stored bars onwards are fetched (the last bar is usually
+        still forming, the one before it is compared to spot a new split or
+        dividend) and merged into the store. A changed adjustment re-downloads
+        the full period.
+        """
+        first, last, count = self.bar_store.span(symbol, interval)
+        
+        if self._store_covers(first, count, period):
+            try:
+                recent = self.bar_store.tail(symbol, interval, 2)
+                new_bars = self.market_data.history(symbol, start=recent.index[0].strftime("%Y-%m-%d"),
+                                                    interval=interval)
+                if adjustment_changed(recent, new_bars):
+                    print(f"🔁 {symbol}: split/dividend adjustment changed, re-downloading history")
+                    history = self.market_data.history(symbol, period=period, interval=interval)
+                    self.bar_store.replace(symbol, interval, history)
+                else:
+                    self.bar_store.append(symbol, interval, new_bars)
+            except Exception as e:
+                # Stale bars are better than none - serve what we have
+                print(f"⚠️  {symbol}: incremental update failed, using stored bars ({e})")
+        else:
+            history = self.market_data.history(symbol, period=period, interval=interval)
+            self.bar_store.append(symbol, interval, history)
+        
+        data = self._load_stored(symbol, interval)
+        if data is None:
+            return None
+        
+        return slice_period(data, period)
+    
+    def _load_stored(self, symbol: str, interval: str) -> Optional[pd.DataFrame]:
+        """
+        Stored bars up to the provider's current time (a replay that was
+        moved back in time must not see bars stored after it)
+        """
+        data = self.bar_store.load(symbol, interval)
+        if data is None:
+            return None
+        data = data[data.index <= self.market_data.now()]
+        return data if len(data) else None
+    
+    def _store_covers(self, first: Optional[pd.Timestamp], count: int, period: str) -> bool:
+        """
+        Check whether stored bars reach back far enough for a period
+        """
+        if first is None or period == "max":
+            return False
+        
+        # Day periods count bars rather than calendar days
+        if period.endswith("d") and period[:-1].isdigit():
+            return count >= int(period[:-1])
+        
+        # Measured on the provider's clock (a replay's, not the wall clock's)
+        start = period_start(period, self.market_data.now().tz_convert(first.tz))
+        return first <= start + STORE_START_TOLERANCE
+    
+    def prefetch(self, symbols: List[str], interval: str = "1d") -> None:
+        """
+        Bulk-download history for many symbols into the per-check cache
+        
+        Symbols are requested in chunks of BATCH_DOWNLOAD_SIZE per HTTP call,
+        run concurrently on the fetch pool. Symbols a batch misses are then
+        fetched one by one, also on the pool.
+        
+        Args:
+            symbols: Stock ticker symbols
+            interval: Bar interval (1d, 1h, etc.)
+        """
+        missing = [s for s in dict.fromkeys(symbols) if (s, interval) not in self.cycle_cache]
+        if not missing:
+            return
+        
+        chunk_size = getattr(config, "BATCH_DOWNLOAD_SIZE", 50)
+        
+        if self.bar_store is not None:
+            frames = self._prefetch_stored_history(missing, interval, chunk_size)
+        else:
+            # Misses are retried one by one below, which records what still fails
+            frames = download_batch(missing, chunk_size, pool=self.fetch_pool,
+                                    provider=self.market_data, record_errors=False,
+                                    period=CYCLE_FETCH_PERIOD, interval=interval)
+        
+        for symbol, data in frames.items():
+            self.cycle_cache.put((symbol, interval), CYCLE_FETCH_PERIOD, data)
+        
+        # Single-symbol fallback for whatever the batches missed
+        leftovers = [s for s in missing if s not in frames]
+        if leftovers:
+            # Cached here rather than in the worker, so a request the pool
+            # abandoned can't fill the cache of a later check
+            results = self.fetch_pool.map(lambda symbol: self._fetch_single(symbol, interval), leftovers)
+            for symbol, data in results.items():
+                if data is not None:
+                    self.cycle_cache.put((symbol, interval), CYCLE_FETCH_PERIOD, data)
+    
+    def _fetch_single(self, symbol: str, interval: str) -> pd.DataFrame:
+        """
+        Fetch one symbol on the fetch pool (raises, without printing, so the
+        pool counts and reports the failure once)
+        """
+        data = self._load_history(symbol, CYCLE_FETCH_PERIOD, interval)
+        if data is None or data.empty:
+            raise ValueError("no data returned")
+        return data
+    
+    def _prefetch_stored_history(self, symbols: List[str], interval: str,
+                                 chunk_size: int) -> Dict[str, pd.DataFrame]:
+        """
+        Batched version of _get_stored_history
+        
+        Symbols without enough stored history get the full period. The rest
+        are grouped by the date their update starts from, so a symbol that
+        stopped trading doesn't drag everyone else's download back to its
+        last bar; such symbols are flagged. Symbols whose adjustment changed
+        are re-downloaded in full.
+        """
+        full = []
+        recent = {}
+        groups = {}  # update start date -> symbols
+        stale_before = self.market_data.now().normalize() - pd.offsets.BDay(
+            getattr(config, "BAR_STALE_SESSIONS", 5))
+        for symbol in symbols:
+            first, last, count = self.bar_store.span(symbol, interval)
+            if not self._store_covers(first, count, CYCLE_FETCH_PERIOD):
+                full.append(symbol)
+                continue
+            
+            recent[symbol] = self.bar_store.tail(symbol, interval, 2)
+            groups.setdefault(recent[symbol].index[0].strftime("%Y-%m-%d"), []).append(symbol)
+            if last.tz_convert(stale_before.tz) < stale_before:
+                print(f"⚠️  {symbol}: no new bars since {last:%Y-%m-%d} - delisted or halted?")
+        
+        downloaded = {}
+        if full:
+            downloaded.update(download_batch(full, chunk_size, pool=self.fetch_pool,
+                                             provider=self.market_data, record_errors=False,
+                                             period=CYCLE_FETCH_PERIOD, interval=interval))
+        
+        updates = {}
+        for start, group in sorted(groups.items()):
+            updates.update(download_batch(group, chunk_size, pool=self.fetch_pool,
+                                          provider=self.market_data,
+                                          start=start, interval=interval))
+        
+        readjusted = [symbol for symbol, data in updates.items()
+                      if adjustment_changed(recent[symbol], data)]
+        if readjusted:
+            print(f"🔁 Split/dividend adjustment changed for {', '.join(readjusted)}, "
+                  f"re-downloading history")
+            refreshed = download_batch(readjusted, chunk_size, pool=self.fetch_pool,
+                                       provider=self.market_data,
+                                       period=CYCLE_FETCH_PERIOD, interval=interval)
+            for symbol, data in refreshed.items():
+                self.bar_store.replace(symbol, interval, data)
+        
+        for symbol, data in updates.items():
+            if symbol not in readjusted:
+                downloaded[symbol] = data
+        
+        for symbol, data in downloaded.items():
+            self.bar_store.append(symbol, interval, data)
+        
+        frames = {}
+        for symbol in symbols:
+            # Failed cold-start symbols are left for the single-symbol fallback
+            if symbol not in downloaded and symbol not in recent:
+                continue
+            data = self._load_stored(symbol, interval)
+            if data is not None:
+                frames[symbol] = slice_period(data, CYCLE_FETCH_PERIOD)
+        
+        return frames
+    
     def calculate_sma(self, data: pd.DataFrame, window: int) -> pd.Series:
         """
         Calculate Simple Moving Average
@@ -88,8 +455,33 @@ class TradingRules:
             print(f"❌ Error calculating RSI: {e}")
             return 50  # Return neutral RSI on error
     
+    @metrics.timed(metrics.INDICATOR_SECONDS, indicator="sma")
+    def latest_sma(self, symbol: str, data: pd.DataFrame, window: int) -> float:
+        """
+        Most recent SMA value, updated incrementally between checks
+        
+        Same result as calculate_sma(data, window).iloc[-1].
+        """
+        key = (symbol, "sma", window)
+        if key not in self.indicators:
+            self.indicators[key] = StreamingSMA(window)
+        return self.indicators[key].sync(data['Close'])
+    
+    @metrics.timed(metrics.INDICATOR_SECONDS, indicator="rsi")
+    def latest_rsi(self, symbol: str, data: pd.DataFrame, period: int = 14) -> float:
+        """
+        Most recent RSI value, updated incrementally between checks
+        
+        Same result as calculate_rsi(data, period).
+        """
+        key = (symbol, "rsi", period)
+        if key not in self.indicators:
+            self.indicators[key] = StreamingRSI(period)
+        return self.indicators[key].sync(data['Close'])
+    
+    @timed_rule(RULE_HARD_STOP)
     def check_hard_stop(self, symbol: str, current_price: float, 
-                       avg_cost: float) -> bool:
+                       avg_cost: float, account: str = DEFAULT_ACCOUNT) -> bool:
         """
         Rule 1: Hard stop loss - price ≤ avg_cost × 0.91
         
@@ -102,18 +494,20 @@ class TradingRules:
             loss_percent = ((current_price - avg_cost) / avg_cost) * 100
             
             # Check if we already alerted on this
-            alert_key = f"hard_stop_{symbol}"
-            if alert_key not in self.triggered_alerts:
-                self.alert_system.send_hard_stop_alert(
+            scope = alert_scope(account)
+            if not self.alert_store.has_fired(RULE_HARD_STOP, symbol, scope):
+                self.alert_system_for(account).send_hard_stop_alert(
                     symbol, current_price, avg_cost, abs(loss_percent)
                 )
-                self.triggered_alerts[alert_key] = datetime.now()
+                self.alert_store.record(RULE_HARD_STOP, symbol, scope, price=current_price,
+                                        detail=f"{loss_percent:.1f}%")
                 return True
         
         return False
     
+    @timed_rule(RULE_WARNING)
     def check_warning(self, symbol: str, current_price: float,
-                     avg_cost: float) -> bool:
+                     avg_cost: float, account: str = DEFAULT_ACCOUNT) -> bool:
         """
         Rule 2: Early warning - price ≤ avg_cost × 0.95
         
@@ -127,18 +521,20 @@ class TradingRules:
         if hard_stop_threshold < current_price <= threshold:
             loss_percent = ((current_price - avg_cost) / avg_cost) * 100
             
-            alert_key = f"warning_{symbol}"
-            if alert_key not in self.triggered_alerts:
-                self.alert_system.send_warning_alert(
+            scope = alert_scope(account)
+            if not self.alert_store.has_fired(RULE_WARNING, symbol, scope):
+                self.alert_system_for(account).send_warning_alert(
                     symbol, current_price, avg_cost, abs(loss_percent)
                 )
-                self.triggered_alerts[alert_key] = datetime.now()
+                self.alert_store.record(RULE_WARNING, symbol, scope, price=current_price,
+                                        detail=f"{loss_percent:.1f}%")
                 return True
         
         return False
     
+    @timed_rule(RULE_PROFIT_TARGET)
     def check_profit_target(self, symbol: str, current_price: float,
-                           avg_cost: float) -> bool:
+                           avg_cost: float, account: str = DEFAULT_ACCOUNT) -> bool:
         """
         Rule 3: Profit taking - price ≥ avg_cost × 1.30
         
@@ -150,29 +546,42 @@ class TradingRules:
         if current_price >= threshold:
             gain_percent = ((current_price - avg_cost) / avg_cost) * 100
             
-            alert_key = f"profit_{symbol}"
-            if alert_key not in self.triggered_alerts:
-                self.alert_system.send_profit_alert(
+            scope = alert_scope(account)
+            if not self.alert_store.has_fired(RULE_PROFIT_TARGET, symbol, scope):
+                self.alert_system_for(account).send_profit_alert(
                     symbol, current_price, avg_cost, gain_percent
                 )
-                self.triggered_alerts[alert_key] = datetime.now()
+                self.alert_store.record(RULE_PROFIT_TARGET, symbol, scope, price=current_price,
+                                        detail=f"+{gain_percent:.1f}%")
                 return True
         
         return False
     
-    def check_sma_200_breach(self, symbol: str) -> bool:
+    @staticmethod
+    def sma_200_due(now: Optional[datetime] = None) -> bool:
+        """
+        Whether the 200-day SMA rule runs now (Fridays after 4pm ET) - the
+        only position rule that needs price history
+        """
+        now = now or pd.Timestamp.now(tz=MARKET_TIMEZONE)
+        return now.weekday() == 4 and now.hour >= 16  # 4 = Friday
+    
+    @timed_rule(RULE_SMA200_BREACH)
+    def check_sma_200_breach(self, symbol: str, accounts: Optional[List[str]] = None) -> bool:
         """
         Rule 4: 200-day SMA breach check (Fridays after 4pm ET only)
         
+        Args:
+            symbol: Stock ticker symbol
+            accounts: Accounts holding the symbol, each alerted once (default: main)
+        
         Returns:
             True if alert should be sent
         """
-        # Only check on Fridays after market close
-        now = datetime.now()
-        if now.weekday() != 4:  # 4 = Friday
-            return False
-        
-        if now.hour < 16:  # Before 4pm ET
+        # Only check on Fridays after market close (on the provider's clock,
+        # so a replay follows its recorded days)
+        now = self.market_data.now()
+        if not self.sma_200_due(now):
             return False
         
         # Get historical data
@@ -180,28 +589,31 @@ class TradingRules:
         if data is None:
             return False
         
-        # Calculate 200-day SMA
-        sma_200 = self.calculate_sma(data, 200)
-        
-        if len(sma_200) < 200:
+        if len(data) < 200:
             print(f"⚠️  {symbol}: Not enough data for 200-day SMA")
             return False
         
+        # Calculate 200-day SMA
         current_price = data['Close'].iloc[-1]
-        current_sma_200 = sma_200.iloc[-1]
+        current_sma_200 = self.latest_sma(symbol, data, 200)
         
         # Check if price closed below 200-day SMA
         if current_price < current_sma_200:
-            alert_key = f"sma200_{symbol}_{now.date()}"
-            if alert_key not in self.triggered_alerts:
-                self.alert_system.send_sma_breach_alert(
-                    symbol, current_price, current_sma_200
-                )
-                self.triggered_alerts[alert_key] = datetime.now()
-                return True
+            sent = False
+            for account in accounts or [DEFAULT_ACCOUNT]:
+                scope = ":".join(filter(None, (alert_scope(account), str(now.date()))))
+                if not self.alert_store.has_fired(RULE_SMA200_BREACH, symbol, scope):
+                    self.alert_system_for(account).send_sma_breach_alert(
+                        symbol, current_price, current_sma_200
+                    )
+                    self.alert_store.record(RULE_SMA200_BREACH, symbol, scope, price=current_price,
+                                            detail=f"SMA200 {current_sma_200:.2f}")
+                    sent = True
+            return sent
         
         return False
     
+    @timed_rule(RULE_MOMENTUM_PULLBACK)
     def check_momentum_pullback(self, symbol: str) -> bool:
         """
         Rule 5: Momentum + Pullback buy signal
@@ -225,10 +637,9 @@ class TradingRules:
             return False
         
         # Calculate 50-day SMA
-        sma_50 = self.calculate_sma(data, 50)
-        if len(sma_50) < 50:
+        if len(data) < 50:
             return False
-        current_sma_50 = sma_50.iloc[-1]
+        current_sma_50 = self.latest_sma(symbol, data, 50)
         
         # Check if price > 50-day SMA
         if current_price <= current_sma_50:
@@ -245,20 +656,34 @@ class TradingRules:
             return False
         
         # Calculate RSI
-        rsi = self.calculate_rsi(data, period=14)
+        rsi = self.latest_rsi(symbol, data, period=14)
         
         # Check if RSI < 65
         if rsi >= config.RECOMMENDATION_RSI_MAX:
             return False
         
         # All criteria met - send recommendation
-        alert_key = f"recommend_{symbol}_{datetime.now().date()}"
-        if alert_key not in self.triggered_alerts:
+        return self.send_recommendation_once(
+            symbol, current_price, current_sma_50, high_52w, pullback_percent, rsi
+        )
+    
+    def send_recommendation_once(self, symbol: str, current_price: float,
+                                 sma_50: float, high_52w: float,
+                                 pullback_percent: float, rsi: float) -> bool:
+        """
+        Send a buy recommendation unless one already went out today
+        
+        Returns:
+            True if alert was sent
+        """
+        scope = str(self.market_data.now().date())
+        if not self.alert_store.has_fired(RULE_MOMENTUM_PULLBACK, symbol, scope):
             self.alert_system.send_recommendation(
-                symbol, current_price, current_sma_50, 
+                symbol, current_price, sma_50,
                 high_52w, pullback_percent, rsi
             )
-            self.triggered_alerts[alert_key] = datetime.now()
+            self.alert_store.record(RULE_MOMENTUM_PULLBACK, symbol, scope, price=current_price,
+                                    detail=f"pullback {pullback_percent:.1f}%, RSI {rsi:.1f}")
             return True
         
         return False
@@ -270,32 +695,54 @@ class TradingRules:
         Args:
             holdings: List of portfolio holdings
         """
+        self.evaluate_accounts(PositionIndex({DEFAULT_ACCOUNT: holdings}))
+    
+    def evaluate_accounts(self, positions: PositionIndex) -> None:
+        """
+        Check every account's positions against alert rules
+        
+        Each symbol is fetched once, however many accounts hold it, and its
+        price is checked against each position's own average cost. The price
+        rules only need the latest price, so history is only downloaded when
+        the 200-day SMA rule is due.
+        
+        Args:
+            positions: Index of symbol -> (account, holding)
+        """
         print(f"\n{'='*60}")
         print(f"🔍 CHECKING PORTFOLIO - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"{'='*60}\n")
         
-        for holding in holdings:
-            symbol = holding["symbol"]
-            avg_cost = holding["avg_cost"]
-            
+        # Batched latest prices for every held symbol
+        with metrics.STAGE_SECONDS.time(stage="quotes"):
+            prices = self.get_quotes(positions.symbols)
+        if self.sma_200_due(self.market_data.now()):
+            self.prefetch(positions.symbols)
+        show_accounts = len(positions.accounts) > 1
+        
+        for symbol, symbol_positions in positions:
             print(f"Analyzing {symbol}...")
             
             # Get current price
-            data = self.get_stock_data(symbol, period="3mo")
-            if data is None:
+            current_price = prices.get(symbol)
+            if current_price is None:
+                print(f"⚠️  No price available for {symbol}")
                 continue
             
-            current_price = data['Close'].iloc[-1]
-            pnl_percent = ((current_price - avg_cost) / avg_cost) * 100
+            for account, holding in symbol_positions:
+                avg_cost = holding["avg_cost"]
+                pnl_percent = ((current_price - avg_cost) / avg_cost) * 100
+                
+                print(f"  {account + ': ' if show_accounts else ''}"
+                      f"Current: ${current_price:.2f} | Avg Cost: ${avg_cost:.2f} | "
+                      f"P&L: {'+' if pnl_percent >= 0 else ''}{pnl_percent:.1f}%")
+                
+                # Check all rules
+                self.check_hard_stop(symbol, current_price, avg_cost, account)
+                self.check_warning(symbol, current_price, avg_cost, account)
+                self.check_profit_target(symbol, current_price, avg_cost, account)
             
-            print(f"  Current: ${current_price:.2f} | Avg Cost: ${avg_cost:.2f} | "
-                  f"P&L: {'+' if pnl_percent >= 0 else ''}{pnl_percent:.1f}%")
-            
-            # Check all rules
-            self.check_hard_stop(symbol, current_price, avg_cost)
-            self.check_warning(symbol, current_price, avg_cost)
-            self.check_profit_target(symbol, current_price, avg_cost)
-            self.check_sma_200_breach(symbol)
+            self.check_sma_200_breach(symbol, [account for account, _ in symbol_positions])
         
         print(f"\n{'='*60}")
         print("✅ Portfolio check complete")
@@ -312,14 +759,12 @@ class TradingRules:
         print(f"🔎 SCANNING WATCHLIST FOR BUY SIGNALS")
         print(f"{'='*60}\n")
         
+        # Batched downloads and one vectorized Rule 5 pass per chunk of
+        # SCAN_CHUNK_SIZE symbols, so a long watchlist never holds every
+        # symbol's history at once
         recommendations_found = 0
-        
-        for symbol in watchlist:
-            try:
-                if self.check_momentum_pullback(symbol):
-                    recommendations_found += 1
-            except Exception as e:
-                print(f"⚠️  Error analyzing {symbol}: {e}")
+        for chunk in ScanPipeline(self).run(watchlist):
+            recommendations_found += chunk.alerts
         
         if recommendations_found == 0:
             print("No buy opportunities found at this time.")
@@ -348,17 +793,18 @@ class TradingRules:
         total_value = 0
         total_cost = 0
         
+        prices = self.get_quotes([holding["symbol"] for holding in holdings])
+        
         for holding in holdings:
             symbol = holding["symbol"]
             shares = holding["shares"]
             avg_cost = holding["avg_cost"]
             
             # Get current price
-            data = self.get_stock_data(symbol, period="5d")
-            if data is None:
+            current_price = prices.get(symbol)
+            if current_price is None:
+                print(f"⚠️  No price available for {symbol}")
                 continue
-            
-            current_price = data['Close'].iloc[-1]
             position_value = shares * current_price
             cost_basis = shares * avg_cost
             pnl = position_value - cost_basis
@@ -391,23 +837,41 @@ class TradingRules:
         
         return "\n".join(lines)
     
-    def reset_daily_alerts(self) -> None:
+    def forget_symbols(self, symbols: List[str]) -> None:
         """
-        Reset alerts that should re-trigger daily
-        Call this at market open or once per day
+        Drop in-memory state for symbols that left the portfolio and watchlist
+        
+        Only streaming indicator state is dropped; stored bars and alert
+        history stay on disk.
+        """
+        symbols = set(symbols)
+        for key in [key for key in self.indicators if key[0] in symbols]:
+            del self.indicators[key]
+    
+    def reset_position_alerts(self, symbol: str, account: str = DEFAULT_ACCOUNT) -> int:
         """
-        # Keep hard stops, warnings, and profit alerts
-        # Only clear recommendation alerts older than 1 day
-        one_day_ago = datetime.now() - timedelta(days=1)
+        Let hard stop, warning and profit alerts fire again for an account's
+        position (it was closed or its average cost changed)
         
-        keys_to_remove = []
-        for key, timestamp in self.triggered_alerts.items():
-            if "recommend_" in key and timestamp < one_day_ago:
-                keys_to_remove.append(key)
+        Returns:
+            Number of alerts reset
+        """
+        return sum(
+            self.alert_store.clear(rule=rule, symbol=symbol, scope=alert_scope(account))
+            for rule in (RULE_HARD_STOP, RULE_WARNING, RULE_PROFIT_TARGET)
+        )
+    
+    def reset_daily_alerts(self) -> None:
+        """
+        Expire alerts past their rule's TTL so they can trigger again
+        Call this at market open or once per day
         
-        for key in keys_to_remove:
-            del self.triggered_alerts[key]
+        Hard stops, warnings and profit alerts fire once per position (unless
+        ALERT_POSITION_TTL_DAYS is set); once-a-day alerts (recommendations,
+        SMA breaches) are dropped after their day has passed.
+        """
+        removed = self.alert_store.evict_expired()
         
-        if keys_to_remove:
-            print(f"🔄 Reset {len(keys_to_remove)} old alert(s)")
+        if removed:
+            print(f"🔄 Reset {removed} old alert(s)")
 
@@ -0,0 +1,236 @@
+"""
+Scan Pipeline - Buy Signal Scan Over Large Symbol Universes
+Streams symbols through fetch, indicators and signals one chunk at a time
+"""
+
+import csv
+import re
+import time
+from collections import namedtuple
+from typing import Iterable, Iterator, List, Optional
+import pandas as pd
+import config
+import metrics
+from alert_store import RULE_MOMENTUM_PULLBACK
+from signals import build_close_matrix, momentum_pullback_scan
+from symbols import normalize_symbol
+
+
+# Symbols fetched and scanned together. Peak memory follows this (a year of
+# daily bars per symbol), not the size of the universe.
+DEFAULT_SCAN_CHUNK_SIZE = 250
+
+# Header cells of common listing files (skipped when reading symbols)
+SYMBOL_HEADERS = {"SYMBOL", "TICKER"}
+
+# What a symbol looks like after normalize_symbol (rejects footers like
+# "File Creation Time: ..." in exchange listings)
+SYMBOL_PATTERN = re.compile(r"[A-Z0-9^][A-Z0-9\-=^]*")
+
+# Columns written for each signal by scan_file(out_path=...)
+SIGNAL_COLUMNS = ["symbol", "price", "sma_50", "high_52w", "pullback_percent", "rsi", "alerted"]
+
+# What one chunk produced. `signals` holds the momentum_pullback_scan rows
+# that fired (indexed by symbol) plus an `alerted` column; `missing` lists
+# symbols that returned no data.
+ChunkResult = namedtuple("ChunkResult", ["number", "symbols", "missing", "signals", "alerts", "seconds"])
+
+
+def read_symbols(path: str) -> Iterator[str]:
+    """
+    Symbols from a file, one at a time and without loading the whole file
+
+    One symbol per line, or a delimited listing (",", "|" or tab) with the
+    symbol in the first column, e.g. nasdaqlisted.txt. Blank lines, "#"
+    comments, header rows and duplicates are skipped.
+    """
+    seen = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.lstrip().startswith("#"):
+                continue
+            symbol = normalize_symbol(re.split(r"[,|\t]", line, maxsplit=1)[0])
+            if symbol in SYMBOL_HEADERS or symbol in seen or not SYMBOL_PATTERN.fullmatch(symbol):
+                continue
+            seen.add(symbol)
+            yield symbol
+
+
+def count_symbols(path: str) -> int:
+    """Number of symbols read_symbols() yields (one cheap pass, for progress)"""
+    return sum(1 for _ in read_symbols(path))
+
+
+def iter_chunks(symbols: Iterable[str], chunk_size: int) -> Iterator[List[str]]:
+    """
+    Lists of at most chunk_size symbols from any iterable, consumed lazily
+    (batch_fetch.chunked does the same for a list already in memory)
+    """
+    chunk_size = max(1, int(chunk_size))
+    chunk = []
+    for symbol in symbols:
+        chunk.append(symbol)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ScanPipeline:
+    """
+    Runs Rule 5 (momentum + pullback) over a stream of symbols chunk by chunk
+
+    Each chunk is fetched with the engine's batched prefetch, put through one
+    vectorized momentum_pullback_scan, and its recommendations are sent
+    before the next chunk is read. The chunk's frames are then dropped from
+    the per-check cache (bars stay in the on-disk bar store), so only one
+    chunk of history is ever held in memory.
+    """
+
+    def __init__(self, rules_engine, chunk_size: Optional[int] = None):
+        """
+        Args:
+            rules_engine: TradingRules instance (fetching, alert state, alerts)
+            chunk_size: Symbols per chunk (default: SCAN_CHUNK_SIZE from config)
+        """
+        self.rules_engine = rules_engine
+        self.chunk_size = chunk_size or getattr(config, "SCAN_CHUNK_SIZE", DEFAULT_SCAN_CHUNK_SIZE)
+
+    def run(self, symbols: Iterable[str]) -> Iterator[ChunkResult]:
+        """
+        Scan symbols (a list or a generator such as read_symbols()), yielding
+        each chunk's result as soon as it is done
+        """
+        for number, chunk in enumerate(iter_chunks(symbols, self.chunk_size), 1):
+            yield self.scan_chunk(number, chunk)
+
+    def scan_chunk(self, number: int, symbols: List[str]) -> ChunkResult:
+        """Fetch, scan and alert on one chunk"""
+        started = time.perf_counter()
+        engine = self.rules_engine
+        symbols = list(dict.fromkeys(symbols))
+
+        # Only frames this chunk loads are dropped afterwards - a check that
+        # prefetched the whole universe keeps what its other rules use
+        loaded = [(symbol, "1d") for symbol in symbols if (symbol, "1d") not in engine.cycle_cache]
+        try:
+            engine.prefetch(symbols)
+            frames = {}
+            for symbol in symbols:
+                data = engine.get_stock_data(symbol, period="1y")
+                if data is not None:
+                    frames[symbol] = data
+            missing = [symbol for symbol in symbols if symbol not in frames]
+
+            with metrics.INDICATOR_SECONDS.time(indicator="momentum_pullback_scan"):
+                results = momentum_pullback_scan(
+                    build_close_matrix(frames),
+                    min_price=config.RECOMMENDATION_MIN_PRICE,
+                    pullback_percent=config.RECOMMENDATION_PULLBACK_PERCENT,
+                    rsi_max=config.RECOMMENDATION_RSI_MAX,
+                )
+            del frames
+        finally:
+            engine.cycle_cache.discard(loaded)
+
+        # An empty result (no symbol returned data) has object dtypes, and
+        # results[...] would then select columns instead of rows
+        signals = results.loc[results["signal"].astype(bool)].drop(columns="signal")
+        alerted = []
+        for symbol, row in signals.iterrows():
+            sent = False
+            try:
+                sent = engine.send_recommendation_once(
+                    symbol, row["price"], row["sma_50"], row["high_52w"],
+                    row["pullback_percent"], row["rsi"]
+                )
+                if sent:
+                    metrics.RULE_TRIGGERED.inc(rule=RULE_MOMENTUM_PULLBACK)
+            except Exception as e:
+                print(f"⚠️  Error analyzing {symbol}: {e}")
+            alerted.append(sent)
+        signals = signals.assign(alerted=alerted)
+
+        metrics.SCAN_SYMBOLS.inc(len(symbols))
+        return ChunkResult(number, symbols, missing, signals, sum(alerted),
+                           time.perf_counter() - started)
+
+
+def scan_file(rules_engine, path: str, chunk_size: Optional[int] = None,
+              out_path: Optional[str] = None) -> pd.DataFrame:
+    """
+    Scan every symbol in a file, printing progress after each chunk
+
+    Signals found so far are printed as each chunk finishes and, with
+    out_path, appended to a CSV that is flushed per chunk, so an interrupted
+    scan (Ctrl+C) keeps its partial results. A chunk that fails is reported
+    and skipped.
+
+    Args:
+        rules_engine: TradingRules instance
+        path: Symbol file (see read_symbols)
+        chunk_size: Symbols per chunk (default: SCAN_CHUNK_SIZE from config)
+        out_path: CSV to write signals to (optional)
+
+    Returns:
+        Every signal found, indexed by symbol (the partial set if interrupted)
+    """
+    pipeline = ScanPipeline(rules_engine, chunk_size)
+    total = count_symbols(path)
+    print(f"\n{'='*60}")
+    print(f"🔎 SCANNING {total} SYMBOLS FROM {path} ({pipeline.chunk_size} per chunk)")
+    print(f"{'='*60}\n")
+
+    out = open(out_path, "w", newline="", encoding="utf-8") if out_path else None
+    writer = csv.writer(out) if out else None
+    if writer:
+        writer.writerow(SIGNAL_COLUMNS)
+
+    found = []
+    scanned = missing = failed = alerts = 0
+    started = time.perf_counter()
+    try:
+        for number, symbols in enumerate(iter_chunks(read_symbols(path), pipeline.chunk_size), 1):
+            # One failed chunk (outage, bad data) is reported and skipped,
+            # the rest of the scan carries on
+            try:
+                chunk = pipeline.scan_chunk(number, symbols)
+            except Exception as e:
+                scanned += len(symbols)
+                failed += len(symbols)
+                print(f"❌ Chunk {number}: {scanned}/{total} symbols - failed ({e}), skipping "
+                      f"{len(symbols)} symbol(s)")
+                continue
+
+            scanned += len(chunk.symbols)
+            missing += len(chunk.missing)
+            alerts += chunk.alerts
+            found.append(chunk.signals)
+
+            print(f"📦 Chunk {chunk.number}: {scanned}/{total} symbols ({scanned / max(total, 1):.0%}) "
+                  f"in {chunk.seconds:.1f}s - {len(chunk.signals)} signal(s), "
+                  f"{len(chunk.missing)} without data")
+            for symbol, row in chunk.signals.iterrows():
+                print(f"   💡 {symbol}: ${row['price']:.2f}, {row['pullback_percent']:.1f}% off high, "
+                      f"RSI {row['rsi']:.1f}")
+                if writer:
+                    writer.writerow([symbol] + [row[column] for column in SIGNAL_COLUMNS[1:]])
+            if out:
+                out.flush()
+
+    except KeyboardInterrupt:
+        print(f"\n⏹️  Scan stopped by user after {scanned}/{total} symbols - results so far:")
+
+    finally:
+        if out:
+            out.close()
+
+    signals = pd.concat(found) if found else pd.DataFrame(columns=SIGNAL_COLUMNS[1:])
+    print(f"\n✅ {len(signals)} signal(s) in {scanned} symbols ({missing} without data, "
+          f"{failed} in failed chunks), "
+          f"{alerts} recommendation(s) sent, {time.perf_counter() - started:.1f}s")
+    if out_path:
+        print(f"💾 Signals written to {out_path}")
+    print(f"\n{'='*60}\n")
+    return signals
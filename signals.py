@@ -0,0 +1,152 @@
+"""
+Signal Engine - Vectorized Buy Signal Scan
+Evaluates the momentum + pullback rule for a whole universe at once
+"""
+
+from typing import Dict
+import numpy as np
+import pandas as pd
+
+
+def build_close_matrix(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Lay out closing prices as one aligned dates x symbols matrix
+
+    Args:
+        frames: Dictionary mapping symbol to history DataFrame
+
+    Returns:
+        DataFrame of closes (rows = dates, columns = symbols, NaN where a
+        symbol has no bar)
+    """
+    if not frames:
+        return pd.DataFrame()
+
+    symbols = list(frames)
+    indexes = [frames[symbol].index for symbol in symbols]
+
+    # Fast path: symbols on the same trading calendar stack directly
+    if all(index.equals(indexes[0]) for index in indexes[1:]):
+        values = np.column_stack([frames[symbol]["Close"].to_numpy(dtype=float) for symbol in symbols])
+        return pd.DataFrame(values, index=indexes[0], columns=symbols)
+
+    closes = pd.concat({symbol: frames[symbol]["Close"] for symbol in symbols}, axis=1, sort=True)
+
+    # Rebuild as a single float block - one block per column makes every
+    # vectorized call loop over thousands of columns
+    return pd.DataFrame(closes.to_numpy(dtype=float), index=closes.index, columns=closes.columns)
+
+
+def compact_columns(values: np.ndarray) -> np.ndarray:
+    """
+    Push each column's bars to the bottom, dropping the NaN gaps between them
+
+    Symbols on different calendars (e.g. BTC-USD trades every day) leave
+    NaN rows in each other's columns once aligned on the union of dates.
+    Compacting puts every column's own bars back to back, oldest first, so
+    windows count that symbol's bars as the per-symbol rule does. Columns
+    with fewer bars than rows are NaN-padded at the top.
+    """
+    return np.take_along_axis(values, compact_order(values), axis=0)
+
+
+def compact_order(values: np.ndarray) -> np.ndarray:
+    """
+    Row order, per column, that compact_columns applies - scatter results
+    back with np.put_along_axis(out, order, result, axis=0)
+    """
+    # Stable sort on the mask keeps the bars in date order, NaNs first
+    return np.argsort(~np.isnan(values), axis=0, kind="stable")
+
+
+def trailing_window(values: np.ndarray, rows: np.ndarray, length: int) -> np.ndarray:
+    """
+    Gather the last `length` values ending at each column's row
+
+    Args:
+        values: Dates x symbols array
+        rows: Row position to end at, per column
+        length: Window length
+
+    Returns:
+        length x symbols array (oldest first, NaN where the window runs
+        past the start of the data)
+    """
+    offsets = np.arange(length - 1, -1, -1)[:, None]
+    idx = rows[None, :] - offsets
+    cols = np.arange(values.shape[1])[None, :]
+    window = values[np.clip(idx, 0, None), cols]
+    window[idx < 0] = np.nan
+    return window
+
+
+def momentum_pullback_scan(closes: pd.DataFrame, min_price: float,
+                           pullback_percent: float, rsi_max: float,
+                           sma_window: int = 50, rsi_period: int = 14) -> pd.DataFrame:
+    """
+    Rule 5 (momentum + pullback) for every symbol in one pass
+
+    Criteria (same as TradingRules.check_momentum_pullback):
+    - Price ≥ min_price
+    - Price > 50-day SMA
+    - Pulled back ≥ pullback_percent from the high of the loaded history
+    - RSI(14) < rsi_max
+
+    Metrics are computed on each symbol's own bars (see compact_columns),
+    so the result does not depend on which other symbols share the matrix,
+    and a symbol that has not traded on the most recent date is still
+    evaluated on its last close.
+
+    Args:
+        closes: Dates x symbols close matrix (e.g. from build_close_matrix)
+        min_price: Minimum share price
+        pullback_percent: Minimum pullback from the high, in percent
+        rsi_max: RSI must be below this value
+        sma_window: SMA period (default 50)
+        rsi_period: RSI period (default 14)
+
+    Returns:
+        DataFrame indexed by symbol with price, sma_50, high_52w,
+        pullback_percent, rsi and a boolean signal column
+    """
+    columns = ["price", "sma_50", "high_52w", "pullback_percent", "rsi", "signal"]
+    if closes.empty:
+        return pd.DataFrame(columns=columns)
+
+    values = compact_columns(closes.to_numpy(dtype=float))
+    rows = np.full(values.shape[1], values.shape[0] - 1)
+
+    # Only the latest value of each indicator is needed, so work on the
+    # trailing window of every column instead of full rolling series
+    price = values[-1]
+    has_data = ~np.isnan(price)
+    high = np.where(has_data, np.where(np.isnan(values), -np.inf, values).max(axis=0), np.nan)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # SMA is NaN if the symbol has fewer bars than the window
+        current_sma = trailing_window(values, rows, sma_window).mean(axis=0)
+
+        # RSI - same formula as TradingRules.calculate_rsi
+        delta = np.diff(trailing_window(values, rows, rsi_period + 1), axis=0)
+        gain = np.where(delta > 0, delta, 0).mean(axis=0)
+        loss = np.where(delta < 0, -delta, 0).mean(axis=0)
+        current_rsi = 100 - (100 / (1 + gain / loss))
+
+        pullback = (high - price) / high * 100
+
+        # A flat window gives NaN RSI, which the per-symbol rule lets through
+        signal = (
+            (price >= min_price)
+            & (price > current_sma)
+            & (pullback >= pullback_percent)
+            & ~(current_rsi >= rsi_max)
+        )
+
+    return pd.DataFrame({
+        "price": price,
+        "sma_50": current_sma,
+        "high_52w": high,
+        "pullback_percent": pullback,
+        "rsi": current_rsi,
+        "signal": signal,
+    }, index=closes.columns)
@@ -66,86 +66,158 @@ async function deleteHolding(symbol) {
     }
 }
 
-async function loadHoldings() {
-    try {
-        const response = await fetch('/api/holdings');
-        const holdings = await response.json();
-        
-        const tbody = document.getElementById('holdings-body');
-        let totalCostBasis = 0;
-        let totalCurrentValue = 0;
-        
-        tbody.innerHTML = holdings.map(h => {
-            const costBasis = h.shares * h.avg_cost;
-            totalCostBasis += costBasis;
-            
-            if (h.current_price !== null && h.current_price !== undefined) {
-                const currentValue = h.current_value || (h.shares * h.current_price);
-                totalCurrentValue += currentValue;
-                
-                const pnl = h.pnl || (currentValue - costBasis);
-                const pnlPercent = h.pnl_percent || ((h.current_price - h.avg_cost) / h.avg_cost * 100);
-                
-                const pnlClass = pnl >= 0 ? 'positive' : 'negative';
-                const pnlSign = pnl >= 0 ? '+' : '';
-                
-                return `
-                    <tr data-symbol="${h.symbol}">
-                        <td><strong>${h.symbol}</strong></td>
-                        <td>${parseFloat(h.shares).toFixed(3)}</td>
-                        <td>$${parseFloat(h.avg_cost).toFixed(2)}</td>
-                        <td class="current-price">$${parseFloat(h.current_price).toFixed(2)}</td>
-                        <td class="current-value">$${currentValue.toFixed(2)}</td>
-                        <td class="pnl ${pnlClass}">${pnlSign}$${Math.abs(pnl).toFixed(2)}</td>
-                        <td class="pnl-percent ${pnlClass}">${pnlSign}${Math.abs(pnlPercent).toFixed(2)}%</td>
-                        <td>
-                            <button class="btn-danger btn-sm" onclick="deleteHolding('${h.symbol}')">Delete</button>
-                        </td>
-                    </tr>
-                `;
-            } else {
-                return `
-                    <tr data-symbol="${h.symbol}">
-                        <td><strong>${h.symbol}</strong></td>
-                        <td>${parseFloat(h.shares).toFixed(3)}</td>
-                        <td>$${parseFloat(h.avg_cost).toFixed(2)}</td>
-                        <td class="current-price">N/A</td>
-                        <td class="current-value">-</td>
-                        <td class="pnl">-</td>
-                        <td class="pnl-percent">-</td>
-                        <td>
-                            <button class="btn-danger btn-sm" onclick="deleteHolding('${h.symbol}')">Delete</button>
-                        </td>
-                    </tr>
-                `;
-            }
-        }).join('');
+// Latest row per symbol (shared by polling and the live stream)
+let holdingsRows = new Map();
+
+function holdingRowHtml(h) {
+    if (h.current_price !== null && h.current_price !== undefined) {
+        const costBasis = h.shares * h.avg_cost;
+        const currentValue = h.current_value || (h.shares * h.current_price);
+        const pnl = h.pnl || (currentValue - costBasis);
+        const pnlPercent = h.pnl_percent || ((h.current_price - h.avg_cost) / h.avg_cost * 100);
         
-        // Update portfolio totals
-        const totalPnl = totalCurrentValue - totalCostBasis;
-        const totalPnlPercent = totalCostBasis > 0 ? (totalPnl / totalCostBasis * 100) : 0;
-        const totalPnlClass = totalPnl >= 0 ? 'positive' : 'negative';
-        const totalPnlSign = totalPnl >= 0 ? '+' : '';
+        const pnlClass = pnl >= 0 ? 'positive' : 'negative';
+        const pnlSign = pnl >= 0 ? '+' : '';
         
-        document.getElementById('total-current-value').innerHTML = 
-            `<strong>$${totalCurrentValue.toFixed(2)}</strong>`;
-        document.getElementById('total-pnl').innerHTML = 
-            `<strong class="${totalPnlClass}">${totalPnlSign}$${Math.abs(totalPnl).toFixed(2)}</strong>`;
-        document.getElementById('total-pnl-pct').innerHTML = 
-            `<strong class="${totalPnlClass}">${totalPnlSign}${Math.abs(totalPnlPercent).toFixed(2)}%</strong>`;
+        return `
+            <tr data-symbol="${h.symbol}">
+                <td><strong>${h.symbol}</strong></td>
+                <td>${parseFloat(h.shares).toFixed(3)}</td>
+                <td>$${parseFloat(h.avg_cost).toFixed(2)}</td>
+                <td class="current-price">$${parseFloat(h.current_price).toFixed(2)}</td>
+                <td class="current-value">$${currentValue.toFixed(2)}</td>
+                <td class="pnl ${pnlClass}">${pnlSign}$${Math.abs(pnl).toFixed(2)}</td>
+                <td class="pnl-percent ${pnlClass}">${pnlSign}${Math.abs(pnlPercent).toFixed(2)}%</td>
+                <td>
+                    <button class="btn-danger btn-sm" onclick="deleteHolding('${h.symbol}')">Delete</button>
+                </td>
+            </tr>
+        `;
+    }
+    
+    return `
+        <tr data-symbol="${h.symbol}">
+            <td><strong>${h.symbol}</strong></td>
+            <td>${parseFloat(h.shares).toFixed(3)}</td>
+            <td>$${parseFloat(h.avg_cost).toFixed(2)}</td>
+            <td class="current-price">N/A</td>
+            <td class="current-value">-</td>
+            <td class="pnl">-</td>
+            <td class="pnl-percent">-</td>
+            <td>
+                <button class="btn-danger btn-sm" onclick="deleteHolding('${h.symbol}')">Delete</button>
+            </td>
+        </tr>
+    `;
+}
+
+function updateTotals() {
+    let totalCostBasis = 0;
+    let totalCurrentValue = 0;
+    
+    holdingsRows.forEach(h => {
+        totalCostBasis += h.shares * h.avg_cost;
+        if (h.current_price !== null && h.current_price !== undefined) {
+            totalCurrentValue += h.current_value || (h.shares * h.current_price);
+        }
+    });
+    
+    const totalPnl = totalCurrentValue - totalCostBasis;
+    const totalPnlPercent = totalCostBasis > 0 ? (totalPnl / totalCostBasis * 100) : 0;
+    const totalPnlClass = totalPnl >= 0 ? 'positive' : 'negative';
+    const totalPnlSign = totalPnl >= 0 ? '+' : '';
+    
+    document.getElementById('total-current-value').innerHTML = 
+        `<strong>$${totalCurrentValue.toFixed(2)}</strong>`;
+    document.getElementById('total-pnl').innerHTML = 
+        `<strong class="${totalPnlClass}">${totalPnlSign}$${Math.abs(totalPnl).toFixed(2)}</strong>`;
+    document.getElementById('total-pnl-pct').innerHTML = 
+        `<strong class="${totalPnlClass}">${totalPnlSign}${Math.abs(totalPnlPercent).toFixed(2)}%</strong>`;
+    
+    // Update last refresh time
+    document.getElementById('last-update-time').textContent = new Date().toLocaleTimeString();
+}
+
+// Replace the whole table
+function renderHoldings(holdings) {
+    holdingsRows = new Map(holdings.map(h => [h.symbol, h]));
+    document.getElementById('holdings-body').innerHTML = holdings.map(holdingRowHtml).join('');
+    updateTotals();
+}
+
+// Patch only the rows in a stream update
+function applyHoldingsUpdate(update) {
+    const tbody = document.getElementById('holdings-body');
+    const rowFor = symbol => tbody.querySelector(`tr[data-symbol="${symbol}"]`);
+    let added = false;
+    
+    update.removed.forEach(symbol => {
+        holdingsRows.delete(symbol);
+        const row = rowFor(symbol);
+        if (row) row.remove();
+    });
+    
+    update.changed.forEach(h => {
+        holdingsRows.set(h.symbol, h);
         
-        // Update last refresh time
-        document.getElementById('last-update-time').textContent = new Date().toLocaleTimeString();
+        const template = document.createElement('tbody');
+        template.innerHTML = holdingRowHtml(h).trim();
+        const row = template.firstElementChild;
+        row.classList.add('row-updated');
         
+        const existing = rowFor(h.symbol);
+        if (existing) {
+            existing.replaceWith(row);
+        } else {
+            tbody.appendChild(row);
+            added = true;
+        }
+    });
+    
+    // New positions go where they are in the portfolio
+    if (added) {
+        update.order.forEach(symbol => {
+            const row = rowFor(symbol);
+            if (row) tbody.appendChild(row);
+        });
+    }
+    
+    updateTotals();
+}
+
+async function loadHoldings() {
+    try {
+        const response = await fetch('/api/holdings');
+        renderHoldings(await response.json());
     } catch (error) {
         showToast('❌ Error loading holdings: ' + error.message, true);
     }
 }
 
-// Auto-refresh prices every 30 seconds
+// Live prices: server-sent events, or polling every 30 seconds without EventSource
 let refreshInterval;
+let priceStream;
+
+function setRefreshStatus(live) {
+    const status = document.getElementById('refresh-status');
+    if (!status) return;
+    status.textContent = live ? '● Live' : '● Reconnecting...';
+    status.style.color = live ? '#16a34a' : '#f59e0b';
+}
 
 function startAutoRefresh() {
+    stopAutoRefresh();
+    
+    if (window.EventSource) {
+        // The server sends every row first, then only positions that changed
+        priceStream = new EventSource('/api/stream');
+        priceStream.addEventListener('snapshot', event => renderHoldings(JSON.parse(event.data).rows));
+        priceStream.addEventListener('update', event => applyHoldingsUpdate(JSON.parse(event.data)));
+        priceStream.onopen = () => setRefreshStatus(true);
+        priceStream.onerror = () => setRefreshStatus(false);  // EventSource reconnects by itself
+        return;
+    }
+    
     // Load immediately
     loadHoldings();
     
@@ -153,6 +225,17 @@ function startAutoRefresh() {
     refreshInterval = setInterval(loadHoldings, 30000);
 }
 
+function stopAutoRefresh() {
+    if (priceStream) {
+        priceStream.close();
+        priceStream = null;
+    }
+    if (refreshInterval) {
+        clearInterval(refreshInterval);
+        refreshInterval = null;
+    }
+}
+
 function refreshPrices() {
     loadHoldings();
     showToast('🔄 Prices refreshed!');
@@ -181,9 +264,7 @@ function showTab(tabName) {
         startAutoRefresh();
     } else {
         // Stop auto-refresh for other tabs
-        if (refreshInterval) {
-            clearInterval(refreshInterval);
-        }
+        stopAutoRefresh();
     }
 }
 
@@ -0,0 +1,425 @@
+"""
+Parameter Sweep - Search Rule Thresholds Over Historical Data
+Scores many threshold combinations in parallel on shared, read-only price arrays
+"""
+
+import itertools
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+import backtest
+from signals import compact_order
+
+
+# Default grid - current config values sit in the middle of each range
+DEFAULT_GRID = {
+    "hard_stop": [0.85, 0.88, 0.91, 0.93],
+    "warning": [0.93, 0.95, 0.97],
+    "profit_target": [1.20, 1.30, 1.40, 1.50],
+    "pullback_percent": [5, 8, 10, 12, 15],
+    "rsi_max": [55, 60, 65, 70],
+}
+
+# Random sampling ranges: (low, high, step)
+RANDOM_RANGES = {
+    "hard_stop": (0.80, 0.95, 0.01),
+    "warning": (0.90, 0.99, 0.01),
+    "profit_target": (1.10, 1.60, 0.05),
+    "pullback_percent": (3.0, 20.0, 0.5),
+    "rsi_max": (45, 80, 1),
+}
+
+# Buy thresholds decide the entries; sell thresholds only re-read the paths
+BUY_PARAMS = ("pullback_percent", "rsi_max", "min_price")
+SELL_PARAMS = ("hard_stop", "warning", "profit_target")
+
+# Alerts meant to get you out before a drawdown
+PROTECTIVE_RULES = ("hard_stop", "warning", "sma200_breach")
+
+# Arrays workers read from shared memory
+SHARED_ARRAYS = ("close", "sma_50", "high_52w", "rsi", "sma200_breach", "forward_return")
+
+
+# =============================================================================
+# PARAMETER SETS
+# =============================================================================
+
+def grid_combinations(grid: Optional[Dict[str, List[float]]] = None,
+                      base: Optional[Dict[str, float]] = None) -> List[Dict[str, float]]:
+    """
+    Every combination of the grid values
+
+    Combinations where the warning level is not above the hard stop are
+    skipped (the warning band would be empty).
+
+    Args:
+        grid: Parameter name -> values (default DEFAULT_GRID)
+        base: Values for parameters not in the grid (default from config)
+
+    Returns:
+        List of parameter dictionaries
+    """
+    grid = grid or DEFAULT_GRID
+    base = base or backtest.params_from_config()
+    names = list(grid)
+
+    combos = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        params = dict(base, **dict(zip(names, values)))
+        if params["warning"] > params["hard_stop"]:
+            combos.append(params)
+    return combos
+
+
+def random_combinations(count: int, seed: Optional[int] = None,
+                        base: Optional[Dict[str, float]] = None) -> List[Dict[str, float]]:
+    """
+    Random sample of distinct parameter sets from RANDOM_RANGES
+
+    Values are snapped to each range's step, so many samples share buy
+    thresholds and can reuse the same entries.
+
+    Args:
+        count: Number of parameter sets
+        seed: Random seed (for repeatable sweeps)
+        base: Values for parameters not sampled (default from config)
+
+    Returns:
+        List of parameter dictionaries
+    """
+    rng = random.Random(seed)
+    base = base or backtest.params_from_config()
+    seen = set()
+    combos = []
+
+    # Bounded so a small search space can't loop forever
+    for _ in range(count * 20):
+        if len(combos) >= count:
+            break
+        params = dict(base)
+        for name, (low, high, step) in RANDOM_RANGES.items():
+            steps = int(round((high - low) / step))
+            params[name] = round(low + rng.randint(0, steps) * step, 4)
+
+        key = tuple(params[name] for name in RANDOM_RANGES)
+        if params["warning"] > params["hard_stop"] and key not in seen:
+            seen.add(key)
+            combos.append(params)
+
+    return combos
+
+
+# =============================================================================
+# SHARED ARRAYS
+# =============================================================================
+
+class SharedArrays:
+    """
+    Numpy arrays copied once into shared memory
+
+    Worker processes attach to the blocks by name instead of receiving a
+    pickled copy of the price history with every task.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.blocks = []
+        self.specs = {}
+
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            self.specs[name] = (block.name, array.shape, array.dtype.str)
+
+    def close(self) -> None:
+        """Release the shared memory (call once all workers are done)"""
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+# Per-worker state set up by _attach_worker
+_worker_arrays: Dict[str, np.ndarray] = {}
+_worker_blocks: List[shared_memory.SharedMemory] = []
+
+
+def _attach_worker(specs: Dict[str, Tuple[str, tuple, str]]) -> None:
+    """Process pool initializer - map the shared arrays read-only"""
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        array.flags.writeable = False
+        _worker_blocks.append(block)
+        _worker_arrays[name] = array
+
+
+# =============================================================================
+# SCORING
+# =============================================================================
+
+def _evaluate(buy: Dict[str, float], sells: List[Dict[str, float]],
+              max_hold: int) -> List[Dict]:
+    """
+    Score sell threshold sets that share the same buy thresholds
+
+    Runs in a worker process. Buy signals, entries and position paths are
+    computed once and reused for every sell threshold set.
+
+    Returns:
+        One result row per sell threshold set
+    """
+    ind = _worker_arrays
+    forward = ind["forward_return"]
+
+    signals = backtest.buy_signals(ind, buy)
+    signal_returns = forward[signals]
+    signal_returns = signal_returns[~np.isnan(signal_returns)]
+    entry_rows, entry_cols = backtest.entry_points(signals)
+
+    # rule -> [alerts, scored alerts, hits, sum of forward returns], per sell set
+    totals = [{rule: [0, 0, 0, 0.0] for rule in backtest.SELL_RULES} for _ in sells]
+
+    for start in range(0, len(entry_rows), backtest.ENTRY_BLOCK_SIZE):
+        rows = entry_rows[start:start + backtest.ENTRY_BLOCK_SIZE]
+        cols = entry_cols[start:start + backtest.ENTRY_BLOCK_SIZE]
+        paths = backtest.position_paths(ind, rows, cols, max_hold)
+
+        for total, sell in zip(totals, sells):
+            fired = backtest.position_alerts(paths, rows, sell)
+            for rule, alert_rows in fired.items():
+                hit = alert_rows >= 0
+                returns = forward[alert_rows[hit], cols[hit]]
+                returns = returns[~np.isnan(returns)]
+                counts = total[rule]
+                counts[0] += int(hit.sum())
+                counts[1] += len(returns)
+                counts[2] += int((returns < 0).sum())
+                counts[3] += float(returns.sum())
+
+    buy_scored = len(signal_returns)
+    buy_hits = int((signal_returns > 0).sum())
+
+    results = []
+    for total, sell in zip(totals, sells):
+        sell_scored = sum(total[rule][1] for rule in backtest.SELL_RULES)
+        sell_hits = sum(total[rule][2] for rule in backtest.SELL_RULES)
+        protective_scored = sum(total[rule][1] for rule in PROTECTIVE_RULES)
+        protective_sum = sum(total[rule][3] for rule in PROTECTIVE_RULES)
+        scored = buy_scored + sell_scored
+
+        row = {name: buy.get(name, sell.get(name)) for name in SELL_PARAMS + BUY_PARAMS}
+        row.update({
+            "signals": int(signals.sum()),
+            "positions": len(entry_rows),
+            "hard_stops": total["hard_stop"][0],
+            "warnings": total["warning"][0],
+            "profit_targets": total["profit_target"][0],
+            "sma200_breaches": total["sma200_breach"][0],
+            "scored_alerts": scored,
+            "buy_hit_rate": buy_hits / buy_scored * 100 if buy_scored else np.nan,
+            "sell_hit_rate": sell_hits / sell_scored * 100 if sell_scored else np.nan,
+            "hit_rate": (buy_hits + sell_hits) / scored * 100 if scored else np.nan,
+            "drawdown_avoided": (-protective_sum / protective_scored * 100
+                                 if protective_scored else np.nan),
+        })
+        results.append(row)
+
+    return results
+
+
+def _make_tasks(combos: List[Dict[str, float]], workers: int) -> List[Tuple[Dict, List[Dict]]]:
+    """
+    Group combinations by buy thresholds, splitting big groups so every
+    worker stays busy
+    """
+    groups: Dict[tuple, List[Dict]] = {}
+    for params in combos:
+        key = tuple(params[name] for name in BUY_PARAMS)
+        groups.setdefault(key, []).append(params)
+
+    # Aim for a few tasks per worker, but never split below one sell set
+    target_tasks = workers * 4
+    chunk = max(1, len(combos) // target_tasks)
+
+    tasks = []
+    for group in groups.values():
+        buy = {name: group[0][name] for name in BUY_PARAMS}
+        sells = [{name: params[name] for name in SELL_PARAMS} for params in group]
+        for start in range(0, len(sells), chunk):
+            tasks.append((buy, sells[start:start + chunk]))
+
+    # Biggest tasks first so the pool doesn't end on a long straggler
+    tasks.sort(key=lambda task: len(task[1]), reverse=True)
+    return tasks
+
+
+def rank_results(results: pd.DataFrame, min_alerts: int = 30) -> pd.DataFrame:
+    """
+    Rank combinations by hit rate and drawdown avoided
+
+    Each combination's rank on the two metrics is summed; ties go to the
+    higher hit rate. Combinations with fewer than min_alerts scored alerts
+    are ranked after all others (too few alerts to trust).
+
+    Args:
+        results: Sweep results
+        min_alerts: Minimum scored alerts for a combination to rank normally
+
+    Returns:
+        Results sorted best first, with a 1-based rank column
+    """
+    if results.empty:
+        return results
+
+    results = results.copy()
+    enough = results["scored_alerts"] >= min_alerts
+    score = (results["hit_rate"].rank(ascending=False, na_option="bottom")
+             + results["drawdown_avoided"].rank(ascending=False, na_option="bottom"))
+
+    results["_enough"] = enough
+    results["_score"] = score
+    results = results.sort_values(["_enough", "_score", "hit_rate"],
+                                  ascending=[False, True, False], ignore_index=True)
+    results.insert(0, "rank", np.arange(1, len(results) + 1))
+    return results.drop(columns=["_enough", "_score"])
+
+
+def run_sweep(closes: pd.DataFrame, combos: List[Dict[str, float]], horizon: int = 20,
+              max_hold: int = backtest.BARS_PER_YEAR, workers: Optional[int] = None,
+              min_alerts: int = 30) -> pd.DataFrame:
+    """
+    Score every parameter combination over the same history
+
+    Indicators are computed once in this process and shared with the
+    workers through shared memory, so adding workers adds throughput
+    without copying the price history per process.
+
+    Args:
+        closes: Dates x symbols close matrix
+        combos: Parameter dictionaries (see grid_combinations / random_combinations)
+        horizon: Forward return horizon (bars) used to score alerts
+        max_hold: Maximum bars to follow a position
+        workers: Worker processes (default: all cores)
+        min_alerts: See rank_results
+
+    Returns:
+        Ranked results, one row per combination
+    """
+    if horizon < 1:
+        raise ValueError(f"horizon must be at least 1 bar, got {horizon}")
+    workers = workers or os.cpu_count() or 1
+
+    ind = backtest.compute_indicators(closes)
+    # `horizon` of the symbol's own bars ahead, not rows of the shared dates
+    close = ind["close"]
+    order = compact_order(close)
+    compact = np.take_along_axis(close, order, axis=0)
+    later_compact = np.full_like(compact, np.nan)
+    later_compact[:-horizon] = compact[horizon:]
+    later = np.empty_like(close)
+    np.put_along_axis(later, order, later_compact, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ind["forward_return"] = later / close - 1
+
+    shared = SharedArrays({name: ind[name] for name in SHARED_ARRAYS})
+    tasks = _make_tasks(combos, workers)
+    rows = []
+
+    print(f"🧮 Sweeping {len(combos)} combinations ({len(tasks)} tasks) "
+          f"on {workers} worker(s)...")
+    started = time.perf_counter()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_worker,
+                                 initargs=(shared.specs,)) as pool:
+            futures = [pool.submit(_evaluate, buy, sells, max_hold) for buy, sells in tasks]
+            report_every = max(1, len(futures) // 10)
+
+            for done, future in enumerate(as_completed(futures), start=1):
+                rows.extend(future.result())
+                if done % report_every == 0 or done == len(futures):
+                    elapsed = time.perf_counter() - started
+                    print(f"   {len(rows)}/{len(combos)} combinations ({elapsed:.1f}s)")
+    finally:
+        shared.close()
+
+    return rank_results(pd.DataFrame(rows), min_alerts)
+
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def _option(argv: List[str], name: str, default=None):
+    """Value following a --name flag, or default"""
+    if name in argv:
+        return argv[argv.index(name) + 1]
+    return default
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Usage:
+        python sweep.py prices.csv [options]
+        python sweep.py --store market_data.db [options]
+
+    Options:
+        --random N      Sample N random combinations instead of the grid
+        --seed S        Random seed
+        --workers N     Worker processes (default: all cores)
+        --horizon N     Forward return horizon in bars (default 20)
+        --top N         Rows to print (default 20)
+        --out FILE      Write all ranked results to a CSV file
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(main.__doc__)
+        return
+
+    horizon = int(_option(argv, "--horizon", 20))
+    if horizon < 1:
+        print(f"❌ --horizon must be at least 1 bar (got {horizon})")
+        return
+
+    if argv[0] == "--store":
+        closes = backtest.load_closes_from_store(argv[1])
+    else:
+        closes = backtest.load_closes(argv[0])
+
+    count = _option(argv, "--random")
+    seed = _option(argv, "--seed")
+    if count:
+        combos = random_combinations(int(count), seed=int(seed) if seed else None)
+    else:
+        combos = grid_combinations()
+
+    workers = _option(argv, "--workers")
+    top = int(_option(argv, "--top", 20))
+    out_path = _option(argv, "--out")
+
+    print(f"\n📼 {closes.shape[1]} symbols x {closes.shape[0]} bars "
+          f"({closes.index[0].date()} → {closes.index[-1].date()})")
+    started = time.perf_counter()
+    results = run_sweep(closes, combos, horizon=horizon,
+                        workers=int(workers) if workers else None)
+    print(f"⏱️  {len(results)} combinations in {time.perf_counter() - started:.1f}s\n")
+
+    columns = ["rank", *SELL_PARAMS, "pullback_percent", "rsi_max", "scored_alerts",
+               "buy_hit_rate", "sell_hit_rate", "hit_rate", "drawdown_avoided"]
+    print(results[columns].head(top).round(2).to_string(index=False))
+
+    if out_path:
+        results.to_csv(out_path, index=False)
+        print(f"\n💾 Results written to {os.path.abspath(out_path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Symbol Registry - One Deduplicated Universe of Tickers
+Merges holdings and watchlist so every symbol is fetched and scanned once
+"""
+
+from typing import Dict, Iterator, List, Set
+
+
+# Roles a symbol can play in the universe
+ROLE_HOLDING = "holding"
+ROLE_WATCHLIST = "watchlist"
+
+
+def normalize_symbol(symbol: str) -> str:
+    """
+    Normalize a ticker to the form Yahoo Finance expects
+
+    Uppercases, strips whitespace and uses "-" for share classes
+    (BRK.B -> BRK-B).
+    """
+    return symbol.strip().upper().replace(".", "-")
+
+
+class SymbolUniverse:
+    """
+    Ordered, deduplicated set of symbols tagged with the roles they play
+
+    Holdings come first, then watchlist symbols in the order they were
+    listed. Each symbol has a stable integer index, so per-symbol arrays
+    (e.g. columns of a close matrix) can be addressed by position.
+    """
+
+    def __init__(self, holdings: List[Dict], watchlist: List[str]):
+        """
+        Build the universe
+
+        Args:
+            holdings: List of portfolio holdings (dicts with a "symbol" key)
+            watchlist: List of ticker symbols to scan
+        """
+        self.symbols: List[str] = []
+        self.roles: Dict[str, Set[str]] = {}
+        self._index: Dict[str, int] = {}
+        self.duplicates: Dict[str, int] = {}  # symbol -> extra occurrences dropped
+
+        for holding in holdings:
+            self._add(holding["symbol"], ROLE_HOLDING)
+        for symbol in watchlist:
+            self._add(symbol, ROLE_WATCHLIST)
+
+    def _add(self, raw_symbol: str, role: str) -> None:
+        """Add a symbol, or just tag it with another role if already present"""
+        symbol = normalize_symbol(raw_symbol)
+        if not symbol:
+            return
+
+        if symbol in self._index:
+            if role in self.roles[symbol]:
+                self.duplicates[symbol] = self.duplicates.get(symbol, 0) + 1
+            self.roles[symbol].add(role)
+            return
+
+        self._index[symbol] = len(self.symbols)
+        self.symbols.append(symbol)
+        self.roles[symbol] = {role}
+
+    def with_role(self, role: str) -> List[str]:
+        """
+        Unique symbols that play a role, in universe order
+
+        Args:
+            role: ROLE_HOLDING or ROLE_WATCHLIST
+        """
+        return [symbol for symbol in self.symbols if role in self.roles[symbol]]
+
+    def index_of(self, symbol: str) -> int:
+        """Position of a symbol in the universe (raises KeyError if absent)"""
+        return self._index[normalize_symbol(symbol)]
+
+    def describe(self) -> str:
+        """One-line summary for logs"""
+        dropped = sum(self.duplicates.values())
+        overlap = sum(1 for roles in self.roles.values() if len(roles) > 1)
+        return (f"{len(self.symbols)} unique symbols "
+                f"({len(self.with_role(ROLE_HOLDING))} held, "
+                f"{len(self.with_role(ROLE_WATCHLIST))} watched, "
+                f"{overlap} both, {dropped} duplicate(s) dropped)")
+
+    def __getitem__(self, index: int) -> str:
+        return self.symbols[index]
+
+    def __contains__(self, symbol: str) -> bool:
+        return normalize_symbol(symbol) in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.symbols)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
@@ -0,0 +1,31 @@
+"""
+Backtest indicators on files that mix trading calendars
+"""
+
+import numpy as np
+import pandas as pd
+from backtest import compute_indicators
+
+
+def closes_for(index: pd.DatetimeIndex, seed: int) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    return pd.Series(100 * np.exp(np.cumsum(rng.normal(0.001, 0.02, len(index)))), index=index)
+
+
+def test_indicators_use_each_symbols_own_bars():
+    end = pd.Timestamp("2026-06-30", tz="America/New_York")
+    stock = closes_for(pd.bdate_range(end=end, periods=430), 1)
+    crypto = closes_for(pd.date_range(end=end, periods=600), 2)
+
+    alone = compute_indicators(stock.to_frame("AAA"))
+    mixed_closes = pd.concat({"AAA": stock, "BTC-USD": crypto}, axis=1, sort=True)
+    mixed = compute_indicators(mixed_closes)
+
+    rows = mixed_closes.index.get_indexer(stock.index)
+    for name in ("close", "sma_50", "high_52w", "rsi", "sma200_breach"):
+        np.testing.assert_array_equal(mixed[name][rows, 0], alone[name][:, 0], err_msg=name)
+    assert np.isfinite(mixed["sma_50"][rows, 0]).sum() == len(stock) - 49
+
+    # No bar, no indicator
+    gaps = mixed_closes["AAA"].isna().to_numpy()
+    assert np.isnan(mixed["sma_50"][gaps, 0]).all()
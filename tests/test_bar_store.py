@@ -0,0 +1,41 @@
+"""
+Bar store adjustment checks
+"""
+
+import pandas as pd
+from bar_store import BarStore, adjustment_changed
+
+
+def bars(closes, start="2026-06-25", dividends=None):
+    index = pd.bdate_range(start, periods=len(closes), tz="America/New_York")
+    return pd.DataFrame({"Close": closes, "Dividends": dividends or [0.0] * len(closes),
+                         "Stock Splits": 0.0}, index=index)
+
+
+def test_unchanged_overlap_and_forming_bar():
+    stored = bars([100.0, 101.0])
+    # The last stored bar was still forming - its close may move
+    assert not adjustment_changed(stored, bars([100.0, 103.0, 104.0]))
+
+
+def test_completed_bar_moved():
+    stored = bars([100.0, 101.0])
+    assert adjustment_changed(stored, bars([50.0, 50.5, 51.0]))
+
+
+def test_new_dividend_only_once():
+    stored = bars([100.0, 101.0])
+    fresh = bars([100.0, 101.0, 99.0], dividends=[0.0, 0.0, 0.5])
+    assert adjustment_changed(stored, fresh)
+
+    # Once stored with the refreshed history it no longer counts as new
+    assert not adjustment_changed(fresh.tail(2), fresh.tail(2))
+
+
+def test_replace_drops_old_bars(tmp_path):
+    store = BarStore(str(tmp_path / "bars.db"))
+    store.append("AAA", "1d", bars([100.0, 101.0, 102.0]))
+    store.replace("AAA", "1d", bars([50.0, 51.0], start="2026-06-26"))
+    assert store.load("AAA", "1d")["Close"].tolist() == [50.0, 51.0]
+    assert store.tail("AAA", "1d", 1)["Close"].tolist() == [51.0]
+    store.close()
@@ -0,0 +1,81 @@
+"""
+Vectorized momentum + pullback scan vs the per-symbol rule
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import config
+from rules import TradingRules
+from signals import build_close_matrix, momentum_pullback_scan
+
+
+def make_frame(index: pd.DatetimeIndex, seed: int, drift: float) -> pd.DataFrame:
+    """Random-walk closes ending in a pullback"""
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(drift, 0.015, len(index))
+    steps[-8:] = rng.normal(-0.012, 0.01, 8)
+    close = 100 * np.exp(np.cumsum(steps))
+    return pd.DataFrame({"Open": close, "High": close, "Low": close,
+                         "Close": close, "Volume": 1000}, index=index)
+
+
+@pytest.fixture
+def frames():
+    """Stocks on the exchange calendar plus a symbol that trades every day"""
+    end = pd.Timestamp("2026-06-30", tz="America/New_York")
+    weekdays = pd.bdate_range(end=end, periods=252)
+    every_day = pd.date_range(end=end, periods=365)
+    frames = {f"S{seed}": make_frame(weekdays, seed, 0.002) for seed in range(20)}
+    frames["BTC-USD"] = make_frame(every_day, 99, 0.001)
+    return frames
+
+
+@pytest.fixture
+def rule(monkeypatch, frames):
+    """TradingRules that reads the fixture frames and records recommendations"""
+    monkeypatch.setattr(config, "RECOMMENDATION_MIN_PRICE", 10, raising=False)
+    monkeypatch.setattr(config, "RECOMMENDATION_PULLBACK_PERCENT", 5, raising=False)
+    monkeypatch.setattr(config, "RECOMMENDATION_RSI_MAX", 65, raising=False)
+
+    engine = TradingRules.__new__(TradingRules)
+    engine.indicators = {}
+    engine.sent = {}
+    engine.get_stock_data = lambda symbol, period="1y", interval="1d": frames[symbol]
+
+    def send_recommendation_once(symbol, price, sma_50, high_52w, pullback, rsi):
+        engine.sent[symbol] = (price, sma_50, high_52w, pullback, rsi)
+        return True
+
+    engine.send_recommendation_once = send_recommendation_once
+    return engine
+
+
+def scan(frames):
+    return momentum_pullback_scan(build_close_matrix(frames),
+                                  min_price=config.RECOMMENDATION_MIN_PRICE,
+                                  pullback_percent=config.RECOMMENDATION_PULLBACK_PERCENT,
+                                  rsi_max=config.RECOMMENDATION_RSI_MAX)
+
+
+def test_mixed_calendars_match_per_symbol_rule(rule, frames):
+    results = scan(frames)
+
+    fired = [symbol for symbol in frames if rule.check_momentum_pullback(symbol)]
+    assert fired, "fixture should produce at least one signal"
+    assert sorted(results.index[results["signal"]]) == sorted(fired)
+
+    for symbol in frames:
+        data = frames[symbol]
+        row = results.loc[symbol]
+        assert row["price"] == pytest.approx(data["Close"].iloc[-1])
+        assert row["sma_50"] == pytest.approx(rule.calculate_sma(data, 50).iloc[-1])
+        assert row["high_52w"] == pytest.approx(data["Close"].max())
+        assert row["rsi"] == pytest.approx(rule.calculate_rsi(data, 14))
+
+
+def test_result_does_not_depend_on_chunk_neighbours(rule, frames):
+    stocks = {symbol: data for symbol, data in frames.items() if symbol != "BTC-USD"}
+    alone = scan(stocks)
+    mixed = scan(frames).loc[alone.index]
+    pd.testing.assert_frame_equal(alone, mixed)
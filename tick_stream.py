@@ -0,0 +1,253 @@
+"""
+Tick Stream - React To Prices As They Arrive
+Quote sources plus a price-level index that turns each tick into the rule checks it crossed
+"""
+
+import bisect
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import config
+import metrics
+from accounts import PositionIndex
+from alert_store import RULE_HARD_STOP, RULE_PROFIT_TARGET, RULE_WARNING
+
+
+# One price update. `received` is a time.perf_counter() reading taken when
+# the tick arrived, used to measure how long it took to act on it.
+Tick = namedtuple("Tick", ["symbol", "price", "received"])
+
+
+class QuoteSource(ABC):
+    """
+    Base class - a stream of ticks for a changing set of symbols
+    """
+
+    @abstractmethod
+    def ticks(self) -> Iterator[Tick]:
+        """Ticks until the source is exhausted or closed"""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Stop producing ticks (from another thread)"""
+
+
+class SimulatedFeed(QuoteSource):
+    """
+    Random-walk prices, for trying the streaming mode without a data feed
+
+    Symbols take turns, so every symbol moves once per round. Each move is
+    normally distributed with `volatility` as its standard deviation.
+    """
+
+    def __init__(self, prices: Dict[str, float], rate: float = 20, volatility: float = 0.005,
+                 count: Optional[int] = None, seed: Optional[int] = None):
+        """
+        Args:
+            prices: Starting price per symbol
+            rate: Ticks per second (0 = as fast as possible)
+            volatility: Standard deviation of each move, as a fraction of price
+            count: Stop after this many ticks (None = run until closed)
+            seed: Random seed, for repeatable runs
+        """
+        self.prices = dict(prices)
+        self.rate = rate
+        self.volatility = volatility
+        self.count = count
+        self._random = random.Random(seed)
+        self._closed = threading.Event()
+
+    def ticks(self) -> Iterator[Tick]:
+        sent = 0
+        while not self._closed.is_set():
+            for symbol in list(self.prices):
+                if self.count is not None and sent >= self.count:
+                    return
+                price = self.prices[symbol] * (1 + self._random.gauss(0, self.volatility))
+                self.prices[symbol] = price = max(round(price, 4), 0.01)
+                sent += 1
+                yield Tick(symbol, price, time.perf_counter())
+                if self.rate and self._closed.wait(1 / self.rate):
+                    return
+
+    def close(self) -> None:
+        self._closed.set()
+
+
+class PollingSource(QuoteSource):
+    """
+    Ticks made by polling a MarketDataProvider for 1-minute bars
+
+    All symbols are requested in one download per poll, and a tick is only
+    produced when a symbol's price differs from its previous one.
+    """
+
+    def __init__(self, provider, symbols: Callable[[], List[str]], interval: float = 5):
+        """
+        Args:
+            provider: MarketDataProvider to poll
+            symbols: Function returning the symbols to poll (re-read every poll)
+            interval: Seconds between polls
+        """
+        self.provider = provider
+        self.symbols = symbols
+        self.interval = interval
+        self._last = {}
+        self._closed = threading.Event()
+
+    def ticks(self) -> Iterator[Tick]:
+        while not self._closed.is_set():
+            symbols = self.symbols()
+            try:
+                frames = self.provider.download(symbols, period="1d", interval="1m")
+            except Exception as e:
+                print(f"⚠️  Quote poll failed: {e}")
+                frames = {}
+
+            received = time.perf_counter()
+            for symbol, data in frames.items():
+                price = float(data["Close"].iloc[-1])
+                if self._last.get(symbol) != price:
+                    self._last[symbol] = price
+                    yield Tick(symbol, price, received)
+
+            self._closed.wait(self.interval)
+
+    def close(self) -> None:
+        self._closed.set()
+
+
+class TriggerIndex:
+    """
+    Hard stop, warning and profit target prices per symbol, kept sorted
+
+    A symbol held in several accounts has each position's levels in the
+    same list. Each tick is compared with the symbol's previous price; only
+    the levels between the two prices were crossed, so only their rules need
+    checking and a tick that crosses nothing costs two binary searches.
+    """
+
+    def __init__(self, positions: PositionIndex):
+        # symbol -> [(price, rule, account)] sorted by price
+        self.levels: Dict[str, List[Tuple[float, str, str]]] = {}
+        self.avg_costs: Dict[Tuple[str, str], float] = {}  # (symbol, account) -> avg cost
+        self.last_prices: Dict[str, float] = {}
+        self.rebuild(positions)
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self.levels)
+
+    def rebuild(self, positions: PositionIndex) -> None:
+        """
+        Recompute every level from the positions and the current multipliers
+        (after a portfolio or config.py changed)
+
+        Last prices are forgotten, so each symbol's next tick checks every rule.
+        """
+        self.levels = {}
+        self.avg_costs = {}
+        for symbol, symbol_positions in positions:
+            levels = []
+            for account, holding in symbol_positions:
+                avg_cost = holding["avg_cost"]
+                self.avg_costs[(symbol, account)] = avg_cost
+                levels += [
+                    (avg_cost * config.HARD_STOP_MULTIPLIER, RULE_HARD_STOP, account),
+                    (avg_cost * config.WARNING_MULTIPLIER, RULE_WARNING, account),
+                    (avg_cost * config.PROFIT_TARGET_MULTIPLIER, RULE_PROFIT_TARGET, account),
+                ]
+            self.levels[symbol] = sorted(levels)
+        self.last_prices = {}
+
+    def crossed(self, symbol: str, price: float) -> List[Tuple[str, str]]:
+        """
+        Levels that lie between the symbol's previous price and `price`
+        (inclusive). A symbol's first tick returns every level, so a position
+        that is already past a level is checked once.
+
+        Returns:
+            (rule, account) pairs, empty for symbols nobody holds
+        """
+        levels = self.levels.get(symbol)
+        if levels is None:
+            return []
+
+        previous = self.last_prices.get(symbol)
+        self.last_prices[symbol] = price
+        if previous is not None:
+            low, high = min(previous, price), max(previous, price)
+            levels = levels[bisect.bisect_left(levels, (low,)):bisect.bisect_right(levels, (high, "~"))]
+        return [(rule, account) for _, rule, account in levels]
+
+
+class TickProcessor:
+    """
+    Runs the alert rules for the levels each tick crossed
+
+    The rules are the same check_* methods the periodic check uses, so
+    alerts look the same, go to each account's recipients and
+    already-fired alerts aren't repeated.
+    """
+
+    def __init__(self, rules_engine, positions: PositionIndex):
+        """
+        Args:
+            rules_engine: TradingRules instance
+            positions: Current positions across accounts
+        """
+        self.rules_engine = rules_engine
+        self.index = TriggerIndex(positions)
+        self.checks = {
+            RULE_HARD_STOP: rules_engine.check_hard_stop,
+            RULE_WARNING: rules_engine.check_warning,
+            RULE_PROFIT_TARGET: rules_engine.check_profit_target,
+        }
+
+    def update_positions(self, positions: PositionIndex) -> None:
+        """
+        Rebuild the index and re-check the last known prices against the new levels
+        (a level may have moved past a price that isn't going to tick again soon)
+        """
+        last_prices = self.index.last_prices
+        self.index.rebuild(positions)
+        for symbol, price in last_prices.items():
+            self.process(Tick(symbol, price, time.perf_counter()))
+
+    def process(self, tick: Tick) -> int:
+        """
+        Handle one tick
+
+        Returns:
+            Number of alerts raised
+        """
+        metrics.TICKS.inc()
+        crossed = self.index.crossed(tick.symbol, tick.price)
+        if not crossed:
+            return 0
+
+        raised = 0
+        for rule, account in crossed:
+            metrics.TICK_LEVEL_CROSSINGS.inc(rule=rule)
+            avg_cost = self.index.avg_costs[(tick.symbol, account)]
+            if self.checks[rule](tick.symbol, tick.price, avg_cost, account):
+                raised += 1
+        metrics.TICK_TRIGGER_SECONDS.observe(time.perf_counter() - tick.received)
+        return raised
+
+
+def create_source(name: str, positions: PositionIndex, provider,
+                  symbols: Callable[[], List[str]]) -> QuoteSource:
+    """
+    Quote source by name: "simulated" (random walk from each symbol's
+    first average cost) or "poll" (1-minute bars from the market data provider)
+    """
+    if name == "simulated":
+        return SimulatedFeed({symbol: symbol_positions[0][1]["avg_cost"]
+                              for symbol, symbol_positions in positions})
+    if name == "poll":
+        return PollingSource(provider, symbols, interval=getattr(config, "TICK_POLL_SECONDS", 5))
+    raise ValueError(f"Unknown tick source: {name} (use simulated or poll)")